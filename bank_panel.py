@@ -0,0 +1,376 @@
+# Memory-mapped bank x quarter x metric panel
+# Dense float32 array on disk (np.memmap) with cert and quarter index maps, so
+# cross-sectional slices, peer rankings and multi-bank comparisons are served
+# straight from the page cache instead of re-fetching or rebuilding frames.
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_PANEL_PATH = PROJECT_ROOT / 'data' / 'panel'
+
+PANEL_METRICS = [
+    'total_assets', 'total_deposits', 'total_loans', 'net_income', 'equity_capital',
+    'roa', 'roe', 'nim', 'efficiency_ratio', 'tier1_capital_ratio',
+]
+
+# FDIC /financials field names accepted by compare_banks -> panel metric
+FDIC_METRIC_ALIASES = {
+    'ASSET': 'total_assets',
+    'DEP': 'total_deposits',
+    'LNLSNET': 'total_loans',
+    'NETINC': 'net_income',
+    'EQ': 'equity_capital',
+    'ROA': 'roa',
+    'ROE': 'roe',
+    'NIM': 'nim',
+    'NIMY': 'nim',
+    'EEFFR': 'efficiency_ratio',
+    'RBC1AAJ': 'tier1_capital_ratio',
+    'RBC1RWAJ': 'tier1_capital_ratio',
+}
+
+FIRST_QUARTER = pd.Period('1984Q1', freq='Q')
+QUARTER_CAPACITY = 264   # through 2049Q4
+BANK_HEADROOM = 1.25     # spare bank rows so new certs don't force a resize
+
+PANEL_QUERY = f"""
+    SELECT cert_number, bank_name, date, {', '.join(PANEL_METRICS)}
+    FROM bank_performance
+    WHERE %(since)s::date IS NULL OR date >= %(since)s::date
+    ORDER BY date
+"""
+
+
+class BankPanel:
+    """
+    On-disk panel of bank metrics indexed by [bank, quarter, metric].
+
+    Bank rows are assigned in arrival order and kept stable, so an existing
+    cert's slot never moves; quarter slots are a fixed calendar grid starting
+    at FIRST_QUARTER. Slices with basic indexing (e.g. one quarter across all
+    banks) are views of the memmap, not copies.
+    """
+
+    def __init__(self, path: Union[str, Path], mode: str = 'r'):
+        self.path = Path(path)
+        self.mode = mode
+        with open(self.path / 'index.json') as f:
+            self.index = json.load(f)
+
+        self.metrics: List[str] = self.index['metrics']
+        self.first_quarter = pd.Period(self.index['first_quarter'], freq='Q')
+        self.certs = np.array(self.index['certs'], dtype=np.int64)
+        self.names: List[str] = self.index['names']
+        self.values = np.lib.format.open_memmap(self.path / 'values.npy', mode=mode)
+        self._cert_rows = pd.Index(self.certs)
+        self._metric_slots = {metric: i for i, metric in enumerate(self.metrics)}
+
+    def __len__(self) -> int:
+        return len(self.certs)
+
+    # --- Building and persistence -------------------------------------------------
+
+    @classmethod
+    def create(cls, path: Union[str, Path] = DEFAULT_PANEL_PATH, bank_capacity: int = 1024,
+               metrics: List[str] = None, first_quarter: pd.Period = FIRST_QUARTER,
+               quarter_capacity: int = QUARTER_CAPACITY) -> 'BankPanel':
+        """Create an empty (all-NaN) panel on disk and open it for writing."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        metrics = list(metrics or PANEL_METRICS)
+
+        values = np.lib.format.open_memmap(
+            path / 'values.npy', mode='w+', dtype=np.float32,
+            shape=(bank_capacity, quarter_capacity, len(metrics)),
+        )
+        values[:] = np.nan
+        values.flush()
+        del values
+
+        _write_index(path, {
+            'metrics': metrics,
+            'first_quarter': str(first_quarter),
+            'last_quarter': None,
+            'certs': [],
+            'names': [],
+        })
+        return cls(path, mode='r+')
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, path: Union[str, Path] = DEFAULT_PANEL_PATH) -> 'BankPanel':
+        """Create a panel sized for the banks in `frame` and load it."""
+        n_banks = frame['cert_number'].nunique()
+        panel = cls.create(path, bank_capacity=max(int(n_banks * BANK_HEADROOM), 16))
+        panel.update(frame)
+        return panel
+
+    def update(self, frame: pd.DataFrame) -> int:
+        """
+        Write bank_performance-shaped rows into their [bank, quarter] cells in place
+
+        Parameters:
+        -----------
+        frame : pd.DataFrame
+            Columns cert_number, date, optional bank_name, and any of the panel metrics
+
+        Returns:
+        --------
+        Number of (bank, quarter) cells written
+        """
+        if self.mode == 'r':
+            raise ValueError('Panel was opened read-only; open with mode="r+" to update')
+        if frame.empty:
+            return 0
+
+        frame = frame.drop_duplicates(['cert_number', 'date'], keep='last')
+        self._add_banks(frame)
+
+        rows = self._cert_rows.get_indexer(frame['cert_number'].astype(np.int64))
+        slots = self.quarter_slots(frame['date'])
+        if slots.max() >= self.values.shape[1]:
+            self._resize(quarter_capacity=int(slots.max()) + 1 + 4 * 10)
+
+        metrics = [metric for metric in self.metrics if metric in frame.columns]
+        block = frame[metrics].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32)
+        cols = np.array([self._metric_slots[metric] for metric in metrics])
+        self.values[rows[:, None], slots[:, None], cols[None, :]] = block
+        self.values.flush()
+
+        last = self.first_quarter + int(slots.max())
+        if self.index['last_quarter'] is None or last > pd.Period(self.index['last_quarter'], freq='Q'):
+            self.index['last_quarter'] = str(last)
+        self._save_index()
+        return len(frame)
+
+    def _add_banks(self, frame: pd.DataFrame) -> None:
+        """Assign rows to unseen certs and refresh names from the latest report."""
+        latest = frame.sort_values('date').drop_duplicates('cert_number', keep='last')
+        certs = latest['cert_number'].astype(np.int64).to_numpy()
+        new = certs[self._cert_rows.get_indexer(certs) < 0]
+
+        if len(new):
+            needed = len(self.certs) + len(new)
+            if needed > self.values.shape[0]:
+                self._resize(bank_capacity=int(needed * BANK_HEADROOM))
+            self.certs = np.concatenate([self.certs, new])
+            self.names.extend([''] * len(new))
+            self._cert_rows = pd.Index(self.certs)
+
+        if 'bank_name' in latest.columns:
+            rows = self._cert_rows.get_indexer(certs)
+            for row, name in zip(rows, latest['bank_name']):
+                if isinstance(name, str) and name:
+                    self.names[row] = name
+
+    def _resize(self, bank_capacity: int = None, quarter_capacity: int = None) -> None:
+        """Grow the backing file; existing cells keep their positions."""
+        old_shape = self.values.shape
+        shape = (max(bank_capacity or 0, old_shape[0]), max(quarter_capacity or 0, old_shape[1]), old_shape[2])
+
+        tmp_path = self.path / 'values.resize.npy'
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=shape)
+        grown[:] = np.nan
+        grown[:old_shape[0], :old_shape[1]] = self.values
+        grown.flush()
+        del grown
+
+        del self.values
+        tmp_path.replace(self.path / 'values.npy')
+        self.values = np.lib.format.open_memmap(self.path / 'values.npy', mode='r+')
+
+    def _save_index(self) -> None:
+        self.index['certs'] = self.certs.tolist()
+        self.index['names'] = self.names
+        _write_index(self.path, self.index)
+
+    # --- Index maps -----------------------------------------------------------------
+
+    def quarter_slots(self, dates) -> np.ndarray:
+        """Quarter axis positions for report dates."""
+        periods = pd.PeriodIndex(pd.to_datetime(pd.Series(dates)), freq='Q')
+        slots = (periods.year - self.first_quarter.year) * 4 + (periods.quarter - self.first_quarter.quarter)
+        slots = np.asarray(slots, dtype=np.int64)
+        if (slots < 0).any():
+            raise ValueError(f'Dates before {self.first_quarter} are outside the panel')
+        return slots
+
+    @property
+    def quarter_dates(self) -> pd.DatetimeIndex:
+        """Quarter-end dates for every slot up to the latest loaded quarter."""
+        if self.index['last_quarter'] is None:
+            return pd.DatetimeIndex([])
+        last = pd.Period(self.index['last_quarter'], freq='Q')
+        return pd.period_range(self.first_quarter, last, freq='Q').to_timestamp(how='end').normalize()
+
+    def _resolve_metric(self, metric: str) -> int:
+        name = FDIC_METRIC_ALIASES.get(metric, metric)
+        if name not in self._metric_slots:
+            raise KeyError(f'Unknown panel metric: {metric}')
+        return self._metric_slots[name]
+
+    def _rows_for(self, cert_numbers: List[int]) -> np.ndarray:
+        rows = self._cert_rows.get_indexer(np.asarray(cert_numbers, dtype=np.int64))
+        return rows[rows >= 0]
+
+    def missing_certs(self, cert_numbers: List[int]) -> List[int]:
+        """Requested certs that have no row in the panel."""
+        rows = self._cert_rows.get_indexer(np.asarray(cert_numbers, dtype=np.int64))
+        return [int(cert) for cert, row in zip(cert_numbers, rows) if row < 0]
+
+    def _slot_for(self, date=None) -> int:
+        if date is None:
+            if self.index['last_quarter'] is None:
+                raise ValueError('Panel is empty')
+            return len(self.quarter_dates) - 1
+        return int(self.quarter_slots([date])[0])
+
+    # --- Queries --------------------------------------------------------------------
+
+    def compare(self, cert_numbers: List[int], metric: str = 'ROA', start_date: str = None,
+                end_date: str = None) -> pd.DataFrame:
+        """
+        One metric for several banks: dates as index, bank names as columns (compare_banks layout)
+
+        Certs with no panel row are left out and listed in result.attrs['missing_certs'].
+        """
+        rows = self._rows_for(cert_numbers)
+        dates = self.quarter_dates
+        data = self.values[rows, :len(dates), self._resolve_metric(metric)].T
+
+        result = pd.DataFrame(data, index=dates, columns=[self.names[row] or f'Bank_{self.certs[row]}' for row in rows])
+        result.index.name = 'REPDTE'
+        if start_date:
+            result = result[result.index >= pd.Timestamp(start_date)]
+        if end_date:
+            result = result[result.index <= pd.Timestamp(end_date)]
+        result = result.dropna(how='all')
+        result.attrs['missing_certs'] = self.missing_certs(cert_numbers)
+        return result
+
+    def bank_history(self, cert_number: int, metrics: List[str] = None) -> pd.DataFrame:
+        """All metrics (or a subset) for one bank over time."""
+        rows = self._rows_for([cert_number])
+        if len(rows) == 0:
+            return pd.DataFrame()
+        metrics = metrics or self.metrics
+        dates = self.quarter_dates
+        cols = [self._resolve_metric(metric) for metric in metrics]
+        data = self.values[rows[0], :len(dates)][:, cols]
+        return pd.DataFrame(data, index=dates, columns=metrics).dropna(how='all')
+
+    def cross_section(self, date=None, metrics: List[str] = None) -> pd.DataFrame:
+        """Every bank that reported in a quarter (default: latest), one row per cert."""
+        slot = self._slot_for(date)
+        block = self.values[:len(self.certs), slot]  # view, no copy
+        metrics = metrics or self.metrics
+        cols = [self._resolve_metric(metric) for metric in metrics]
+
+        result = pd.DataFrame(block[:, cols], columns=metrics)
+        result.insert(0, 'bank_name', self.names)
+        result.insert(0, 'cert_number', self.certs)
+        reported = ~np.isnan(block).all(axis=1)
+        return result[reported].reset_index(drop=True)
+
+    def rank(self, metric: str, date=None, cert_numbers: List[int] = None,
+             ascending: bool = False) -> pd.DataFrame:
+        """
+        Rank banks on a metric within a quarter
+
+        Parameters:
+        -----------
+        metric : str
+            Panel metric or FDIC field name (e.g. 'roa' or 'ROA')
+        date : str
+            Any date in the quarter to rank (default: latest loaded quarter)
+        cert_numbers : list
+            Restrict the ranking to this peer group (default: all banks)
+        ascending : bool
+            Rank lowest values first (e.g. efficiency_ratio)
+
+        Returns:
+        --------
+        pd.DataFrame with cert_number, bank_name, value, rank and percentile, best first
+        """
+        slot = self._slot_for(date)
+        column = self.values[:len(self.certs), slot, self._resolve_metric(metric)]
+        rows = np.arange(len(self.certs)) if cert_numbers is None else self._rows_for(cert_numbers)
+        rows = rows[~np.isnan(column[rows])]
+
+        values = column[rows].astype(float)
+        order = np.argsort(values if ascending else -values, kind='stable')
+        rows, values = rows[order], values[order]
+        ranks = np.arange(1, len(rows) + 1)
+
+        return pd.DataFrame({
+            'cert_number': self.certs[rows],
+            'bank_name': [self.names[row] for row in rows],
+            'value': values,
+            'rank': ranks,
+            'percentile': np.round(100.0 * (len(rows) - ranks) / max(len(rows) - 1, 1), 2),
+        })
+
+
+def _write_index(path: Path, index: Dict) -> None:
+    tmp_path = path / 'index.json.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    tmp_path.replace(path / 'index.json')
+
+
+def open_panel(path: Union[str, Path] = DEFAULT_PANEL_PATH, mode: str = 'r') -> Optional[BankPanel]:
+    """Open an existing panel, or None if none has been built."""
+    path = Path(path)
+    if not (path / 'index.json').exists():
+        return None
+    return BankPanel(path, mode=mode)
+
+
+def load_panel_source(conn=None, parquet: Union[str, Path] = None, since: str = None) -> pd.DataFrame:
+    """bank_performance rows from PostgreSQL or a Parquet file, optionally only recent dates."""
+    if parquet is not None:
+        frame = pd.read_parquet(parquet)
+        frame['date'] = pd.to_datetime(frame['date'])
+        if since:
+            frame = frame[frame['date'] >= pd.Timestamp(since)]
+        return frame
+    return pd.read_sql_query(PANEL_QUERY, conn, params={'since': since}, parse_dates=['date'])
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build or update the memory-mapped bank panel.')
+    parser.add_argument('--path', type=Path, default=DEFAULT_PANEL_PATH)
+    parser.add_argument('--parquet', type=Path, help='Load bank_performance from a Parquet file instead of the database')
+    parser.add_argument('--since', help='Only load report dates on or after this date (quarterly update)')
+    parser.add_argument('--rebuild', action='store_true', help='Recreate the panel from scratch')
+    args = parser.parse_args()
+
+    conn = None
+    if args.parquet is None:
+        from pipeline_config import connect
+
+        conn = connect()
+    try:
+        frame = load_panel_source(conn, args.parquet, args.since)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    panel = None if args.rebuild else open_panel(args.path, mode='r+')
+    if panel is None:
+        panel = BankPanel.build(frame, args.path)
+        print(f'✓ Built panel at {args.path}: {len(panel)} banks, {len(frame)} bank-quarters')
+    else:
+        written = panel.update(frame)
+        print(f'✓ Updated panel at {args.path}: {written} bank-quarters written, {len(panel)} banks')
+    print(f"  Latest quarter: {panel.index['last_quarter']}, shape {panel.values.shape}")
+
+
+if __name__ == '__main__':
+    main()
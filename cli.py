@@ -0,0 +1,162 @@
+"""
+Single entry point for the Python data pipeline.
+
+Each subcommand maps to a pipeline module that is imported only when that
+command runs, so `--help`, `list` and `status` start without loading pandas,
+psycopg2 or fredapi. Arguments after the command are passed through to the
+module's own parser (`python3 cli.py backtest --help`). `run` executes several
+steps in one process so they share imports and configuration.
+
+Usage:
+    python3 cli.py <command> [args...]
+    python3 cli.py run fetch-fred fetch-banks validate seed export
+    python3 cli.py status [--db]
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+
+# command -> (module with main(), one-line description)
+COMMANDS = {
+    'fetch-fred': ('db.fetch_fred_data', 'Download FRED series -> data/fred_data.csv'),
+    'fetch-banks': ('db.fetch_major_bank_data', 'Download FDIC financials for the major banks -> data/bank_data.csv'),
+    'validate': ('db.validate_bank_data', 'Check data/bank_data.csv before seeding'),
+    'seed': ('db.seed_database', 'Load the CSVs into PostgreSQL (changed rows only)'),
+    'export': ('scripts.export_postgres_csv', 'Export tables and the joined dataset to data/exports/'),
+    'alerts': ('db.evaluate_alerts', 'Evaluate alert thresholds against new economic dates'),
+    'backtest': ('db.backtest_strategies', 'Walk-forward backtest -> performance_records'),
+    'simulate': ('db.simulate_scenarios', 'Monte Carlo outlook -> scenario_allocations'),
+    'optimize': ('db.optimize_allocations', 'Efficient frontier -> portfolio_allocations'),
+    'features': ('db.build_feature_store', 'Point-in-time bank x macro features -> bank_macro_features'),
+    'train-roa': ('roa_forecasting', 'Train the next-quarter ROA model -> data/models/'),
+    'score': ('db.score_scenarios', 'ROA forecasts for every bank x scenario'),
+    'correlations': ('db.build_correlation_cube', 'Rolling correlation matrices -> correlation_cube'),
+    'peers': ('db.build_peer_groups', 'Quarterly peer groups for every bank -> peer_groups'),
+    'panel': ('bank_panel', 'Build or update the bank x quarter x metric panel'),
+    'directory': ('institution_directory', 'Snapshot or search the offline FDIC institution directory'),
+    'profile': ('data_profile', 'Single-pass approximate profile of CSV/Parquet files or a table'),
+    'synthetic': ('synthetic_data', 'Synthetic FDIC/FRED datasets for N banks x Q quarters -> data/synthetic/'),
+    'bench-sql': ('scripts.benchmark_dashboard_sql', 'EXPLAIN ANALYZE the dashboard SQL on synthetic data vs. a baseline'),
+    'presentation': ('scripts.create_project2_team_presentation', 'Build the team presentation deck'),
+    'refresh': ('refresh', 'Fetch, validate, seed and export as a parallel, checkpointed graph'),
+}
+
+# Files `status` reports on (label -> path relative to the project root)
+STATUS_FILES = {
+    'FRED CSV': 'data/fred_data.csv',
+    'Bank CSV': 'data/bank_data.csv',
+    'Institution directory': 'data/institutions.npz',
+    'Bank panel': 'data/panel/index.json',
+    'ROA model': 'data/models/roa_model_latest.json',
+}
+STATUS_TABLES = ['economic_data', 'bank_performance', 'scenario_allocations', 'performance_records', 'triggered_alerts']
+
+
+def run_command(name: str, args: list) -> None:
+    """Import a command's module and call its main() with `args` as its argv."""
+    module_name, _ = COMMANDS[name]
+    saved_argv = sys.argv
+    sys.argv = [f'cli.py {name}', *args]
+    try:
+        importlib.import_module(module_name).main()
+    finally:
+        sys.argv = saved_argv
+
+
+def format_age(seconds: float) -> str:
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f'{seconds / size:.0f}{unit} ago'
+    return f'{seconds:.0f}s ago'
+
+
+def status(check_db: bool) -> None:
+    from pipeline_config import db_config
+
+    cfg = db_config()
+    print(f"Database: {cfg['user']}@{cfg['host']}:{cfg['port']}/{cfg['dbname']}")
+
+    now = time.time()
+    for label, relative in STATUS_FILES.items():
+        path = PROJECT_ROOT / relative
+        if path.exists():
+            stat = path.stat()
+            print(f'  ✓ {label:<22} {relative} ({stat.st_size / 1024:,.0f} KB, {format_age(now - stat.st_mtime)})')
+        else:
+            print(f'  ⚠ {label:<22} {relative} missing')
+
+    if not check_db:
+        return
+
+    from pipeline_config import connect
+
+    try:
+        conn = connect(connect_timeout=5)
+    except Exception as exc:
+        print(f'  ✗ Cannot connect: {exc}')
+        sys.exit(1)
+    try:
+        cur = conn.cursor()
+        for table in STATUS_TABLES:
+            cur.execute(f'SELECT COUNT(*), MAX(created_at) FROM {table}')
+            count, latest = cur.fetchone()
+            print(f'  ✓ {table:<22} {count:>10,} rows  last write {latest or "-"}')
+        cur.close()
+    finally:
+        conn.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='Bank Lending Strategy Optimizer data pipeline.',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='commands:\n' + '\n'.join(f'  {name:<14} {help_}' for name, (_, help_) in COMMANDS.items()),
+    )
+    sub = parser.add_subparsers(dest='command', metavar='command')
+
+    status_parser = sub.add_parser('status', help='Show configuration, data files and (with --db) table counts')
+    status_parser.add_argument('--db', action='store_true', help='Also connect and count rows')
+
+    run_parser = sub.add_parser('run', help='Run several steps in order in one process (default arguments)')
+    run_parser.add_argument('steps', nargs='+', choices=list(COMMANDS), metavar='step')
+
+    sub.add_parser('list', help='List pipeline commands')
+    for name, (_, help_) in COMMANDS.items():
+        sub.add_parser(name, help=help_, add_help=False)
+    return parser
+
+
+def main(argv: list = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    # Everything after a pipeline command belongs to that command's own parser
+    if argv and argv[0] in COMMANDS:
+        os.chdir(PROJECT_ROOT)
+        run_command(argv[0], argv[1:])
+        return
+
+    args = build_parser().parse_args(argv)
+    if args.command == 'status':
+        status(args.db)
+    elif args.command == 'run':
+        os.chdir(PROJECT_ROOT)
+        for step in args.steps:
+            print(f'\n=== {step} ===')
+            started = time.perf_counter()
+            run_command(step, [])
+            print(f'=== {step} done in {time.perf_counter() - started:.1f}s ===')
+    elif args.command == 'list':
+        for name, (module_name, help_) in COMMANDS.items():
+            print(f'{name:<14} {module_name:<42} {help_}')
+    else:
+        build_parser().print_help()
+
+
+if __name__ == '__main__':
+    main()
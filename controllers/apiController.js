@@ -175,6 +175,109 @@ async function getCorrelationData(req, res) {
   }
 }
 
+function parseCubeKey(query) {
+  const cert = query.cert === undefined ? 0 : Number(query.cert);
+  const windowQuarters = query.window === undefined ? 0 : Number(query.window);
+  if (!Number.isInteger(cert) || cert < 0 || !Number.isInteger(windowQuarters) || windowQuarters < 0) {
+    return null;
+  }
+  return { cert, windowQuarters };
+}
+
+async function getCorrelationMatrix(req, res) {
+  try {
+    const key = parseCubeKey(req.query);
+    if (!key) {
+      return res.status(400).json({ error: 'cert and window must be non-negative integers' });
+    }
+    const endDate = normalizeDateInput(req.query.end_date);
+
+    const result = await pool.query(`
+      SELECT end_date, n_obs, variables, correlations
+      FROM correlation_cube
+      WHERE cert_number = $1
+        AND window_quarters = $2
+        AND ($3::date IS NULL OR end_date <= $3::date)
+      ORDER BY end_date DESC
+      LIMIT 1
+    `, [key.cert, key.windowQuarters, endDate]);
+
+    const row = result.rows[0];
+    if (!row) {
+      return res.status(404).json({ error: 'No correlation matrix for that cert/window/date' });
+    }
+
+    // Expand the stored upper triangle into a symmetric matrix.
+    const size = row.variables.length;
+    const matrix = Array.from({ length: size }, (_, i) => Array.from({ length: size }, (__, j) => (i === j ? 1 : null)));
+    let k = 0;
+    for (let i = 0; i < size; i += 1) {
+      for (let j = i + 1; j < size; j += 1) {
+        matrix[i][j] = row.correlations[k];
+        matrix[j][i] = row.correlations[k];
+        k += 1;
+      }
+    }
+
+    res.json({
+      cert: key.cert,
+      window_quarters: key.windowQuarters,
+      end_date: toDateKey(row.end_date),
+      n_obs: row.n_obs,
+      variables: row.variables,
+      matrix,
+    });
+  } catch (err) {
+    console.error('Error fetching correlation matrix:', err);
+    res.status(500).json({ error: 'Server error' });
+  }
+}
+
+async function getCorrelationSeries(req, res) {
+  try {
+    const key = parseCubeKey(req.query);
+    const { x, y } = req.query;
+    if (!key || !x || !y || x === y) {
+      return res.status(400).json({ error: 'cert, window and two distinct variables x and y are required' });
+    }
+
+    // Upper-triangle offset for (a, b), a < b, in a v x v matrix (0-based; arrays are 1-based).
+    const result = await pool.query(`
+      WITH positions AS (
+        SELECT
+          end_date,
+          n_obs,
+          correlations,
+          cardinality(variables) AS v,
+          array_position(variables, $3) - 1 AS px,
+          array_position(variables, $4) - 1 AS py
+        FROM correlation_cube
+        WHERE cert_number = $1 AND window_quarters = $2
+      ),
+      pairs AS (
+        SELECT end_date, n_obs, correlations, v, LEAST(px, py) AS a, GREATEST(px, py) AS b
+        FROM positions
+        WHERE px IS NOT NULL AND py IS NOT NULL
+      )
+      SELECT
+        end_date,
+        n_obs,
+        correlations[a * v - a * (a + 1) / 2 + (b - a - 1) + 1] AS correlation
+      FROM pairs
+      ORDER BY end_date ASC
+    `, [key.cert, key.windowQuarters, x, y]);
+
+    res.json(result.rows.map((row) => ({
+      end_date: toDateKey(row.end_date),
+      n_obs: row.n_obs,
+      correlation: row.correlation,
+    })));
+  } catch (err) {
+    console.error('Error fetching correlation series:', err);
+    res.status(500).json({ error: 'Server error' });
+  }
+}
+
 async function getDashboardMetrics(req, res) {
   try {
     const cert = Number(req.query.cert) || 6560;
@@ -967,6 +1070,8 @@ module.exports = {
   getEconomicData,
   getBankPerformanceByCert,
   getCorrelationData,
+  getCorrelationMatrix,
+  getCorrelationSeries,
   getDashboardMetrics,
   getBankComparisonSeries,
   getBankCompositeScores,
@@ -0,0 +1,423 @@
+# Streaming data profiler
+# Chunked, single-pass version of the notebook's data_audit: every column keeps
+# mergeable sketches (HyperLogLog distinct count, t-digest quantiles, null
+# count, min/max, a few example values), so partitions of a large CSV/Parquet
+# export are profiled in parallel with bounded memory and merged at the end.
+
+import argparse
+import io
+import math
+import numbers
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+HLL_PRECISION = 14                # 16,384 registers, ~0.8% standard error
+TDIGEST_COMPRESSION = 200
+DEFAULT_CHUNK_ROWS = 250_000
+EXAMPLE_COUNT = 6
+SUMMARY_QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+
+_UINT64_MAX = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+class HyperLogLog:
+    """Distinct-count sketch over 64-bit hashes; merge is a register-wise max."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        slots = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # Remaining bits, with a guard bit so the run of leading zeros is bounded
+        rest = (hashes << np.uint64(self.precision)) | (np.uint64(1) << np.uint64(self.precision - 1))
+        zeros = np.zeros(len(rest), dtype=np.uint8)
+        for shift in (32, 16, 8, 4, 2, 1):
+            short = rest <= (_UINT64_MAX >> np.uint64(shift))
+            zeros[short] += shift
+            rest[short] <<= np.uint64(shift)
+        np.maximum.at(self.registers, slots, zeros + 1)
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            return int(round(m * math.log(m / empty)))    # linear counting for small sets
+        return int(round(raw))
+
+
+class TDigest:
+    """
+    Merging t-digest (arcsine scale function) for approximate quantiles
+
+    Centroids are kept sorted by mean; adding values or another digest merges
+    everything and re-clusters so each centroid covers at most one unit of the
+    scale function, which keeps the tails accurate and the size ~compression.
+    """
+
+    def __init__(self, compression: int = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def add(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._compress(np.concatenate([self.means, values]),
+                           np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other: 'TDigest') -> None:
+        if len(other.means):
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        midpoints = (np.cumsum(weights) - weights / 2) / total
+        scale = self.compression / (2 * math.pi) * np.arcsin(2 * midpoints - 1)
+        clusters = np.floor(scale - scale[0]).astype(np.intp)
+        cluster_weights = np.bincount(clusters, weights=weights)
+        keep = cluster_weights > 0
+        self.means = (np.bincount(clusters, weights=means * weights)[keep] / cluster_weights[keep])
+        self.weights = cluster_weights[keep]
+
+    def quantiles(self, qs: List[float], minimum: float, maximum: float) -> List[float]:
+        if not len(self.means):
+            return [float('nan')] * len(qs)
+        total = self.weights.sum()
+        positions = np.concatenate([[0.0], np.cumsum(self.weights) - self.weights / 2, [total]])
+        means = np.concatenate([[minimum], self.means, [maximum]])
+        return [float(v) for v in np.interp(np.asarray(qs) * total, positions, means)]
+
+
+class ColumnProfile:
+    """Mergeable per-column statistics."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.dtypes = set()
+        self.rows = 0
+        self.missing = 0
+        self.minimum = None
+        self.maximum = None
+        self.examples: List[str] = []
+        self.distinct = HyperLogLog()
+        self.digest = TDigest()
+
+    def update(self, series: pd.Series) -> None:
+        self.dtypes.add(str(series.dtype))
+        self.rows += len(series)
+        present = series.dropna()
+        self.missing += len(series) - len(present)
+        if present.empty:
+            return
+
+        if pd.api.types.is_bool_dtype(present):
+            present = present.astype(np.int8)
+        if pd.api.types.is_numeric_dtype(present):
+            values = present.to_numpy(dtype=np.float64)
+            self.digest.add(values)
+            # Hash numbers as float64 so 1 and 1.0 from differently inferred chunks agree
+            keys = pd.Series(values)
+            low, high = present.min(), present.max()
+        else:
+            keys = present.astype(str)
+            low, high = keys.min(), keys.max()
+            if pd.api.types.is_datetime64_any_dtype(present):
+                low, high = present.min(), present.max()
+        self.distinct.add_hashes(pd.util.hash_pandas_object(keys, index=False).to_numpy())
+        self._extend(low, high)
+
+        if len(self.examples) < EXAMPLE_COUNT:
+            for value in present.head(1000).astype(str).unique():
+                if value not in self.examples:
+                    self.examples.append(value)
+                    if len(self.examples) == EXAMPLE_COUNT:
+                        break
+
+    def _extend(self, low, high) -> None:
+        try:
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+        except TypeError:
+            # Mixed types across chunks (e.g. numbers then strings): compare as text
+            self.minimum = min(str(self.minimum), str(low))
+            self.maximum = max(str(self.maximum), str(high))
+
+    def merge(self, other: 'ColumnProfile') -> None:
+        self.dtypes |= other.dtypes
+        self.rows += other.rows
+        self.missing += other.missing
+        if other.minimum is not None:
+            self._extend(other.minimum, other.maximum)
+        self.distinct.merge(other.distinct)
+        self.digest.merge(other.digest)
+        for value in other.examples:
+            if len(self.examples) >= EXAMPLE_COUNT:
+                break
+            if value not in self.examples:
+                self.examples.append(value)
+
+    @property
+    def dtype(self) -> str:
+        """Widest dtype seen across chunks."""
+        if len(self.dtypes) == 1:
+            return next(iter(self.dtypes))
+        if all(d.startswith(('int', 'float', 'bool', 'uint')) for d in self.dtypes):
+            return 'float64'
+        return 'object'
+
+    def summary(self) -> dict:
+        row = {
+            'column': self.name,
+            'dtype': self.dtype,
+            'n_rows': self.rows,
+            'n_missing': self.missing,
+            'pct_missing': self.missing / self.rows if self.rows else 0.0,
+            'n_unique': self.distinct.estimate(),
+            'min': self.minimum,
+            'max': self.maximum,
+        }
+        if self.digest.count and isinstance(self.minimum, numbers.Real) and isinstance(self.maximum, numbers.Real):
+            quantiles = self.digest.quantiles(SUMMARY_QUANTILES, float(self.minimum), float(self.maximum))
+            for q, value in zip(SUMMARY_QUANTILES, quantiles):
+                row[f'p{int(q * 100):02d}'] = value
+        row['example_values'] = ', '.join(self.examples)
+        return row
+
+
+class DatasetProfile:
+    """Column profiles for one partition or, after merge(), a whole dataset."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.rows += len(chunk)
+        for name in chunk.columns:
+            if name not in self.columns:
+                self.columns[name] = ColumnProfile(name)
+            self.columns[name].update(chunk[name])
+
+    def merge(self, other: 'DatasetProfile') -> None:
+        self.rows += other.rows
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per column, ordered like the notebook's data_audit."""
+        if not self.columns:
+            return pd.DataFrame()
+        out = pd.DataFrame([column.summary() for column in self.columns.values()])
+        return out.sort_values(['pct_missing', 'n_unique'], ascending=[False, True]).reset_index(drop=True)
+
+
+# --- Partitions -------------------------------------------------------------------
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+
+    def __init__(self, path: Path, start: int, end: int):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def csv_partitions(path: Path, parts: int) -> List[Tuple]:
+    """
+    Split a CSV into byte ranges that start and end on line boundaries
+
+    Assumes no quoted field spans lines, which holds for the FDIC/FRED pulls
+    and the pipeline's own exports.
+    """
+    size = path.stat().st_size
+    with open(path, 'rb') as f:
+        header = f.readline().decode().rstrip('\r\n')
+        body_start = f.tell()
+        bounds = [body_start]
+        for i in range(1, parts):
+            f.seek(max(body_start, size * i // parts))
+            f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+        bounds.append(size)
+    names = list(pd.read_csv(io.StringIO(header), nrows=0).columns)
+    return [('csv', str(path), start, end, names) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def parquet_partitions(path: Path, parts: int) -> List[Tuple]:
+    """Group a Parquet file's row groups into at most `parts` partitions."""
+    import pyarrow.parquet as pq
+
+    groups = list(range(pq.ParquetFile(path).num_row_groups))
+    if not groups:
+        return []
+    return [('parquet', str(path), chunk.tolist()) for chunk in np.array_split(groups, min(parts, len(groups)))]
+
+
+def dataset_partitions(paths: List[Path], parts: int) -> List[Tuple]:
+    """Partitions across every file (directories expand to their CSV/Parquet files)."""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.suffix in ('.csv', '.parquet')))
+        else:
+            files.append(path)
+    per_file = max(1, math.ceil(parts / max(1, len(files))))
+    partitions = []
+    for path in files:
+        if path.suffix == '.parquet':
+            partitions.extend(parquet_partitions(path, per_file))
+        else:
+            partitions.extend(csv_partitions(path, per_file))
+    return partitions
+
+
+def iter_partition(partition: Tuple, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    kind, path = partition[0], partition[1]
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, row_groups=partition[2]):
+            yield batch.to_pandas()
+    else:
+        _, _, start, end, names = partition
+        with _ByteRange(Path(path), start, end) as raw:
+            stream = io.BufferedReader(raw, buffer_size=1 << 20)
+            yield from pd.read_csv(stream, header=None, names=names, chunksize=chunk_rows, low_memory=False)
+
+
+def profile_partition(partition: Tuple, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> DatasetProfile:
+    profile = DatasetProfile()
+    for chunk in iter_partition(partition, chunk_rows):
+        profile.update(chunk)
+    return profile
+
+
+def profile_table(table: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> DatasetProfile:
+    """Stream a PostgreSQL table through a server-side cursor."""
+    from psycopg2 import sql
+
+    from pipeline_config import connect
+
+    profile = DatasetProfile()
+    conn = connect()
+    try:
+        cur = conn.cursor(name='profile_stream')
+        cur.itersize = chunk_rows
+        # Quote the name ('schema.table' -> "schema"."table") instead of pasting it into the SQL
+        cur.execute(sql.SQL('SELECT * FROM {}').format(sql.Identifier(*table.split('.'))))
+        columns = None
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if columns is None:
+                columns = [desc[0] for desc in cur.description]
+            if not rows:
+                break
+            profile.update(pd.DataFrame(rows, columns=columns))
+        cur.close()
+    finally:
+        conn.close()
+    return profile
+
+
+def profile_files(paths: List[Path], workers: Optional[int] = None,
+                  chunk_rows: int = DEFAULT_CHUNK_ROWS) -> DatasetProfile:
+    """
+    Profile CSV/Parquet files in one pass
+
+    Parameters:
+    -----------
+    paths : list
+        Files or directories of .csv/.parquet files with the same columns
+    workers : int
+        Processes to profile partitions in (default: one per CPU)
+    chunk_rows : int
+        Rows held in memory per worker at a time
+
+    Returns:
+    --------
+    DatasetProfile merged across all partitions
+    """
+    workers = workers or os.cpu_count() or 1
+    partitions = dataset_partitions([Path(p) for p in paths], workers)
+    merged = DatasetProfile()
+    if workers == 1 or len(partitions) == 1:
+        for partition in partitions:
+            merged.merge(profile_partition(partition, chunk_rows))
+        return merged
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(profile_partition, partitions, [chunk_rows] * len(partitions)):
+            merged.merge(result)
+    return merged
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Single-pass approximate profile of CSV/Parquet data or a table.')
+    parser.add_argument('paths', nargs='*', type=Path, help='CSV/Parquet files or directories')
+    parser.add_argument('--table', help='Profile a PostgreSQL table instead of files')
+    parser.add_argument('--workers', type=int, help='Parallel partitions (default: CPU count)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--output', type=Path, help='Also write the profile to this CSV')
+    args = parser.parse_args()
+    if bool(args.paths) == bool(args.table):
+        parser.error('give either file paths or --table')
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if args.table:
+        profile = profile_table(args.table, args.chunk_rows)
+    else:
+        profile = profile_files(args.paths, args.workers, args.chunk_rows)
+
+    audit = profile.to_frame()
+    print(f'rows={profile.rows:,} columns={len(profile.columns)}')
+    with pd.option_context('display.max_columns', None, 'display.width', 200, 'display.max_colwidth', 40):
+        print(audit.to_string(index=False))
+    if args.output:
+        audit.to_csv(args.output, index=False)
+        print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Database pipeline steps (run through cli.py or python3 -m db.<module>)."""
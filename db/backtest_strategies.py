@@ -0,0 +1,195 @@
+"""
+Walk-forward backtest of every lending strategy's latest portfolio allocation.
+
+For each test date the predicted return of a loan category is its trailing
+mean net return over the lookback window, and the actual return is the mean
+realized over the following test period. Strategy returns are the allocation
+weighted sums, computed for all strategies and test dates at once, and the
+results replace the strategy's rows in performance_records.
+
+Usage:
+    python3 cli.py backtest [--lookback 36] [--step 3] [--workers 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db.loan_returns import allocation_weights, category_return_matrix, load_economic_history
+from db.seed_database import connect_to_database
+
+DEFAULT_LOOKBACK_MONTHS = 36
+DEFAULT_STEP_MONTHS = 3
+
+LATEST_ALLOCATIONS_QUERY = """
+    SELECT DISTINCT ON (pa.strategy_id)
+        pa.strategy_id,
+        pa.credit_card_allocation,
+        pa.mortgage_allocation,
+        pa.consumer_loan_allocation,
+        pa.commercial_allocation
+    FROM portfolio_allocations pa
+    JOIN lending_strategies ls ON ls.id = pa.strategy_id
+    ORDER BY pa.strategy_id, pa.created_at DESC, pa.id DESC
+"""
+
+RESULT_COLUMNS = ['actual_return', 'predicted_return', 'mae', 'rmse', 'sharpe_ratio']
+
+
+def test_positions(n_months: int, lookback: int, step: int) -> np.ndarray:
+    """Row positions of walk-forward test dates that have a full lookback and test period."""
+    return np.arange(lookback, n_months - step + 1, step)
+
+
+def backtest_weights(weights: np.ndarray, returns: np.ndarray, positions: np.ndarray,
+                     lookback: int, step: int) -> dict[str, np.ndarray]:
+    """
+    Backtest an (S, K) weight matrix against a (T, K) monthly return matrix.
+
+    Returns (S, N) arrays keyed by performance_records column, where N is the
+    number of test positions. mae/rmse accumulate over test dates up to and
+    including each date; sharpe_ratio uses the trailing lookback window.
+    """
+    # Prefix sums let every window mean be a difference of two rows.
+    csum = np.vstack([np.zeros((1, returns.shape[1])), np.cumsum(returns, axis=0)])
+    predicted_cat = (csum[positions] - csum[positions - lookback]) / lookback
+    actual_cat = (csum[positions + step] - csum[positions]) / step
+
+    predicted = weights @ predicted_cat.T
+    actual = weights @ actual_cat.T
+    errors = actual - predicted
+    counts = np.arange(1, len(positions) + 1)
+    mae = np.cumsum(np.abs(errors), axis=1) / counts
+    rmse = np.sqrt(np.cumsum(errors ** 2, axis=1) / counts)
+
+    portfolio = weights @ returns.T
+    p_sum = np.hstack([np.zeros((len(weights), 1)), np.cumsum(portfolio, axis=1)])
+    p_sq = np.hstack([np.zeros((len(weights), 1)), np.cumsum(portfolio ** 2, axis=1)])
+    window_mean = (p_sum[:, positions] - p_sum[:, positions - lookback]) / lookback
+    window_sq = (p_sq[:, positions] - p_sq[:, positions - lookback]) / lookback
+    window_std = np.sqrt(np.clip(window_sq - window_mean ** 2, 0.0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(window_std > 1e-12, window_mean / window_std, np.nan)
+
+    return {
+        'actual_return': actual,
+        'predicted_return': predicted,
+        'mae': mae,
+        'rmse': rmse,
+        'sharpe_ratio': sharpe,
+    }
+
+
+def run_backtests(strategy_ids: np.ndarray, weights: np.ndarray, returns: pd.DataFrame,
+                  lookback: int = DEFAULT_LOOKBACK_MONTHS, step: int = DEFAULT_STEP_MONTHS,
+                  workers: int = 1) -> pd.DataFrame:
+    """Backtest all strategies and return one long-format row per strategy and test date."""
+    positions = test_positions(len(returns), lookback, step)
+    if len(positions) == 0 or len(weights) == 0:
+        return pd.DataFrame(columns=['strategy_id', 'test_date'] + RESULT_COLUMNS)
+
+    matrix = returns.to_numpy(dtype=float)
+    run_chunk = partial(backtest_weights, returns=matrix, positions=positions,
+                        lookback=lookback, step=step)
+
+    if workers > 1 and len(weights) > workers:
+        chunks = np.array_split(weights, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(run_chunk, chunks))
+        results = {col: np.vstack([part[col] for part in parts]) for col in RESULT_COLUMNS}
+    else:
+        results = run_chunk(weights)
+
+    n_strategies, n_dates = len(strategy_ids), len(positions)
+    out = pd.DataFrame({
+        'strategy_id': np.repeat(strategy_ids, n_dates),
+        'test_date': np.tile(returns.index[positions].date, n_strategies),
+    })
+    for col in RESULT_COLUMNS:
+        out[col] = results[col].reshape(-1)
+    return out
+
+
+def write_performance_records(conn, records: pd.DataFrame, strategy_ids) -> None:
+    """Replace performance_records for the backtested strategies in one transaction."""
+    cur = conn.cursor()
+    cur.execute(
+        'DELETE FROM performance_records WHERE strategy_id = ANY(%s)',
+        ([int(sid) for sid in strategy_ids],),
+    )
+
+    values = records[RESULT_COLUMNS].round(4).astype(object)
+    values = values.where(values.notna(), None)
+    rows = [
+        (int(sid), test_date, *vals)
+        for sid, test_date, vals in zip(
+            records['strategy_id'], records['test_date'], values.itertuples(index=False, name=None)
+        )
+    ]
+
+    execute_values(
+        cur,
+        """
+        INSERT INTO performance_records (
+            strategy_id, test_date, actual_return, predicted_return, mae, rmse, sharpe_ratio
+        ) VALUES %s
+        """,
+        rows,
+        page_size=1000,
+    )
+    conn.commit()
+    cur.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Backtest lending strategies into performance_records.')
+    parser.add_argument('--lookback', type=int, default=DEFAULT_LOOKBACK_MONTHS,
+                        help='Trailing months used to predict each test period')
+    parser.add_argument('--step', type=int, default=DEFAULT_STEP_MONTHS,
+                        help='Months between test dates (and length of each test period)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes to split strategies across')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    conn = connect_to_database()
+    try:
+        returns = category_return_matrix(load_economic_history(conn))
+        allocations = pd.read_sql_query(LATEST_ALLOCATIONS_QUERY, conn)
+        if allocations.empty:
+            print('  ℹ No portfolio allocations found; nothing to backtest')
+            return
+
+        strategy_ids = allocations['strategy_id'].to_numpy()
+        records = run_backtests(
+            strategy_ids,
+            allocation_weights(allocations),
+            returns,
+            lookback=args.lookback,
+            step=args.step,
+            workers=args.workers,
+        )
+        if records.empty:
+            print(f'  ⚠ Only {len(returns)} months of economic data; need more than {args.lookback + args.step}')
+            return
+
+        write_performance_records(conn, records, strategy_ids)
+        print(f'✓ Backtested {len(strategy_ids)} strategies over '
+              f'{records["test_date"].nunique()} test dates ({len(records)} performance records)')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
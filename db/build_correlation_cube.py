@@ -0,0 +1,238 @@
+"""
+Precompute full and rolling correlation matrices into correlation_cube.
+
+Variables are every economic_data indicator plus its 3/6-month lags, and the
+bank_performance metrics, aligned on the quarterly bank reporting grid (the
+economic row for the report month, as in /api/correlation). The industry
+entity (cert_number 0) uses the cross-bank median of each metric; each cert
+gets its own cube.
+
+All windows and end dates for an entity come from one set of pairwise-complete
+prefix sums. Each stored row keeps a hash of the input rows in its window, so
+re-runs only recompute windows whose data changed (new quarters or revisions).
+
+Usage:
+    python3 cli.py correlations [--certs 628,3510] [--industry-only] [--force]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db.seed_database import connect_to_database
+
+ECONOMIC_INDICATORS = [
+    'delinq_cc', 'delinq_mortgage', 'delinq_consumer',
+    'fed_funds_rate', 'prime_rate', 'mortgage_30y', 'treasury_10y', 'treasury_2y',
+    'unemployment_rate', 'gdp_growth', 'cpi', 'housing_starts', 'personal_income',
+    'consumer_sentiment', 'net_interest_margin', 'yield_curve',
+]
+LAG_MONTHS = (3, 6)
+BANK_METRICS = [
+    'roa', 'roe', 'nim', 'efficiency_ratio', 'tier1_capital_ratio',
+    'total_assets', 'total_loans', 'total_deposits', 'net_income',
+]
+
+# Rolling windows in quarters; 0 means all history up to the end date.
+WINDOWS = (8, 20, 40, 0)
+MIN_OBSERVATIONS = 6
+INDUSTRY_CERT = 0
+
+
+def economic_variables(conn) -> pd.DataFrame:
+    """Monthly indicators plus lagged copies, indexed by month period."""
+    econ = pd.read_sql_query(
+        f"SELECT date, {', '.join(ECONOMIC_INDICATORS)} FROM economic_data ORDER BY date",
+        conn,
+        parse_dates=['date'],
+    )
+    econ.index = econ.pop('date').dt.to_period('M')
+    econ = econ.apply(pd.to_numeric, errors='coerce')
+
+    lagged = [econ.shift(lag).add_suffix(f'_lag{lag}') for lag in LAG_MONTHS]
+    return pd.concat([econ, *lagged], axis=1)
+
+
+def bank_metric_frames(conn, certs: list[int] | None, industry_only: bool) -> dict[int, pd.DataFrame]:
+    """Quarterly bank metric frames keyed by cert (INDUSTRY_CERT = cross-bank median)."""
+    banks = pd.read_sql_query(
+        f"SELECT cert_number, date, {', '.join(BANK_METRICS)} FROM bank_performance ORDER BY date",
+        conn,
+        parse_dates=['date'],
+    )
+    banks[BANK_METRICS] = banks[BANK_METRICS].apply(pd.to_numeric, errors='coerce')
+
+    frames = {INDUSTRY_CERT: banks.groupby('date')[BANK_METRICS].median()}
+    if industry_only:
+        return frames
+
+    selected = banks if certs is None else banks[banks['cert_number'].isin(certs)]
+    for cert, grp in selected.groupby('cert_number'):
+        frames[int(cert)] = grp.set_index('date')[BANK_METRICS]
+    return frames
+
+
+def align_entity(bank_frame: pd.DataFrame, econ: pd.DataFrame) -> pd.DataFrame:
+    """Join the economic row for each report month onto an entity's quarterly metrics."""
+    econ_rows = econ.reindex(bank_frame.index.to_period('M'))
+    econ_rows.index = bank_frame.index
+    return pd.concat([econ_rows, bank_frame], axis=1).sort_index()
+
+
+def window_bounds(n_rows: int, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """(start, end) row positions for every end date; end is exclusive."""
+    ends = np.arange(1, n_rows + 1)
+    starts = np.zeros_like(ends) if window == 0 else np.maximum(ends - window, 0)
+    return starts, ends
+
+
+def pairwise_prefix_sums(values: np.ndarray) -> dict[str, np.ndarray]:
+    """Prefix sums, shape (T+1, V, V), for pairwise-complete correlation of (T, V) values."""
+    present = ~np.isnan(values)
+    x = np.where(present, values, 0.0)
+    m = present.astype(float)
+
+    def prefix(terms: np.ndarray) -> np.ndarray:
+        return np.concatenate([np.zeros((1,) + terms.shape[1:]), np.cumsum(terms, axis=0)])
+
+    return {
+        'n': prefix(np.einsum('ti,tj->tij', m, m)),
+        'sx': prefix(np.einsum('ti,tj->tij', x, m)),
+        'sxx': prefix(np.einsum('ti,tj->tij', x * x, m)),
+        'sxy': prefix(np.einsum('ti,tj->tij', x, x)),
+    }
+
+
+def window_correlations(prefix: dict[str, np.ndarray], starts: np.ndarray,
+                        ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Correlation matrices (W, V, V) and min pairwise counts for each window."""
+    n, sx, sxx, sxy = (prefix[key][ends] - prefix[key][starts] for key in ('n', 'sx', 'sxx', 'sxy'))
+    sy = np.swapaxes(sx, 1, 2)
+    syy = np.swapaxes(sxx, 1, 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        corr = cov / np.sqrt(var_x * var_y)
+
+    corr = np.where((n >= MIN_OBSERVATIONS) & (var_x > 1e-12) & (var_y > 1e-12), np.clip(corr, -1.0, 1.0), np.nan)
+    return corr, n.min(axis=(1, 2)).astype(int)
+
+
+def window_hashes(frame: pd.DataFrame, starts: np.ndarray, ends: np.ndarray) -> list[str]:
+    """Hash of the input rows (and variable list) inside each window."""
+    row_hashes = pd.util.hash_pandas_object(frame, index=True).to_numpy()
+    header = ','.join(frame.columns).encode()
+    return [
+        hashlib.sha1(header + row_hashes[start:end].tobytes()).hexdigest()
+        for start, end in zip(starts, ends)
+    ]
+
+
+def build_entity_rows(cert: int, frame: pd.DataFrame, existing: dict, force: bool) -> list[tuple]:
+    """Rows to upsert for one entity: only windows whose input hash changed."""
+    variables = list(frame.columns)
+    upper = np.triu_indices(len(variables), k=1)
+    values = frame.to_numpy(dtype=float)
+    prefix = pairwise_prefix_sums(values)
+
+    rows = []
+    for window in WINDOWS:
+        starts, ends = window_bounds(len(frame), window)
+        hashes = np.array(window_hashes(frame, starts, ends))
+        end_dates = frame.index[ends - 1].date
+        stale = np.array([
+            force or existing.get((window, end_date)) != digest
+            for end_date, digest in zip(end_dates, hashes)
+        ], dtype=bool)
+        if not stale.any():
+            continue
+
+        corr, n_obs = window_correlations(prefix, starts[stale], ends[stale])
+        for end_date, digest, matrix, count in zip(end_dates[stale], hashes[stale], corr, n_obs):
+            triangle = matrix[upper]
+            rows.append((
+                cert, window, end_date, int(count), variables,
+                [None if np.isnan(v) else round(float(v), 6) for v in triangle],
+                digest,
+            ))
+    return rows
+
+
+def existing_hashes(conn, cert: int) -> dict:
+    cur = conn.cursor()
+    cur.execute(
+        'SELECT window_quarters, end_date, input_hash FROM correlation_cube WHERE cert_number = %s',
+        (cert,),
+    )
+    hashes = {(window, end_date): digest for window, end_date, digest in cur.fetchall()}
+    cur.close()
+    return hashes
+
+
+def upsert_rows(conn, rows: list[tuple]) -> None:
+    cur = conn.cursor()
+    execute_values(
+        cur,
+        """
+        INSERT INTO correlation_cube (
+            cert_number, window_quarters, end_date, n_obs, variables, correlations, input_hash
+        ) VALUES %s
+        ON CONFLICT (cert_number, window_quarters, end_date) DO UPDATE SET
+            n_obs = EXCLUDED.n_obs,
+            variables = EXCLUDED.variables,
+            correlations = EXCLUDED.correlations,
+            input_hash = EXCLUDED.input_hash,
+            created_at = CURRENT_TIMESTAMP
+        """,
+        rows,
+        template='(%s, %s, %s, %s, %s::text[], %s::real[], %s)',
+        page_size=200,
+    )
+    conn.commit()
+    cur.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Refresh the precomputed correlation cube.')
+    parser.add_argument('--certs', help='Comma-separated certs to build (default: every bank)')
+    parser.add_argument('--industry-only', action='store_true', help='Only build the cross-bank median cube')
+    parser.add_argument('--force', action='store_true', help='Recompute every window regardless of input hashes')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    certs = [int(c) for c in args.certs.split(',')] if args.certs else None
+
+    conn = connect_to_database()
+    try:
+        econ = economic_variables(conn)
+        frames = bank_metric_frames(conn, certs, args.industry_only)
+
+        total = 0
+        for cert, bank_frame in frames.items():
+            frame = align_entity(bank_frame, econ)
+            rows = build_entity_rows(cert, frame, existing_hashes(conn, cert), args.force)
+            if rows:
+                upsert_rows(conn, rows)
+            total += len(rows)
+            label = 'industry' if cert == INDUSTRY_CERT else f'cert {cert}'
+            print(f'  ✓ {label}: {len(rows)} windows recomputed')
+
+        print(f'✓ Correlation cube refreshed ({total} windows across {len(frames)} entities)')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""
+Maintain bank_macro_features, the point-in-time bank x macro feature table.
+
+Each bank quarter is joined (pd.merge_asof, one series at a time) to the
+economic values that were published by its report date. Every series has its
+own release schedule (RELEASE_SCHEDULE): a value becomes available a fixed
+number of days after the end of the month or quarter it covers, so quarterly
+GDP and delinquency prints (stamped on every month of their quarter by
+fetch_fred_data) only reach bank quarters reported after their release. Each
+indicator carries its last published value forward. The lag/change features
+and next-quarter target then come from roa_forecasting.engineer_features, so
+training and scoring read the same definitions the notebook used, without
+look-ahead.
+
+Rows are written only when their content hash changes, so re-runs after a
+seed touch just the new quarters, the quarters whose lags or target moved,
+and the quarters that see a newly published or revised economic month.
+--since limits the rebuild to recent quarters (loading enough history for the
+lags).
+
+Usage:
+    python3 cli.py features [--since 2024-01-01] [--extra-lag-days 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from roa_forecasting import LAGGED_METRICS, NUMERIC_COLS, TARGET_COL, engineer_features
+from db.seed_database import connect_to_database, row_hash, split_changed_records
+
+BANK_COLS = [
+    'total_assets', 'total_deposits', 'total_loans', 'net_income',
+    'roa', 'roe', 'nim', 'efficiency_ratio', 'tier1_capital_ratio',
+]
+MACRO_COLS = [col for col in NUMERIC_COLS if col not in BANK_COLS]
+LAG_COLS = [f'{metric}_{suffix}' for metric in LAGGED_METRICS for suffix in ('lag1', 'lag4', 'chg_1p')]
+STORE_COLUMNS = ['bank_name', 'active', 'econ_date', *NUMERIC_COLS, *LAG_COLS, TARGET_COL]
+
+# series -> (period an observation covers, days after the period ends until it is published)
+RELEASE_SCHEDULE = {
+    'unemployment_rate': ('M', 7),   # Employment Situation, first Friday of the next month
+    'fed_funds_rate': ('M', 1),      # monthly mean of daily rates, complete once the month ends
+    'yield_curve': ('M', 1),         # from daily Treasury yields, same as above
+    'gdp_growth': ('Q', 30),         # BEA advance estimate, about a month after the quarter
+    'delinq_cc': ('Q', 60),          # Fed charge-off and delinquency rates, about two months after
+    'delinq_mortgage': ('Q', 60),
+}
+DEFAULT_RELEASE = ('M', 31)          # anything unlisted: assume a month after the period
+# History loaded before --since so lag4 and the prior quarter's target are complete
+LOOKBACK_MONTHS = 18
+# Quarters before --since that are rewritten (their target is the first new quarter)
+REWRITE_MONTHS = 4
+
+
+def load_bank_rows(conn, since: pd.Timestamp | None) -> pd.DataFrame:
+    start = None if since is None else (since - pd.DateOffset(months=LOOKBACK_MONTHS)).date()
+    return pd.read_sql_query(
+        f"""
+        SELECT cert_number, bank_name, date AS bank_date, active, {', '.join(BANK_COLS)}
+        FROM bank_performance
+        WHERE %(start)s::date IS NULL OR date >= %(start)s::date
+        """,
+        conn,
+        params={'start': start},
+        parse_dates=['bank_date'],
+    )
+
+
+def load_economic_data(conn) -> pd.DataFrame:
+    econ = pd.read_sql_query(
+        f"SELECT date AS econ_date, {', '.join(MACRO_COLS)} FROM economic_data ORDER BY date",
+        conn,
+        parse_dates=['econ_date'],
+    )
+    econ[MACRO_COLS] = econ[MACRO_COLS].apply(pd.to_numeric, errors='coerce')
+    return econ
+
+
+def publication_dates(econ_dates: pd.Series, series: str, extra_lag_days: int = 0) -> pd.Series:
+    """When the value stamped on each economic_data date was first published."""
+    freq, delay_days = RELEASE_SCHEDULE.get(series, DEFAULT_RELEASE)
+    period_end = econ_dates.dt.to_period(freq).dt.end_time.dt.normalize()
+    return (period_end + pd.Timedelta(days=delay_days + extra_lag_days)).astype('datetime64[ns]')
+
+
+def point_in_time_join(banks: pd.DataFrame, econ: pd.DataFrame, extra_lag_days: int = 0) -> pd.DataFrame:
+    """
+    Attach to each bank quarter the latest published value of every economic series
+
+    econ_date is the newest economic_data month among the values used.
+    """
+    joined = banks.assign(bank_date=banks['bank_date'].astype('datetime64[ns]')).sort_values('bank_date')
+    used_dates = []
+    for series in MACRO_COLS:
+        published = econ.loc[econ[series].notna(), ['econ_date', series]]
+        published = published.assign(available_at=publication_dates(published['econ_date'], series, extra_lag_days))
+        # A quarterly print is stamped on each month of its quarter; keep one row per release
+        published = published.drop_duplicates('available_at', keep='last').rename(
+            columns={'econ_date': f'{series}_econ_date'})
+        joined = pd.merge_asof(joined, published, left_on='bank_date', right_on='available_at',
+                               direction='backward').drop(columns='available_at')
+        used_dates.append(f'{series}_econ_date')
+    joined['econ_date'] = joined[used_dates].max(axis=1)
+    return joined.drop(columns=used_dates)
+
+
+def feature_records(features: pd.DataFrame, start: pd.Timestamp | None) -> list[tuple]:
+    """(key, record, hash) tuples for rows on or after `start`, ready for split_changed_records."""
+    if start is not None:
+        features = features[features['date'] >= start]
+    frame = features[['cert_number', 'date', *STORE_COLUMNS]].copy()
+    frame['date'] = frame['date'].dt.date
+    frame['econ_date'] = frame['econ_date'].dt.date
+    frame['cert_number'] = frame['cert_number'].astype(int)
+    frame = frame.astype(object).where(frame.notna(), None)
+
+    keyed = []
+    for values in frame.itertuples(index=False, name=None):
+        values = tuple(float(v) if isinstance(v, np.floating) else v for v in values)
+        keyed.append(((values[0], values[1]), values, row_hash(values[2:])))
+    return keyed
+
+
+def existing_hashes(conn, start: pd.Timestamp | None) -> dict:
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT cert_number, date, row_hash FROM bank_macro_features
+        WHERE %(start)s::date IS NULL OR date >= %(start)s::date
+        """,
+        {'start': None if start is None else start.date()},
+    )
+    hashes = {(cert, date): digest for cert, date, digest in cur.fetchall()}
+    cur.close()
+    return hashes
+
+
+def upsert_features(conn, records: list[tuple], hashes: list[str]) -> None:
+    columns = ['cert_number', 'date', *STORE_COLUMNS, 'row_hash']
+    updates = ',\n            '.join(f'{col} = EXCLUDED.{col}' for col in columns[2:])
+    cur = conn.cursor()
+    execute_values(
+        cur,
+        f"""
+        INSERT INTO bank_macro_features ({', '.join(columns)}) VALUES %s
+        ON CONFLICT (cert_number, date) DO UPDATE SET
+            {updates},
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        [record + (digest,) for record, digest in zip(records, hashes)],
+        page_size=1000,
+    )
+    cur.close()
+
+
+def delete_features(conn, keys: list[tuple]) -> None:
+    cur = conn.cursor()
+    execute_values(
+        cur,
+        """
+        DELETE FROM bank_macro_features f
+        USING (VALUES %s) AS gone(cert_number, date)
+        WHERE f.cert_number = gone.cert_number AND f.date = gone.date
+        """,
+        keys,
+        template='(%s::integer, %s::date)',
+        page_size=1000,
+    )
+    cur.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Build or update the point-in-time bank x macro feature table.')
+    parser.add_argument('--since', type=pd.Timestamp,
+                        help='Only rebuild quarters from this date (default: all history)')
+    parser.add_argument('--extra-lag-days', type=int, default=0,
+                        help='Days added to every series\' publication delay (RELEASE_SCHEDULE)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    write_start = None if args.since is None else args.since - pd.DateOffset(months=REWRITE_MONTHS)
+
+    conn = connect_to_database()
+    try:
+        banks = load_bank_rows(conn, args.since)
+        if banks.empty:
+            print('  ℹ No bank_performance rows in range; nothing to build')
+            return
+
+        econ = load_economic_data(conn)
+        features = engineer_features(point_in_time_join(banks, econ, args.extra_lag_days))
+        keyed = feature_records(features, write_start)
+
+        stored = existing_hashes(conn, write_start)
+        to_write, inserted, updated, unchanged = split_changed_records(stored, keyed)
+        digests = {key: digest for key, _, digest in keyed}
+        if to_write:
+            upsert_features(conn, list(to_write.values()), [digests[key] for key in to_write])
+
+        # Quarters that disappeared from bank_performance (only knowable on a full rebuild)
+        removed = [] if args.since is not None else sorted(set(stored) - set(digests))
+        if removed:
+            delete_features(conn, removed)
+        conn.commit()
+
+        print(f'✓ bank_macro_features: {inserted} inserted, {updated} updated, '
+              f'{unchanged} unchanged, {len(removed)} removed '
+              f'(economic series joined as of their release dates, +{args.extra_lag_days} day(s))')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""
+Assign every bank in bank_performance to a peer group for every quarter.
+
+Scaled version of the notebook's KMeans + PCA segmentation. On the first run
+(and on --rebuild), a median imputer, StandardScaler and PCA are fitted on all
+bank quarters (sizes on a log scale) and stored in peer_group_space; later
+runs reuse them, so pc1/pc2 and distances from every run share one basis. Quarters are then clustered in order, each
+warm-started from the previous quarter's centroids (KMeans, or MiniBatchKMeans
+for large quarters), so peer group ids stay stable over time and a new quarter
+only refines the existing groups instead of refitting history.
+
+Centroids are stored in raw feature units (peer_group_centroids), so the next
+refresh can project them into the stored PCA space and carry on from the last
+stored quarter. The number of groups is chosen by silhouette score
+on the first run (as in the notebook) and kept afterwards.
+
+Usage:
+    python3 cli.py peers [--since 2024-01-01] [--rebuild] [--k 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+from db.seed_database import connect_to_database
+
+CLUSTER_FEATURES = [
+    'roa', 'roe', 'nim', 'efficiency_ratio', 'tier1_capital_ratio',
+    'total_loans', 'total_deposits', 'total_assets',
+]
+SIZE_FEATURES = ['total_loans', 'total_deposits', 'total_assets']   # log1p before scaling
+
+PCA_VARIANCE = 0.9          # components kept
+K_CANDIDATES = range(2, 9)
+SILHOUETTE_SAMPLE = 5000
+MINIBATCH_THRESHOLD = 20000  # quarters with more banks use MiniBatchKMeans
+MAX_MISSING_FEATURES = len(CLUSTER_FEATURES) // 2
+RANDOM_STATE = 42
+
+
+class PeerSpace:
+    """Fitted imputer medians, scaler and PCA basis; maps raw features <-> PCA space."""
+
+    def __init__(self, medians: np.ndarray, mean: np.ndarray, scale: np.ndarray,
+                 pca_mean: np.ndarray, components: np.ndarray):
+        self.medians = np.asarray(medians, dtype=float)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.pca_mean = np.asarray(pca_mean, dtype=float)
+        self.components = np.asarray(components, dtype=float)
+
+    @classmethod
+    def fit(cls, frame: pd.DataFrame) -> PeerSpace:
+        raw = cls._prepare(frame)
+        imputer = SimpleImputer(strategy='median', keep_empty_features=True).fit(raw)
+        scaler = StandardScaler().fit(imputer.transform(raw))
+        pca = PCA(n_components=PCA_VARIANCE, random_state=RANDOM_STATE).fit(
+            scaler.transform(imputer.transform(raw))
+        )
+        return cls(imputer.statistics_, scaler.mean_, scaler.scale_, pca.mean_, pca.components_)
+
+    @classmethod
+    def load(cls, conn) -> PeerSpace | None:
+        """The stored space, or None on a first run."""
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT features, medians, mean, scale, pca_mean, components
+            FROM peer_group_space ORDER BY id DESC LIMIT 1
+        """)
+        row = cur.fetchone()
+        cur.close()
+        if row is None:
+            return None
+        if list(row[0]) != CLUSTER_FEATURES:
+            raise ValueError('peer_group_space was fitted on other features; run with --rebuild')
+        return cls(*row[1:])
+
+    def save(self, conn) -> None:
+        cur = conn.cursor()
+        cur.execute('DELETE FROM peer_group_space')
+        cur.execute(
+            """
+            INSERT INTO peer_group_space (features, medians, mean, scale, pca_mean, components)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """,
+            (CLUSTER_FEATURES, *(arr.tolist() for arr in (
+                self.medians, self.mean, self.scale, self.pca_mean, self.components))),
+        )
+        cur.close()
+
+    @property
+    def n_components(self) -> int:
+        return len(self.components)
+
+    @staticmethod
+    def _prepare(frame: pd.DataFrame) -> np.ndarray:
+        values = frame[CLUSTER_FEATURES].apply(pd.to_numeric, errors='coerce').copy()
+        values[SIZE_FEATURES] = np.log1p(values[SIZE_FEATURES].clip(lower=0))
+        return values.to_numpy(dtype=float)
+
+    def transform(self, frame: pd.DataFrame) -> np.ndarray:
+        raw = self._prepare(frame)
+        raw = np.where(np.isnan(raw), self.medians, raw)
+        return ((raw - self.mean) / self.scale - self.pca_mean) @ self.components.T
+
+    def to_raw(self, centroids: np.ndarray) -> np.ndarray:
+        """PCA-space centroids in raw feature units (sizes back from log scale)."""
+        raw = (centroids @ self.components + self.pca_mean) * self.scale + self.mean
+        sizes = [CLUSTER_FEATURES.index(col) for col in SIZE_FEATURES]
+        raw[:, sizes] = np.expm1(raw[:, sizes])
+        return raw
+
+    def from_raw(self, raw: np.ndarray) -> np.ndarray:
+        return self.transform(pd.DataFrame(raw, columns=CLUSTER_FEATURES))
+
+
+def load_bank_quarters(conn) -> pd.DataFrame:
+    frame = pd.read_sql_query(
+        f"SELECT cert_number, date, {', '.join(CLUSTER_FEATURES)} FROM bank_performance ORDER BY date, cert_number",
+        conn,
+        parse_dates=['date'],
+    )
+    frame[CLUSTER_FEATURES] = frame[CLUSTER_FEATURES].apply(pd.to_numeric, errors='coerce')
+    # Rows with too little data to place are left unassigned rather than imputed
+    return frame[frame[CLUSTER_FEATURES].isna().sum(axis=1) <= MAX_MISSING_FEATURES].reset_index(drop=True)
+
+
+def stored_centroids(conn, before: pd.Timestamp | None) -> tuple[pd.Timestamp | None, np.ndarray | None]:
+    """Raw-unit centroids of the latest stored quarter (before `before`, if given)."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT date, peer_group, centroid FROM peer_group_centroids
+        WHERE date = (
+            SELECT MAX(date) FROM peer_group_centroids
+            WHERE %(before)s::date IS NULL OR date < %(before)s::date
+        )
+        ORDER BY peer_group
+        """,
+        {'before': None if before is None else before.date()},
+    )
+    rows = cur.fetchall()
+    cur.close()
+    if not rows:
+        return None, None
+    return pd.Timestamp(rows[0][0]), np.array([row[2] for row in rows], dtype=float)
+
+
+def choose_k(X: np.ndarray) -> int:
+    """Best k by silhouette on (a sample of) one quarter, as in the notebook."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    if len(X) > SILHOUETTE_SAMPLE:
+        X = X[rng.choice(len(X), SILHOUETTE_SAMPLE, replace=False)]
+    scores = {}
+    for k in K_CANDIDATES:
+        if k >= len(X):
+            break
+        labels = KMeans(n_clusters=k, random_state=RANDOM_STATE, n_init=10).fit_predict(X)
+        scores[k] = silhouette_score(X, labels)
+    return max(scores, key=scores.get) if scores else 1
+
+
+def fit_quarter(X: np.ndarray, init: np.ndarray):
+    """Refine the previous centroids on one quarter's banks."""
+    if len(X) > MINIBATCH_THRESHOLD:
+        model = MiniBatchKMeans(n_clusters=len(init), init=init, n_init=1, batch_size=4096,
+                                random_state=RANDOM_STATE)
+    else:
+        model = KMeans(n_clusters=len(init), init=init, n_init=1, max_iter=50, random_state=RANDOM_STATE)
+    return model.fit(X)
+
+
+def quarter_silhouette(X: np.ndarray, labels: np.ndarray) -> float | None:
+    if len(np.unique(labels)) < 2:
+        return None
+    size = min(len(X), SILHOUETTE_SAMPLE)
+    return float(silhouette_score(X, labels, sample_size=size, random_state=RANDOM_STATE))
+
+
+def cluster_quarters(frame: pd.DataFrame, space: PeerSpace, quarters: list,
+                     init_raw: np.ndarray | None, k: int | None) -> tuple[list[tuple], list[tuple]]:
+    """Assignment rows and centroid rows for `quarters`, each warm-started from the last."""
+    X_all = space.transform(frame)
+    centroids = space.from_raw(init_raw) if init_raw is not None else None
+
+    assignments, centroid_rows = [], []
+    for quarter in quarters:
+        mask = (frame['date'] == quarter).to_numpy()
+        X = X_all[mask]
+        if len(X) == 0:
+            continue
+        if centroids is None:
+            k = k or choose_k(X)
+            init = KMeans(n_clusters=min(k, len(X)), random_state=RANDOM_STATE, n_init=10).fit(X).cluster_centers_
+        else:
+            init = centroids
+        if len(X) < len(init):
+            # Too few banks to refine every group: assign to the nearest existing centroid
+            labels = ((X[:, None, :] - init[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+            model_centers = init
+        else:
+            model = fit_quarter(X, init)
+            labels, model_centers = model.labels_, model.cluster_centers_
+        centroids = model_centers
+
+        distances = np.sqrt(((X - centroids[labels]) ** 2).sum(axis=1))
+        quarter_date = quarter.date()
+        certs = frame.loc[mask, 'cert_number'].to_numpy()
+        for cert, label, dist, coords in zip(certs, labels, distances, X):
+            assignments.append((int(cert), quarter_date, int(label), float(dist),
+                                float(coords[0]), float(coords[1]) if X.shape[1] > 1 else None))
+
+        silhouette = quarter_silhouette(X, labels)
+        counts = np.bincount(labels, minlength=len(centroids))
+        for group, raw in enumerate(space.to_raw(centroids)):
+            centroid_rows.append((quarter_date, group, int(counts[group]), [float(v) for v in raw],
+                                  CLUSTER_FEATURES, silhouette))
+    return assignments, centroid_rows
+
+
+def write_peer_groups(conn, assignments: list[tuple], centroid_rows: list[tuple]) -> None:
+    cur = conn.cursor()
+    execute_values(
+        cur,
+        """
+        INSERT INTO peer_groups (cert_number, date, peer_group, distance, pc1, pc2) VALUES %s
+        ON CONFLICT (cert_number, date) DO UPDATE SET
+            peer_group = EXCLUDED.peer_group,
+            distance = EXCLUDED.distance,
+            pc1 = EXCLUDED.pc1,
+            pc2 = EXCLUDED.pc2,
+            created_at = CURRENT_TIMESTAMP
+        """,
+        assignments,
+        page_size=1000,
+    )
+    quarters = sorted({row[0] for row in centroid_rows})
+    # Replace centroids for the processed quarters (k may differ after --rebuild)
+    cur.execute('DELETE FROM peer_group_centroids WHERE date = ANY(%s)', (quarters,))
+    execute_values(
+        cur,
+        """
+        INSERT INTO peer_group_centroids (date, peer_group, n_banks, centroid, features, silhouette)
+        VALUES %s
+        """,
+        centroid_rows,
+        template='(%s, %s, %s, %s::real[], %s::text[], %s)',
+        page_size=1000,
+    )
+    cur.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Assign banks to peer groups for every quarter.')
+    parser.add_argument('--since', type=pd.Timestamp,
+                        help='Re-cluster quarters from this date (default: quarters after the last stored one)')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Re-cluster all history and choose k again')
+    parser.add_argument('--k', type=int, help='Number of peer groups on a first run or rebuild (default: by silhouette)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    conn = connect_to_database()
+    try:
+        frame = load_bank_quarters(conn)
+        if frame.empty:
+            print('  ℹ No bank_performance rows to cluster')
+            return
+
+        all_quarters = [pd.Timestamp(q) for q in sorted(frame['date'].unique())]
+        space = None if args.rebuild else PeerSpace.load(conn)
+        if space is None:
+            # First run or rebuild: fit the basis every later run reuses, and
+            # re-cluster all history in it
+            space = PeerSpace.fit(frame)
+            cur = conn.cursor()
+            cur.execute('DELETE FROM peer_groups')
+            cur.execute('DELETE FROM peer_group_centroids')
+            cur.close()
+            space.save(conn)
+            last_date, init_raw = None, None
+            quarters = all_quarters
+        else:
+            last_date, init_raw = stored_centroids(conn, args.since)
+            if args.since is not None:
+                quarters = [q for q in all_quarters if q >= args.since]
+            else:
+                quarters = [q for q in all_quarters if last_date is None or q > last_date]
+        if not quarters:
+            print('✓ Peer groups up to date (no new quarters)')
+            return
+
+        assignments, centroid_rows = cluster_quarters(frame, space, quarters, init_raw, args.k)
+        write_peer_groups(conn, assignments, centroid_rows)
+        conn.commit()
+
+        k = len({row[1] for row in centroid_rows})
+        warm = f'warm-started from {last_date.date()}' if init_raw is not None else 'fresh fit'
+        print(f'✓ Peer groups: {len(assignments)} bank-quarters across {len(quarters)} quarters, k={k} '
+              f'({warm}; PCA {space.n_components} components)')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Evaluate alert_settings thresholds against newly loaded economic_data dates.
+
+Dates after the stored watermark are checked, plus earlier dates whose
+economic_data.row_hash changed since they were evaluated (quarterly
+delinquency values are filled into existing months by a later seed). All
+users' thresholds are compared against all of those dates in one broadcast
+(settings x dates x metrics), triggered alerts are bulk-inserted into
+triggered_alerts, and the watermark and evaluated row hashes are updated in
+the same transaction. The watermark only advances to the last date that has
+an alert metric, so calendar months still waiting for data are picked up once
+they are filled. Delivery (immediate/daily/weekly, email) is left to whatever
+reads undelivered rows.
+
+The first run with no watermark only evaluates the latest date with data
+unless --backfill is given.
+
+Usage:
+    python3 cli.py alerts [--backfill]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db.seed_database import connect_to_database
+
+WATERMARK_NAME = 'economic_data_alerts'
+USER_CHUNK_SIZE = 20000
+
+# economic metric -> alert_settings threshold column
+ALERT_METRICS = {
+    'delinq_cc': 'delinquency_threshold',
+    'delinq_mortgage': 'delinquency_threshold',
+    'delinq_consumer': 'delinquency_threshold',
+    'unemployment_rate': 'unemployment_threshold',
+    'fed_funds_change': 'rate_change_threshold',
+}
+# Metrics compared by magnitude (a cut is as notable as a hike).
+ABSOLUTE_METRICS = {'fed_funds_change'}
+
+SETTINGS_QUERY = """
+    SELECT id AS alert_setting_id, user_id, email_alerts, alert_frequency,
+           delinquency_threshold, unemployment_threshold, rate_change_threshold
+    FROM alert_settings
+    ORDER BY id
+"""
+
+
+def get_watermark(cur):
+    cur.execute('SELECT last_evaluated_date FROM alert_watermarks WHERE engine = %s', (WATERMARK_NAME,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def load_new_observations(conn, watermark, backfill: bool) -> pd.DataFrame:
+    """
+    Economic rows to evaluate, with fed_funds_change filled from month-over-month deltas.
+
+    Rows after the watermark that have at least one alert metric, plus rows
+    already evaluated whose row_hash has changed since. economic_data is
+    monthly, so the whole table is read to compute the deltas.
+    """
+    econ = pd.read_sql_query(
+        """
+        SELECT e.date, e.delinq_cc, e.delinq_mortgage, e.delinq_consumer, e.unemployment_rate,
+               e.fed_funds_rate, e.fed_funds_change, e.row_hash, r.row_hash AS evaluated_hash
+        FROM economic_data e
+        LEFT JOIN alert_evaluated_rows r ON r.engine = %s AND r.date = e.date
+        ORDER BY e.date
+        """,
+        conn,
+        params=(WATERMARK_NAME,),
+        parse_dates=['date'],
+    )
+    econ = econ.set_index('date')
+    hashes = econ[['row_hash', 'evaluated_hash']]
+    econ = econ[['delinq_cc', 'delinq_mortgage', 'delinq_consumer', 'unemployment_rate',
+                 'fed_funds_rate', 'fed_funds_change']].apply(pd.to_numeric, errors='coerce')
+    econ['fed_funds_change'] = econ['fed_funds_change'].fillna(econ['fed_funds_rate'].diff())
+    econ['row_hash'] = hashes['row_hash']
+
+    has_values = econ[list(ALERT_METRICS)].notna().any(axis=1)
+    if watermark is None:
+        selected = has_values if backfill else has_values & (econ.index == econ.index[has_values].max())
+    else:
+        after = econ.index > pd.Timestamp(watermark)
+        revised = hashes['evaluated_hash'].notna() & (hashes['evaluated_hash'] != hashes['row_hash'])
+        selected = (after & has_values) | (~after & revised)
+    return econ[selected]
+
+
+def evaluate(settings: pd.DataFrame, econ: pd.DataFrame) -> pd.DataFrame:
+    """Broadcast every setting's thresholds against every new date; return triggered rows."""
+    metrics = list(ALERT_METRICS)
+    values = econ[metrics].to_numpy(dtype=float)
+    absolute = np.array([metric in ABSOLUTE_METRICS for metric in metrics])
+    values = np.where(absolute, np.abs(values), values)
+
+    triggered = []
+    for start in range(0, len(settings), USER_CHUNK_SIZE):
+        chunk = settings.iloc[start:start + USER_CHUNK_SIZE]
+        thresholds = np.column_stack([
+            pd.to_numeric(chunk[ALERT_METRICS[metric]], errors='coerce').to_numpy(dtype=float)
+            for metric in metrics
+        ])
+        # (settings, dates, metrics); NaN thresholds or values never trigger.
+        hits = values[None, :, :] >= thresholds[:, None, :]
+        s_idx, d_idx, m_idx = np.nonzero(hits)
+        if len(s_idx) == 0:
+            continue
+
+        triggered.append(pd.DataFrame({
+            'alert_setting_id': chunk['alert_setting_id'].to_numpy()[s_idx],
+            'user_id': chunk['user_id'].to_numpy()[s_idx],
+            'metric': np.array(metrics)[m_idx],
+            'observed_date': econ.index[d_idx].date,
+            'observed_value': econ[metrics].to_numpy(dtype=float)[d_idx, m_idx],
+            'threshold': thresholds[s_idx, m_idx],
+            'alert_frequency': chunk['alert_frequency'].to_numpy()[s_idx],
+            'email_alerts': chunk['email_alerts'].to_numpy()[s_idx],
+        }))
+
+    if not triggered:
+        return pd.DataFrame(columns=[
+            'alert_setting_id', 'user_id', 'metric', 'observed_date', 'observed_value',
+            'threshold', 'alert_frequency', 'email_alerts',
+        ])
+    return pd.concat(triggered, ignore_index=True)
+
+
+def evaluate_new_alerts(conn, backfill: bool = False) -> int:
+    """Evaluate dates past the watermark, write triggered alerts and advance the watermark."""
+    cur = conn.cursor()
+    watermark = get_watermark(cur)
+    econ = load_new_observations(conn, watermark, backfill)
+    if econ.empty:
+        print('  ℹ No new or revised economic dates to evaluate for alerts')
+        cur.close()
+        return 0
+
+    settings = pd.read_sql_query(SETTINGS_QUERY, conn)
+    alerts = evaluate(settings, econ)
+
+    if not alerts.empty:
+        rows = [
+            (int(r[0]), None if pd.isna(r[1]) else int(r[1]), r[2], r[3],
+             round(float(r[4]), 4), round(float(r[5]), 4), r[6], None if pd.isna(r[7]) else bool(r[7]))
+            for r in alerts.itertuples(index=False, name=None)
+        ]
+        execute_values(
+            cur,
+            """
+            INSERT INTO triggered_alerts (
+                alert_setting_id, user_id, metric, observed_date, observed_value,
+                threshold, alert_frequency, email_alerts
+            ) VALUES %s
+            ON CONFLICT (alert_setting_id, metric, observed_date) DO NOTHING
+            """,
+            rows,
+            page_size=1000,
+        )
+
+    # Remember what each date looked like when evaluated, so later revisions are re-checked
+    execute_values(
+        cur,
+        """
+        INSERT INTO alert_evaluated_rows (engine, date, row_hash) VALUES %s
+        ON CONFLICT (engine, date) DO UPDATE SET row_hash = EXCLUDED.row_hash
+        """,
+        [(WATERMARK_NAME, date.date(), digest) for date, digest in econ['row_hash'].items()],
+        page_size=1000,
+    )
+    new_watermark = econ.index.max().date()
+    if watermark is not None:
+        new_watermark = max(new_watermark, watermark)
+    cur.execute(
+        """
+        INSERT INTO alert_watermarks (engine, last_evaluated_date)
+        VALUES (%s, %s)
+        ON CONFLICT (engine) DO UPDATE SET
+            last_evaluated_date = EXCLUDED.last_evaluated_date,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (WATERMARK_NAME, new_watermark),
+    )
+    conn.commit()
+    cur.close()
+
+    revised = 0 if watermark is None else int((econ.index <= pd.Timestamp(watermark)).sum())
+    print(f'✓ Evaluated {len(settings)} alert settings over {len(econ) - revised} new and {revised} revised dates: '
+          f'{len(alerts)} alerts triggered')
+    return len(alerts)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Evaluate alert thresholds against new economic data.')
+    parser.add_argument('--backfill', action='store_true',
+                        help='With no watermark yet, evaluate the full history instead of the latest date with data')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    conn = connect_to_database()
+    try:
+        evaluate_new_alerts(conn, backfill=args.backfill)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
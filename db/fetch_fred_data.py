@@ -1,15 +1,14 @@
 from __future__ import annotations
 
-import os
+import argparse
 import sys
-from pathlib import Path
 
 import pandas as pd
-from dotenv import load_dotenv
 from fredapi import Fred
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
-DATA_DIR = PROJECT_ROOT / 'data'
+from fetch_journal import FetchJournal
+from pipeline_config import DATA_DIR, env
+
 OUTPUT_PATH = DATA_DIR / 'fred_data.csv'
 
 START_DATE = '2000-07-01'
@@ -27,13 +26,36 @@ def to_monthly(series: pd.Series, method: str = 'last') -> pd.Series:
     return series.resample('MS').last()
 
 
+def get_series(fred: Fred, journal: FetchJournal, fred_id: str) -> pd.Series:
+    """Raw observations for one series, from the journal if an earlier run already fetched it."""
+    saved = journal.completed(fred_id)
+    if saved is None:
+        raw = fred.get_series(fred_id, observation_start=START_DATE, observation_end=END_DATE)
+        saved = [{'date': str(date), 'value': value} for date, value in raw.items()]
+        journal.complete(fred_id, saved)
+        print(f'fetched {fred_id}: {len(saved)} observations')
+    else:
+        print(f'reused {fred_id}: {len(saved)} observations (saved by an earlier run)')
+    return pd.Series([row['value'] for row in saved], index=pd.to_datetime([row['date'] for row in saved]), dtype=float)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Download FRED series into data/fred_data.csv.')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Discard series saved by an interrupted run and download everything again')
+    return parser.parse_args()
+
+
 def main() -> None:
-    load_dotenv(PROJECT_ROOT / '.env')
-    api_key = os.getenv('FRED_API_KEY')
+    args = parse_args()
+    api_key = env('FRED_API_KEY')
     if not api_key or api_key == 'your_fred_api_key_here':
         raise SystemExit('Missing FRED_API_KEY in .env')
 
     fred = Fred(api_key=api_key)
+    journal = FetchJournal(f'fred:{START_DATE}:{END_DATE}')
+    if args.fresh:
+        journal.clear()
 
     series_specs = {
         'delinq_cc': ('DRCCLACBS', 'ffill'),
@@ -51,11 +73,11 @@ def main() -> None:
 
     monthly_series: dict[str, pd.Series] = {}
     for out_col, (fred_id, method) in series_specs.items():
-        raw = fred.get_series(fred_id, observation_start=START_DATE, observation_end=END_DATE)
+        raw = get_series(fred, journal, fred_id)
         monthly_series[out_col] = to_monthly(raw, method)
 
     # GDP growth is quarterly; convert to monthly by forward-filling within each quarter.
-    gdp_level = fred.get_series('GDPC1', observation_start=START_DATE, observation_end=END_DATE).dropna()
+    gdp_level = get_series(fred, journal, 'GDPC1').dropna()
     gdp_growth_q = gdp_level.pct_change() * 100
     gdp_growth_monthly = to_monthly(gdp_growth_q, method='ffill')
     monthly_series['gdp_growth'] = gdp_growth_monthly
@@ -70,7 +92,11 @@ def main() -> None:
     df['yield_curve'] = df['treasury_10y'] - df['treasury_2y']
 
     df = df.reset_index().rename(columns={'index': 'date'})
-    df.to_csv(OUTPUT_PATH, index=False)
+    tmp_path = OUTPUT_PATH.with_suffix('.csv.tmp')
+    df.to_csv(tmp_path, index=False)
+    tmp_path.replace(OUTPUT_PATH)
+    journal.clear()
+    journal.close()
 
     print(f'Wrote {OUTPUT_PATH}')
     print(f'rows={len(df)} min_date={df["date"].min()} max_date={df["date"].max()}')
@@ -1,23 +1,43 @@
-import sys
-from pathlib import Path
+import argparse
+import os
 
 import pandas as pd
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
-if str(PROJECT_ROOT) not in sys.path:
-    sys.path.insert(0, str(PROJECT_ROOT))
-
 from fdic_bank_api import FDICBankAPI, MAJOR_BANKS
+from fetch_journal import FetchJournal
+from institution_directory import default_directory
+
+START_DATE = '2000-01-01'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Download FDIC financials for the major banks.')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Discard banks saved by an interrupted run and download everything again')
+    return parser.parse_args()
 
 
 def main() -> None:
-    fdic = FDICBankAPI()
+    args = parse_args()
+    fdic = FDICBankAPI(directory=default_directory())
+    journal = FetchJournal(f'fdic-financials:{START_DATE}')
+    if args.fresh:
+        journal.clear()
     out_frames = []
 
     for bank_name, cert in MAJOR_BANKS.items():
+        unit = f'cert:{cert}'
+        saved = journal.completed(unit)
+        if saved is not None:
+            if saved:
+                out_frames.append(pd.DataFrame(saved))
+            print(f"DONE {cert} {bank_name}: {len(saved)} rows (saved by an earlier run)")
+            continue
+
         try:
-            metrics = fdic.get_bank_performance_metrics(cert, start_date='2000-01-01')
+            metrics = fdic.get_bank_performance_metrics(cert, start_date=START_DATE, journal=journal)
             if metrics.empty:
+                journal.complete(unit, [])
                 print(f"SKIP {cert} {bank_name}: no rows")
                 continue
 
@@ -30,6 +50,7 @@ def main() -> None:
             metrics['state'] = str(state_code).strip()[:2].upper() if state_code else ''
             metrics['active'] = True
 
+            journal.complete(unit, metrics.to_dict('records'))
             out_frames.append(metrics)
             print(f"OK   {cert} {bank_name}: {len(metrics)} rows")
         except Exception as err:
@@ -41,7 +62,17 @@ def main() -> None:
     all_banks = pd.concat(out_frames, ignore_index=True)
     all_banks['report_date'] = pd.to_datetime(all_banks['report_date'])
     all_banks = all_banks.sort_values(['cert_number', 'report_date'])
-    all_banks.to_csv('data/bank_data.csv', index=False)
+    tmp_path = 'data/bank_data.csv.tmp'
+    all_banks.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, 'data/bank_data.csv')
+
+    # Banks that failed stay out of the journal's completed set and are retried next run
+    failed = len(set(MAJOR_BANKS.values())) - journal.summary().get('complete', 0)
+    if failed:
+        print(f'\n⚠ {failed} bank(s) failed; re-run to retry them without re-downloading the rest')
+    else:
+        journal.clear()
+    journal.close()
 
     print('\nWROTE data/bank_data.csv')
     print('rows', len(all_banks))
@@ -0,0 +1,85 @@
+"""
+Net return model for the four loan categories stored in portfolio_allocations.
+
+Each category earns a lending rate from economic_data, pays the fed funds rate
+as funding cost, and loses LOSS_SEVERITY times its delinquency rate to credit
+losses. Commercial lending has no FRED delinquency series of its own, so it
+uses the average of the consumer-side delinquency rates.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+# Category order matches the allocation columns in portfolio_allocations.
+LOAN_CATEGORIES = ['credit_card', 'mortgage', 'consumer_loan', 'commercial']
+
+ALLOCATION_COLUMNS = [
+    'credit_card_allocation',
+    'mortgage_allocation',
+    'consumer_loan_allocation',
+    'commercial_allocation',
+]
+
+# category -> (lending rate column, spread over that rate, delinquency columns)
+CATEGORY_SPECS = {
+    'credit_card': ('prime_rate', 10.0, ['delinq_cc']),
+    'mortgage': ('mortgage_30y', 0.0, ['delinq_mortgage']),
+    'consumer_loan': ('prime_rate', 3.0, ['delinq_consumer']),
+    'commercial': ('prime_rate', 1.0, ['delinq_cc', 'delinq_mortgage', 'delinq_consumer']),
+}
+
+FUNDING_RATE_COLUMN = 'fed_funds_rate'
+LOSS_SEVERITY = 0.6
+
+ECONOMIC_COLUMNS = sorted({
+    FUNDING_RATE_COLUMN,
+    *(spec[0] for spec in CATEGORY_SPECS.values()),
+    *(col for spec in CATEGORY_SPECS.values() for col in spec[2]),
+})
+
+
+def load_economic_history(conn, columns: list[str] = ECONOMIC_COLUMNS) -> pd.DataFrame:
+    """Read economic_data columns (default: those used by the return model), indexed by date."""
+    query = f"SELECT date, {', '.join(columns)} FROM economic_data ORDER BY date"
+    df = pd.read_sql_query(query, conn, parse_dates=['date'])
+    df = df.set_index('date')
+    return df.apply(pd.to_numeric, errors='coerce')
+
+
+def category_returns(values: Mapping[str, np.ndarray]) -> np.ndarray:
+    """
+    Net return (annualized %) per loan category from same-shaped input arrays.
+
+    `values` maps every ECONOMIC_COLUMNS name to an array (or scalar); the
+    result has those arrays' shape plus a trailing axis of LOAN_CATEGORIES.
+    """
+    funding = np.asarray(values[FUNDING_RATE_COLUMN], dtype=float)
+    per_category = []
+    for category in LOAN_CATEGORIES:
+        rate_col, spread, delinq_cols = CATEGORY_SPECS[category]
+        delinquency = sum(np.asarray(values[col], dtype=float) for col in delinq_cols) / len(delinq_cols)
+        per_category.append(values[rate_col] + spread - funding - LOSS_SEVERITY * delinquency)
+    return np.stack(np.broadcast_arrays(*per_category), axis=-1)
+
+
+def category_return_matrix(econ: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monthly net return (annualized %) per loan category.
+
+    Quarterly delinquency series are forward-filled onto the monthly grid and
+    leading months without a full set of inputs are dropped.
+    """
+    econ = econ.sort_index().ffill()
+    matrix = category_returns({col: econ[col].to_numpy(dtype=float) for col in ECONOMIC_COLUMNS})
+    returns = pd.DataFrame(matrix, index=econ.index, columns=LOAN_CATEGORIES)
+    return returns.dropna()
+
+
+def allocation_weights(allocations: pd.DataFrame) -> np.ndarray:
+    """Convert percentage allocation columns into an (n, 4) weight matrix summing to 1."""
+    weights = allocations[ALLOCATION_COLUMNS].astype(float).fillna(0.0).to_numpy()
+    return weights / 100.0
@@ -0,0 +1,216 @@
+"""
+Recompute efficient portfolio allocations for every lending strategy.
+
+Category returns come from the loan_returns model over the trailing lookback
+window. The long-only mean-variance frontier is solved exactly for a grid of
+risk-aversion levels: with four categories every support set (15 of them) is
+enumerated and its KKT system solved in one batched np.linalg.solve call, and
+the best feasible candidate per grid point is kept. Each strategy takes the
+frontier point at its risk_tolerance position, limited by its
+max_risk_threshold / min_expected_return when those can be met, and a new
+portfolio_allocations row is inserted with the economic context at creation.
+
+Usage:
+    python3 cli.py optimize [--lookback 60] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db.loan_returns import ALLOCATION_COLUMNS, LOAN_CATEGORIES, category_return_matrix, load_economic_history
+from db.seed_database import connect_to_database
+
+DEFAULT_LOOKBACK_MONTHS = 60
+RISK_AVERSION_GRID = np.logspace(-2, 3, 200)
+
+# Position along the frontier's volatility range (0 = minimum variance, 1 = maximum return).
+FRONTIER_POSITION = {
+    'conservative': 0.15,
+    'moderate': 0.5,
+    'aggressive': 0.9,
+}
+DEFAULT_RISK_TOLERANCE = 'moderate'
+
+STRATEGIES_QUERY = """
+    SELECT id AS strategy_id, risk_tolerance, min_expected_return, max_risk_threshold
+    FROM lending_strategies
+    ORDER BY id
+"""
+
+
+def estimate_moments(returns: pd.DataFrame, lookback: int) -> tuple[np.ndarray, np.ndarray]:
+    """Mean vector and covariance matrix of category returns over the trailing window."""
+    window = returns.iloc[-lookback:].to_numpy(dtype=float)
+    if len(window) < 2:
+        raise ValueError('Need at least two months of category returns to estimate covariance')
+    return window.mean(axis=0), np.cov(window, rowvar=False)
+
+
+def efficient_frontier(mu: np.ndarray, cov: np.ndarray,
+                       risk_aversion: np.ndarray = RISK_AVERSION_GRID) -> pd.DataFrame:
+    """
+    Long-only, fully invested mean-variance optimum for each risk-aversion level.
+
+    Maximizes mu.w - (gamma / 2) w'Cw subject to sum(w) = 1 and w >= 0.
+    """
+    n_assets, n_grid = len(mu), len(risk_aversion)
+    best_weights = np.zeros((n_grid, n_assets))
+    best_objective = np.full(n_grid, -np.inf)
+
+    for size in range(1, n_assets + 1):
+        for support in combinations(range(n_assets), size):
+            idx = np.array(support)
+            # KKT system per gamma: [gamma*C_SS 1; 1' 0] [w; nu] = [mu_S; 1]
+            kkt = np.zeros((n_grid, size + 1, size + 1))
+            kkt[:, :size, :size] = risk_aversion[:, None, None] * cov[np.ix_(idx, idx)]
+            kkt[:, :size, size] = 1.0
+            kkt[:, size, :size] = 1.0
+            rhs = np.broadcast_to(np.append(mu[idx], 1.0), (n_grid, size + 1))[..., None]
+            try:
+                solution = np.linalg.solve(kkt, rhs)[..., 0]
+            except np.linalg.LinAlgError:
+                continue
+
+            weights = np.zeros((n_grid, n_assets))
+            weights[:, idx] = solution[:, :size]
+            feasible = (weights >= -1e-10).all(axis=1)
+            weights = np.clip(weights, 0.0, None)
+            objective = weights @ mu - 0.5 * risk_aversion * np.einsum('gi,ij,gj->g', weights, cov, weights)
+
+            better = feasible & (objective > best_objective)
+            best_weights[better] = weights[better]
+            best_objective[better] = objective[better]
+
+    frontier = pd.DataFrame(best_weights, columns=LOAN_CATEGORIES)
+    frontier.insert(0, 'risk_aversion', risk_aversion)
+    frontier['expected_return'] = best_weights @ mu
+    frontier['risk'] = np.sqrt(np.einsum('gi,ij,gj->g', best_weights, cov, best_weights))
+    return frontier
+
+
+def select_allocations(frontier: pd.DataFrame, strategies: pd.DataFrame) -> np.ndarray:
+    """Pick one frontier row per strategy, shape (S,), vectorized across strategies."""
+    risk = frontier['risk'].to_numpy()
+    ret = frontier['expected_return'].to_numpy()
+
+    positions = (
+        strategies['risk_tolerance']
+        .fillna(DEFAULT_RISK_TOLERANCE)
+        .map(FRONTIER_POSITION)
+        .fillna(FRONTIER_POSITION[DEFAULT_RISK_TOLERANCE])
+        .to_numpy(dtype=float)
+    )
+    target_risk = risk.min() + positions * (risk.max() - risk.min())
+
+    max_risk = pd.to_numeric(strategies['max_risk_threshold'], errors='coerce').to_numpy(dtype=float)
+    min_return = pd.to_numeric(strategies['min_expected_return'], errors='coerce').to_numpy(dtype=float)
+    allowed = np.ones((len(strategies), len(frontier)), dtype=bool)
+    for limit_ok in (
+        np.isnan(max_risk)[:, None] | (risk[None, :] <= max_risk[:, None]),
+        np.isnan(min_return)[:, None] | (ret[None, :] >= min_return[:, None]),
+    ):
+        # Apply a limit only where at least one frontier point satisfies it.
+        narrowed = allowed & limit_ok
+        allowed = np.where(narrowed.any(axis=1, keepdims=True), narrowed, allowed)
+
+    distance = np.where(allowed, np.abs(risk[None, :] - target_risk[:, None]), np.inf)
+    return distance.argmin(axis=1)
+
+
+def to_percentages(weights: np.ndarray) -> np.ndarray:
+    """Round weights to DECIMAL(5,2) percentages that still sum to exactly 100."""
+    cents = np.round(weights * 10000).astype(int)
+    largest = cents.argmax(axis=1)
+    cents[np.arange(len(cents)), largest] += 10000 - cents.sum(axis=1)
+    return cents / 100.0
+
+
+def write_allocations(conn, strategy_ids, percentages: np.ndarray, context: dict) -> None:
+    """Insert one new portfolio_allocations row per strategy."""
+    cur = conn.cursor()
+    rows = [
+        (int(sid), *map(float, pct), context['date'], context['unemployment_rate'], context['fed_funds_rate'])
+        for sid, pct in zip(strategy_ids, percentages)
+    ]
+    execute_values(
+        cur,
+        f"""
+        INSERT INTO portfolio_allocations (
+            strategy_id, {', '.join(ALLOCATION_COLUMNS)},
+            created_for_date, unemployment_at_creation, fed_funds_at_creation
+        ) VALUES %s
+        """,
+        rows,
+        page_size=1000,
+    )
+    conn.commit()
+    cur.close()
+
+
+def latest_context(conn) -> dict:
+    """Most recent economic_data values recorded alongside new allocations."""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT date, unemployment_rate, fed_funds_rate
+        FROM economic_data
+        WHERE unemployment_rate IS NOT NULL AND fed_funds_rate IS NOT NULL
+        ORDER BY date DESC
+        LIMIT 1
+    """)
+    row = cur.fetchone()
+    cur.close()
+    if not row:
+        return {'date': None, 'unemployment_rate': None, 'fed_funds_rate': None}
+    return {'date': row[0], 'unemployment_rate': row[1], 'fed_funds_rate': row[2]}
+
+
+def print_frontier_summary(frontier: pd.DataFrame) -> None:
+    risk = frontier['risk']
+    for tolerance, position in FRONTIER_POSITION.items():
+        target = risk.min() + position * (risk.max() - risk.min())
+        row = frontier.iloc[(risk - target).abs().argmin()]
+        mix = ', '.join(f'{cat}={row[cat] * 100:.1f}%' for cat in LOAN_CATEGORIES)
+        print(f"  {tolerance:<12} return={row['expected_return']:.4f} risk={row['risk']:.4f} [{mix}]")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Recompute efficient portfolio allocations per strategy.')
+    parser.add_argument('--lookback', type=int, default=DEFAULT_LOOKBACK_MONTHS,
+                        help='Trailing months used for return and covariance estimates')
+    parser.add_argument('--dry-run', action='store_true', help='Print the frontier without writing allocations')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    conn = connect_to_database()
+    try:
+        returns = category_return_matrix(load_economic_history(conn))
+        mu, cov = estimate_moments(returns, args.lookback)
+        frontier = efficient_frontier(mu, cov)
+        print(f'\n📈 Efficient frontier ({min(args.lookback, len(returns))} months ending {returns.index[-1].date()}):')
+        print_frontier_summary(frontier)
+
+        strategies = pd.read_sql_query(STRATEGIES_QUERY, conn)
+        if strategies.empty or args.dry_run:
+            return
+
+        chosen = select_allocations(frontier, strategies)
+        percentages = to_percentages(frontier[LOAN_CATEGORIES].to_numpy()[chosen])
+        write_allocations(conn, strategies['strategy_id'], percentages, latest_context(conn))
+        print(f'✓ Wrote new allocations for {len(strategies)} strategies')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
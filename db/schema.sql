@@ -1,4 +1,12 @@
 -- Drop existing tables if they exist
+DROP TABLE IF EXISTS peer_group_space CASCADE;
+DROP TABLE IF EXISTS peer_group_centroids CASCADE;
+DROP TABLE IF EXISTS peer_groups CASCADE;
+DROP TABLE IF EXISTS bank_macro_features CASCADE;
+DROP TABLE IF EXISTS alert_evaluated_rows CASCADE;
+DROP TABLE IF EXISTS alert_watermarks CASCADE;
+DROP TABLE IF EXISTS triggered_alerts CASCADE;
+DROP TABLE IF EXISTS correlation_cube CASCADE;
 DROP TABLE IF EXISTS alert_settings CASCADE;
 DROP TABLE IF EXISTS performance_records CASCADE;
 DROP TABLE IF EXISTS scenario_allocations CASCADE;
@@ -64,6 +72,7 @@ CREATE TABLE economic_data (
     fed_funds_change DECIMAL(10,4),
     unemployment_change DECIMAL(10,4),
     
+    row_hash VARCHAR(32),               -- Content hash of the seeded values (skips unchanged rows on re-seed)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -95,6 +104,7 @@ CREATE TABLE bank_performance (
     -- Status
     active BOOLEAN DEFAULT true,
     
+    row_hash VARCHAR(32),               -- Content hash of the seeded metrics (skips unchanged rows on re-seed)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(cert_number, date)
 );
@@ -160,6 +170,7 @@ CREATE TABLE scenario_allocations (
     id SERIAL PRIMARY KEY,
     scenario_id INTEGER REFERENCES saved_scenarios(id) ON DELETE CASCADE,
     allocation_id INTEGER REFERENCES portfolio_allocations(id) ON DELETE CASCADE,
+    cert_number INTEGER,                -- Set for per-bank ROA forecasts (allocation_id is NULL)
     
     -- Predicted outcomes
     predicted_return DECIMAL(10,4),
@@ -204,6 +215,146 @@ CREATE TABLE alert_settings (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Triggered alerts (db/evaluate_alerts.py); delivered_at is set once sent
+CREATE TABLE triggered_alerts (
+    id SERIAL PRIMARY KEY,
+    alert_setting_id INTEGER REFERENCES alert_settings(id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    
+    metric VARCHAR(50) NOT NULL,        -- economic_data column that crossed its threshold
+    observed_date DATE NOT NULL,
+    observed_value DECIMAL(10,4),
+    threshold DECIMAL(10,4),
+    
+    alert_frequency VARCHAR(20),
+    email_alerts BOOLEAN,
+    delivered_at TIMESTAMP,
+    
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(alert_setting_id, metric, observed_date)
+);
+
+-- Last economic_data date evaluated by each incremental job
+CREATE TABLE alert_watermarks (
+    engine VARCHAR(50) PRIMARY KEY,
+    last_evaluated_date DATE NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- economic_data.row_hash of each date when it was last evaluated, so revised dates are re-checked
+CREATE TABLE alert_evaluated_rows (
+    engine VARCHAR(50) NOT NULL,
+    date DATE NOT NULL,
+    row_hash VARCHAR(32),
+    PRIMARY KEY (engine, date)
+);
+
+-- Precomputed correlation matrices (db/build_correlation_cube.py)
+CREATE TABLE correlation_cube (
+    id SERIAL PRIMARY KEY,
+    cert_number INTEGER NOT NULL,       -- 0 = industry (cross-bank median)
+    window_quarters INTEGER NOT NULL,   -- 0 = all history up to end_date
+    end_date DATE NOT NULL,
+    n_obs INTEGER,                      -- Smallest pairwise observation count in the window
+    
+    variables TEXT[] NOT NULL,
+    correlations REAL[] NOT NULL,       -- Upper triangle (i < j), row-major
+    input_hash VARCHAR(40) NOT NULL,    -- Hash of the window's input rows
+    
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(cert_number, window_quarters, end_date)
+);
+
+-- Point-in-time bank x macro features (db/build_feature_store.py)
+CREATE TABLE bank_macro_features (
+    cert_number INTEGER NOT NULL,
+    date DATE NOT NULL,                 -- Bank report date
+    bank_name VARCHAR(255),
+    active BOOLEAN,
+    econ_date DATE,                     -- Latest economic_data month published by the report date
+    
+    -- Bank metrics
+    total_assets DOUBLE PRECISION,
+    total_deposits DOUBLE PRECISION,
+    total_loans DOUBLE PRECISION,
+    net_income DOUBLE PRECISION,
+    roa DOUBLE PRECISION,
+    roe DOUBLE PRECISION,
+    nim DOUBLE PRECISION,
+    efficiency_ratio DOUBLE PRECISION,
+    tier1_capital_ratio DOUBLE PRECISION,
+    
+    -- Macro values as of econ_date
+    unemployment_rate DOUBLE PRECISION,
+    fed_funds_rate DOUBLE PRECISION,
+    gdp_growth DOUBLE PRECISION,
+    yield_curve DOUBLE PRECISION,
+    delinq_cc DOUBLE PRECISION,
+    delinq_mortgage DOUBLE PRECISION,
+    
+    -- Per-bank lag/change features and the next-quarter target (roa_forecasting.engineer_features)
+    roa_lag1 DOUBLE PRECISION,
+    roa_lag4 DOUBLE PRECISION,
+    roa_chg_1p DOUBLE PRECISION,
+    roe_lag1 DOUBLE PRECISION,
+    roe_lag4 DOUBLE PRECISION,
+    roe_chg_1p DOUBLE PRECISION,
+    nim_lag1 DOUBLE PRECISION,
+    nim_lag4 DOUBLE PRECISION,
+    nim_chg_1p DOUBLE PRECISION,
+    total_loans_lag1 DOUBLE PRECISION,
+    total_loans_lag4 DOUBLE PRECISION,
+    total_loans_chg_1p DOUBLE PRECISION,
+    total_deposits_lag1 DOUBLE PRECISION,
+    total_deposits_lag4 DOUBLE PRECISION,
+    total_deposits_chg_1p DOUBLE PRECISION,
+    efficiency_ratio_lag1 DOUBLE PRECISION,
+    efficiency_ratio_lag4 DOUBLE PRECISION,
+    efficiency_ratio_chg_1p DOUBLE PRECISION,
+    target_next_roa DOUBLE PRECISION,
+    
+    row_hash VARCHAR(32),               -- Content hash of the feature values (skips unchanged rows on rebuild)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (cert_number, date)
+);
+
+-- Quarterly peer group per bank (db/build_peer_groups.py)
+CREATE TABLE peer_groups (
+    cert_number INTEGER NOT NULL,
+    date DATE NOT NULL,
+    peer_group INTEGER NOT NULL,
+    distance REAL,                      -- Distance to the group centroid in PCA space
+    pc1 REAL,                           -- First two PCA coordinates (PCA of the run that wrote the row)
+    pc2 REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (cert_number, date)
+);
+
+-- Peer group centroids per quarter, in raw metric units (warm start for the next quarter)
+CREATE TABLE peer_group_centroids (
+    date DATE NOT NULL,
+    peer_group INTEGER NOT NULL,
+    n_banks INTEGER,
+    centroid REAL[] NOT NULL,
+    features TEXT[] NOT NULL,           -- Metric name for each centroid element
+    silhouette REAL,                    -- Silhouette score of the quarter's assignment
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (date, peer_group)
+);
+
+-- Imputer, scaler and PCA basis shared by every peer_groups run (one row)
+CREATE TABLE peer_group_space (
+    id SERIAL PRIMARY KEY,
+    features TEXT[] NOT NULL,
+    medians DOUBLE PRECISION[] NOT NULL,    -- Imputation value per feature
+    mean DOUBLE PRECISION[] NOT NULL,       -- StandardScaler mean per feature
+    scale DOUBLE PRECISION[] NOT NULL,      -- StandardScaler std per feature
+    pca_mean DOUBLE PRECISION[] NOT NULL,
+    components DOUBLE PRECISION[][] NOT NULL,  -- PCA components x features (pc1, pc2 first)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for performance
 CREATE INDEX idx_economic_data_date ON economic_data(date);
 CREATE INDEX idx_bank_performance_cert ON bank_performance(cert_number);
@@ -212,5 +363,10 @@ CREATE INDEX idx_bank_performance_cert_date ON bank_performance(cert_number, dat
 CREATE INDEX idx_lending_strategies_user ON lending_strategies(user_id);
 CREATE INDEX idx_portfolio_allocations_strategy ON portfolio_allocations(strategy_id);
 CREATE INDEX idx_saved_scenarios_user ON saved_scenarios(user_id);
+CREATE INDEX idx_scenario_allocations_scenario ON scenario_allocations(scenario_id);
 CREATE INDEX idx_performance_records_strategy ON performance_records(strategy_id);
 CREATE INDEX idx_alert_settings_user ON alert_settings(user_id);
+CREATE INDEX idx_triggered_alerts_user ON triggered_alerts(user_id);
+CREATE INDEX idx_triggered_alerts_undelivered ON triggered_alerts(alert_frequency) WHERE delivered_at IS NULL;
+CREATE INDEX idx_bank_macro_features_date ON bank_macro_features(date);
+CREATE INDEX idx_peer_groups_date_group ON peer_groups(date, peer_group);
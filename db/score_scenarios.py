@@ -0,0 +1,194 @@
+"""
+Score next-quarter ROA for every active bank under every saved scenario.
+
+Loads the latest trained model from roa_forecasting.py once, builds one
+feature row per (bank, scenario) by broadcasting each bank's lagged metrics
+against each scenario's macro drivers, scores the matrix in chunks and
+replaces the per-bank rows of scenario_allocations (cert_number set,
+allocation_id NULL) using COPY. predicted_risk is the model's holdout RMSE and
+the confidence interval is a normal band of that width.
+
+Usage:
+    python3 cli.py score [--chunk-size 50000] [--from-store]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from roa_forecasting import FEATURE_COLS, load_artifact, predict
+from db.seed_database import connect_to_database
+from db.simulate_scenarios import SCENARIO_DRIVERS
+
+DEFAULT_CHUNK_SIZE = 50000
+CONFIDENCE_Z = 1.645  # two-sided 90%
+
+# Bank feature -> (metric, quarters back from the latest report)
+BANK_FEATURES = {
+    'roa_lag1': ('roa', 1),
+    'roa_lag4': ('roa', 4),
+    'roe_lag1': ('roe', 1),
+    'nim_lag1': ('nim', 1),
+    'efficiency_ratio_lag1': ('efficiency_ratio', 1),
+    'total_loans_lag1': ('total_loans', 1),
+    'total_deposits_lag1': ('total_deposits', 1),
+}
+MACRO_FEATURES = [col for col in FEATURE_COLS if col not in BANK_FEATURES]
+MAX_LAG = max(lag for _, lag in BANK_FEATURES.values())
+
+RECENT_QUARTERS_QUERY = f"""
+    SELECT cert_number, quarters_back, active,
+           {', '.join(sorted({metric for metric, _ in BANK_FEATURES.values()}))}
+    FROM (
+        SELECT *,
+               ROW_NUMBER() OVER (PARTITION BY cert_number ORDER BY date DESC) - 1 AS quarters_back
+        FROM bank_performance
+    ) ranked
+    WHERE quarters_back <= {MAX_LAG}
+"""
+
+# Latest row per bank from the point-in-time feature table (db/build_feature_store.py)
+STORE_FEATURES_QUERY = f"""
+    SELECT DISTINCT ON (cert_number) cert_number, active, {', '.join(BANK_FEATURES)}
+    FROM bank_macro_features
+    ORDER BY cert_number, date DESC
+"""
+
+SCENARIOS_QUERY = f"""
+    SELECT id AS scenario_id, {', '.join(SCENARIO_DRIVERS.values())}
+    FROM saved_scenarios
+    ORDER BY id
+"""
+
+
+def bank_feature_matrix(recent: pd.DataFrame) -> pd.DataFrame:
+    """One row per active bank with its lagged features, indexed by cert_number."""
+    latest_active = recent.loc[recent['quarters_back'] == 0].set_index('cert_number')['active']
+    active_certs = latest_active[latest_active.fillna(True).astype(bool)].index
+
+    wide = recent[recent['cert_number'].isin(active_certs)].pivot(index='cert_number', columns='quarters_back')
+    features = pd.DataFrame(index=wide.index)
+    for feature, (metric, lag) in BANK_FEATURES.items():
+        column = (metric, lag)
+        features[feature] = pd.to_numeric(wide[column], errors='coerce') if column in wide.columns else np.nan
+    return features
+
+
+def store_feature_matrix(latest: pd.DataFrame) -> pd.DataFrame:
+    """Same shape as bank_feature_matrix, read from each bank's latest feature-store row."""
+    latest = latest[latest['active'].fillna(True).astype(bool)].set_index('cert_number')
+    return latest[list(BANK_FEATURES)].apply(pd.to_numeric, errors='coerce')
+
+
+def latest_macro_values(conn) -> dict:
+    """Latest non-null value of each macro feature, used where a scenario leaves it unset."""
+    econ = pd.read_sql_query(
+        f"SELECT date, {', '.join(MACRO_FEATURES)} FROM economic_data ORDER BY date",
+        conn,
+    )
+    return {col: pd.to_numeric(econ[col], errors='coerce').dropna().iloc[-1]
+            if econ[col].notna().any() else np.nan
+            for col in MACRO_FEATURES}
+
+
+def scenario_feature_matrix(scenarios: pd.DataFrame, fallback: dict) -> pd.DataFrame:
+    """One row per scenario with macro features, indexed by scenario_id."""
+    macro = pd.DataFrame(index=scenarios['scenario_id'])
+    for col in MACRO_FEATURES:
+        scenario_col = SCENARIO_DRIVERS.get(col)
+        values = scenarios[scenario_col].astype(float).to_numpy() if scenario_col else np.nan
+        macro[col] = np.where(pd.isna(values), fallback[col], values)
+    return macro
+
+
+def score_grid(artifact: dict, banks: pd.DataFrame, macro: pd.DataFrame,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """Score the full banks x scenarios grid in row chunks."""
+    n_banks, n_scenarios = len(banks), len(macro)
+    bank_values = banks[list(BANK_FEATURES)].to_numpy(dtype=float)
+    macro_values = macro[MACRO_FEATURES].to_numpy(dtype=float)
+
+    predictions = np.empty(n_banks * n_scenarios)
+    for start in range(0, len(predictions), chunk_size):
+        flat = np.arange(start, min(start + chunk_size, len(predictions)))
+        # Row i of the grid is bank i // n_scenarios under scenario i % n_scenarios.
+        chunk = pd.DataFrame(
+            np.hstack([bank_values[flat // n_scenarios], macro_values[flat % n_scenarios]]),
+            columns=list(BANK_FEATURES) + MACRO_FEATURES,
+        )
+        predictions[flat] = predict(artifact, chunk)
+
+    rmse = min(row['holdout']['RMSE'] for row in artifact['leaderboard'])
+    return pd.DataFrame({
+        'scenario_id': np.tile(macro.index.to_numpy(), n_banks),
+        'cert_number': np.repeat(banks.index.to_numpy(), n_scenarios),
+        'predicted_return': predictions,
+        'predicted_risk': rmse,
+        'confidence_interval_low': predictions - CONFIDENCE_Z * rmse,
+        'confidence_interval_high': predictions + CONFIDENCE_Z * rmse,
+    })
+
+
+def write_bank_forecasts(conn, results: pd.DataFrame, scenario_ids) -> None:
+    """Replace per-bank forecast rows for the scored scenarios via COPY."""
+    cur = conn.cursor()
+    cur.execute(
+        'DELETE FROM scenario_allocations WHERE scenario_id = ANY(%s) AND cert_number IS NOT NULL',
+        ([int(sid) for sid in scenario_ids],),
+    )
+
+    buffer = io.StringIO()
+    results.round(4).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert(
+        f"COPY scenario_allocations ({', '.join(results.columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+    conn.commit()
+    cur.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Score ROA forecasts for all banks x saved scenarios.')
+    parser.add_argument('--model', type=Path, help='Model artifact path (default: latest trained)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Feature rows scored per predict call')
+    parser.add_argument('--from-store', action='store_true',
+                        help='Read bank features from bank_macro_features instead of bank_performance')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    artifact = load_artifact(args.model)
+
+    conn = connect_to_database()
+    try:
+        if args.from_store:
+            banks = store_feature_matrix(pd.read_sql_query(STORE_FEATURES_QUERY, conn))
+        else:
+            banks = bank_feature_matrix(pd.read_sql_query(RECENT_QUARTERS_QUERY, conn))
+        scenarios = pd.read_sql_query(SCENARIOS_QUERY, conn)
+        if banks.empty or scenarios.empty:
+            print('  ℹ Need at least one active bank and one saved scenario; nothing to score')
+            return
+
+        macro = scenario_feature_matrix(scenarios, latest_macro_values(conn))
+        results = score_grid(artifact, banks, macro, chunk_size=args.chunk_size)
+        write_bank_forecasts(conn, results, macro.index)
+        print(f"✓ Scored {len(banks)} banks x {len(macro)} scenarios with {artifact['model_name']} "
+              f'({len(results)} forecasts written)')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
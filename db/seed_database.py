@@ -8,29 +8,22 @@ Run this script after:
 3. Executing all data collection cells in the notebook
 
 Usage:
-    python3 db/seed_database.py
+    python3 cli.py seed
 """
 
+import hashlib
 import os
 import sys
 import psycopg2
-from psycopg2.extras import execute_batch
+from psycopg2.extras import execute_values
 from datetime import datetime
-import re
 import pandas as pd
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from institution_directory import clean_bank_name, default_directory
+from pipeline_config import db_config
 
-# Database connection parameters
-DB_CONFIG = {
-    'dbname': os.getenv('DB_NAME', 'bank_lending_db'),
-    'user': os.getenv('DB_USER', 'postgres'),
-    'password': os.getenv('DB_PASSWORD', ''),
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'port': os.getenv('DB_PORT', '5432')
-}
+# Database connection parameters (shared with every pipeline step)
+DB_CONFIG = db_config()
 
 CANONICAL_BANK_NAMES_BY_CERT = {
     628: 'JPMorgan Chase',
@@ -54,35 +47,46 @@ def connect_to_database():
         print(f"✗ Error connecting to database: {e}")
         sys.exit(1)
 
-def clean_bank_name(name):
-    """Normalize bank names and remove trailing punctuation artifacts like ' - ,'"""
-    if not name:
-        return None
-
-    cleaned = str(name).strip()
-    cleaned = re.sub(r'\s*-\s*,\s*$', '', cleaned)
-    cleaned = re.sub(r'\s*,\s*$', '', cleaned)
-    cleaned = re.sub(r',\s*National Association\s*$', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'\s+National Association\s*$', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'\s+Bank USA\s*$', ' Bank', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-
-    canonical_name_map = {
-        'the huntington national bank': 'Huntington National Bank',
-        'huntington': 'Huntington National Bank',
-        'huntington national bank': 'Huntington National Bank',
-    }
-
-    normalized_key = cleaned.strip().lower()
-    return canonical_name_map.get(normalized_key, cleaned.strip())
-
 def canonical_bank_name(cert, source_name):
-    """Return canonical bank name by CERT when available, otherwise normalized source name."""
+    """Return canonical bank name by CERT when available (fixed map, then offline
+    institution directory), otherwise normalized source name."""
     cert_int = int(cert) if cert is not None else None
     if cert_int in CANONICAL_BANK_NAMES_BY_CERT:
         return CANONICAL_BANK_NAMES_BY_CERT[cert_int]
+
+    directory = default_directory()
+    if directory is not None and cert_int is not None:
+        name = directory.name_for_cert(cert_int)
+        if name:
+            return name
     return clean_bank_name(source_name)
 
+def row_hash(values):
+    """Content hash of the values an upsert writes; stored in row_hash to skip unchanged rows."""
+    return hashlib.md5(repr(tuple(values)).encode()).hexdigest()
+
+def split_changed_records(existing_hashes, keyed_records):
+    """
+    Partition (key, record, hash) tuples against stored hashes.
+
+    Returns ({key: record to write}, inserted count, updated count, unchanged count).
+    Later duplicates of a key win, matching the old row-by-row upsert order.
+    """
+    latest = {}
+    for key, record, digest in keyed_records:
+        latest[key] = (record, digest)
+
+    to_write, inserted, updated = {}, 0, 0
+    for key, (record, digest) in latest.items():
+        if key not in existing_hashes:
+            inserted += 1
+        elif existing_hashes[key] != digest:
+            updated += 1
+        else:
+            continue
+        to_write[key] = record
+    return to_write, inserted, updated, len(latest) - inserted - updated
+
 def normalize_economic_columns(df):
     """Map exported notebook column names to DB schema column names."""
     normalized = df.copy()
@@ -159,18 +163,19 @@ def seed_economic_data(conn, df):
     available_columns = [col for col in column_mapping.keys() if col in df.columns]
     db_columns = [column_mapping[col] for col in available_columns]
     
-    columns_str = ', '.join(['date'] + db_columns)
-    placeholders = ', '.join(['%s'] * (len(db_columns) + 1))
+    columns_str = ', '.join(['date'] + db_columns + ['row_hash'])
     
     insert_query = f"""
         INSERT INTO economic_data ({columns_str})
-        VALUES ({placeholders})
+        VALUES %s
         ON CONFLICT (date) DO UPDATE SET
-        {', '.join([f"{col} = EXCLUDED.{col}" for col in db_columns])}
+        {', '.join([f"{col} = EXCLUDED.{col}" for col in db_columns + ['row_hash']])}
+        WHERE economic_data.row_hash IS DISTINCT FROM EXCLUDED.row_hash
     """
     
-    # Prepare data for insertion
-    records = []
+    # Prepare data for insertion; the hash covers the column set too, so adding
+    # a column to the export counts as a change.
+    keyed_records = []
     for idx, row in df.iterrows():
         date = row['date'] if 'date' in row else idx
         if isinstance(date, pd.Timestamp):
@@ -182,13 +187,19 @@ def seed_economic_data(conn, df):
             # Handle NaN values
             values.append(None if pd.isna(val) else float(val))
         
-        records.append(tuple(values))
+        digest = row_hash([columns_str] + values[1:])
+        keyed_records.append((date, tuple(values) + (digest,), digest))
     
-    # Insert data in batches
-    execute_batch(cur, insert_query, records, page_size=100)
+    cur.execute("SELECT date, row_hash FROM economic_data")
+    existing_hashes = dict(cur.fetchall())
+    records, inserted, updated, unchanged = split_changed_records(existing_hashes, keyed_records)
+    
+    # Only new or changed rows are sent
+    if records:
+        execute_values(cur, insert_query, list(records.values()), page_size=1000)
     conn.commit()
     
-    print(f"✓ Inserted {len(records)} economic data records")
+    print(f"✓ Economic data: {inserted} inserted, {updated} updated, {unchanged} unchanged")
     cur.close()
 
 def seed_bank_performance(conn, bank_data_dict):
@@ -224,9 +235,9 @@ def seed_bank_performance(conn, bank_data_dict):
             cert_number, bank_name, date,
             total_assets, total_deposits, total_loans, net_income, equity_capital,
             roa, roe, nim, efficiency_ratio, tier1_capital_ratio,
-            city, state, active
+            city, state, active, row_hash
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES %s
         ON CONFLICT (cert_number, date) DO UPDATE SET
             total_assets = EXCLUDED.total_assets,
             total_deposits = EXCLUDED.total_deposits,
@@ -237,10 +248,22 @@ def seed_bank_performance(conn, bank_data_dict):
             roe = EXCLUDED.roe,
             nim = EXCLUDED.nim,
             efficiency_ratio = EXCLUDED.efficiency_ratio,
-            tier1_capital_ratio = EXCLUDED.tier1_capital_ratio
+            tier1_capital_ratio = EXCLUDED.tier1_capital_ratio,
+            row_hash = EXCLUDED.row_hash
+        WHERE bank_performance.row_hash IS DISTINCT FROM EXCLUDED.row_hash
     """
     
-    total_records = 0
+    # (cert, date) -> stored hash for every bank in this load, fetched once
+    certs = [int(df['cert_number'].iloc[0]) for df in bank_data_dict.values()
+             if df is not None and len(df) > 0 and 'cert_number' in df.columns]
+    cur.execute(
+        "SELECT cert_number, date, row_hash FROM bank_performance WHERE cert_number = ANY(%s)",
+        (certs,)
+    )
+    existing_hashes = {(cert, date): digest for cert, date, digest in cur.fetchall()}
+    
+    pending = {}
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
     
     for bank_key, df in bank_data_dict.items():
         if df is None or len(df) == 0:
@@ -278,7 +301,7 @@ def seed_bank_performance(conn, bank_data_dict):
         else:
             active = True
         
-        records = []
+        keyed_records = []
         for idx, row in df.iterrows():
             # Parse date
             date = row['report_date'] if 'report_date' in row else idx
@@ -306,14 +329,24 @@ def seed_bank_performance(conn, bank_data_dict):
                 state,
                 bool(active)
             )
-            records.append(record)
+            # Hash only the columns the upsert updates (the metrics)
+            digest = row_hash(record[3:13])
+            keyed_records.append(((cert, date), record + (digest,), digest))
         
-        execute_batch(cur, insert_query, records, page_size=50)
-        total_records += len(records)
-        print(f"  ✓ Inserted {len(records)} records for {bank_name}")
+        records, inserted, updated, unchanged = split_changed_records(existing_hashes, keyed_records)
+        pending.update(records)
+        totals['inserted'] += inserted
+        totals['updated'] += updated
+        totals['unchanged'] += unchanged
+        if records:
+            print(f"  ✓ {bank_name}: {inserted} inserted, {updated} updated, {unchanged} unchanged")
     
+    # Only new or changed rows are sent
+    if pending:
+        execute_values(cur, insert_query, list(pending.values()), page_size=1000)
     conn.commit()
-    print(f"✓ Total bank performance records inserted: {total_records}")
+    print(f"✓ Bank performance: {totals['inserted']} inserted, {totals['updated']} updated, "
+          f"{totals['unchanged']} unchanged")
     cur.close()
 
 def create_sample_user(conn):
@@ -347,10 +380,10 @@ def main():
     print("Bank Lending Strategy Optimizer - Database Seeding")
     print("=" * 60)
     
-    # Check if we're running from notebook directory
-    if not os.path.exists('Capstone_Intro_DS_Capstone_Starter.ipynb'):
+    # Data paths below are relative to the project root
+    if not os.path.exists('db/schema.sql'):
         print("\n⚠ Please run this script from the project root directory")
-        print("  (where your .ipynb file is located)")
+        print("  (python3 cli.py seed does this for you)")
         sys.exit(1)
     
     # Connect to database
@@ -0,0 +1,275 @@
+"""
+Monte Carlo refresh of scenario_allocations for every saved scenario.
+
+Lending rates and delinquency rates are regressed on the three scenario drivers
+(unemployment, GDP growth, fed funds) over economic_data history. Residuals
+are simulated as correlated AR(1) paths once and shared by all scenarios
+(common random numbers), so scenario results differ only by their drivers.
+Each scenario is scored against the latest portfolio allocation of every
+strategy owned by the same user; predicted_return/predicted_risk are the mean/std of the horizon-average
+portfolio return across paths, and the confidence interval is its central
+quantile range.
+
+Usage:
+    python3 cli.py simulate [--paths 10000] [--horizon 12] [--workers 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db.loan_returns import (
+    ALLOCATION_COLUMNS,
+    ECONOMIC_COLUMNS,
+    allocation_weights,
+    category_returns,
+    load_economic_history,
+)
+from db.seed_database import connect_to_database
+
+# economic_data column -> saved_scenarios column
+SCENARIO_DRIVERS = {
+    'unemployment_rate': 'unemployment_scenario',
+    'gdp_growth': 'gdp_growth_scenario',
+    'fed_funds_rate': 'fed_funds_scenario',
+}
+DRIVER_COLUMNS = list(SCENARIO_DRIVERS)
+SIMULATED_COLUMNS = [col for col in ECONOMIC_COLUMNS if col not in SCENARIO_DRIVERS]
+NON_NEGATIVE_COLUMNS = {col for col in SIMULATED_COLUMNS if col.startswith('delinq_')}
+
+DEFAULT_PATHS = 10000
+DEFAULT_HORIZON_MONTHS = 12
+DEFAULT_CONFIDENCE = 0.90
+DEFAULT_SEED = 42
+DEFAULT_SCENARIO_CHUNK = 8
+DEFAULT_ALLOCATION_CHUNK = 512
+
+SCENARIOS_QUERY = f"""
+    SELECT id AS scenario_id, user_id, {', '.join(SCENARIO_DRIVERS.values())}
+    FROM saved_scenarios
+    ORDER BY id
+"""
+
+# Latest allocation per strategy only: optimize adds a new row each run and the
+# older ones are kept as history (same rule as backtest_strategies).
+ALLOCATIONS_QUERY = f"""
+    SELECT * FROM (
+        SELECT DISTINCT ON (pa.strategy_id)
+            pa.id AS allocation_id, ls.user_id, {', '.join(f'pa.{col}' for col in ALLOCATION_COLUMNS)}
+        FROM portfolio_allocations pa
+        JOIN lending_strategies ls ON ls.id = pa.strategy_id
+        ORDER BY pa.strategy_id, pa.created_at DESC, pa.id DESC
+    ) latest
+    ORDER BY allocation_id
+"""
+
+
+def fit_scenario_model(econ: pd.DataFrame) -> dict:
+    """Estimate driver betas, AR(1) persistence and innovation covariance of the residuals."""
+    history = econ[DRIVER_COLUMNS + SIMULATED_COLUMNS].sort_index().ffill().dropna()
+    if len(history) <= len(DRIVER_COLUMNS) + 2:
+        raise ValueError(f'Need more economic history to fit scenario model (have {len(history)} months)')
+
+    X = np.column_stack([np.ones(len(history)), history[DRIVER_COLUMNS].to_numpy(dtype=float)])
+    Y = history[SIMULATED_COLUMNS].to_numpy(dtype=float)
+    beta, *_ = np.linalg.lstsq(X, Y, rcond=None)
+    resid = Y - X @ beta
+
+    lagged, current = resid[:-1], resid[1:]
+    phi = np.clip((lagged * current).sum(axis=0) / np.maximum((lagged ** 2).sum(axis=0), 1e-12), 0.0, 0.99)
+    innovations = current - phi * lagged
+    cov = np.atleast_2d(np.cov(innovations, rowvar=False))
+    chol = np.linalg.cholesky(cov + 1e-9 * np.eye(len(SIMULATED_COLUMNS)))
+
+    return {
+        'beta': beta,
+        'phi': phi,
+        'chol': chol,
+        'latest_drivers': history[DRIVER_COLUMNS].iloc[-1].to_numpy(dtype=float),
+    }
+
+
+def simulate_residual_paths(model: dict, n_paths: int, horizon: int, seed: int) -> np.ndarray:
+    """Correlated AR(1) residual paths, shape (n_paths, horizon, len(SIMULATED_COLUMNS))."""
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((n_paths, horizon, len(SIMULATED_COLUMNS))) @ model['chol'].T
+    phi = model['phi']
+
+    paths = np.empty_like(shocks)
+    # Start from the stationary distribution so short horizons are not under-dispersed.
+    paths[:, 0] = shocks[:, 0] / np.sqrt(1.0 - phi ** 2)
+    for t in range(1, horizon):
+        paths[:, t] = phi * paths[:, t - 1] + shocks[:, t]
+    return paths
+
+
+def scenario_category_returns(model: dict, drivers: np.ndarray, residual_paths: np.ndarray) -> np.ndarray:
+    """Horizon-average category returns for a batch of scenarios, shape (S, n_paths, 4)."""
+    X = np.column_stack([np.ones(len(drivers)), drivers])
+    levels = (X @ model['beta'])[:, None, None, :] + residual_paths[None]
+
+    values = {}
+    for j, col in enumerate(SIMULATED_COLUMNS):
+        series = levels[..., j]
+        values[col] = np.clip(series, 0.0, None) if col in NON_NEGATIVE_COLUMNS else series
+    for j, col in enumerate(DRIVER_COLUMNS):
+        values[col] = drivers[:, j][:, None, None]
+
+    return category_returns(values).mean(axis=2)
+
+
+def summarize_portfolios(category_paths: np.ndarray, weights: np.ndarray, confidence: float,
+                         allocation_chunk: int) -> np.ndarray:
+    """Mean, std and central confidence bounds of portfolio returns, shape (A, 4)."""
+    tail = (1.0 - confidence) / 2.0
+    out = np.empty((len(weights), 4))
+    for start in range(0, len(weights), allocation_chunk):
+        portfolio = category_paths @ weights[start:start + allocation_chunk].T
+        stop = start + portfolio.shape[1]
+        out[start:stop, 0] = portfolio.mean(axis=0)
+        out[start:stop, 1] = portfolio.std(axis=0, ddof=1)
+        out[start:stop, 2:] = np.quantile(portfolio, [tail, 1.0 - tail], axis=0).T
+    return out
+
+
+def simulate_batch(batch: list[tuple], model: dict, residual_paths: np.ndarray,
+                   confidence: float, allocation_chunk: int) -> list[tuple]:
+    """Score one batch of (scenario_id, drivers, allocation_ids, weights) tasks."""
+    drivers = np.vstack([task[1] for task in batch])
+    category_paths = scenario_category_returns(model, drivers, residual_paths)
+
+    rows = []
+    for (scenario_id, _, allocation_ids, weights), paths in zip(batch, category_paths):
+        stats = summarize_portfolios(paths, weights, confidence, allocation_chunk)
+        rows.extend(
+            (int(scenario_id), int(allocation_id), *map(float, stat))
+            for allocation_id, stat in zip(allocation_ids, stats)
+        )
+    return rows
+
+
+def build_tasks(scenarios: pd.DataFrame, allocations: pd.DataFrame, model: dict) -> list[tuple]:
+    """Pair each scenario with its owner's allocations; missing drivers use the latest observed values."""
+    drivers = scenarios[list(SCENARIO_DRIVERS.values())].astype(float).to_numpy()
+    drivers = np.where(np.isnan(drivers), model['latest_drivers'], drivers)
+
+    by_user = {user_id: grp for user_id, grp in allocations.groupby('user_id')}
+    tasks = []
+    for (scenario_id, user_id), scenario_drivers in zip(
+        scenarios[['scenario_id', 'user_id']].itertuples(index=False, name=None), drivers
+    ):
+        owned = by_user.get(user_id)
+        if owned is None or owned.empty:
+            continue
+        tasks.append((scenario_id, scenario_drivers, owned['allocation_id'].to_numpy(), allocation_weights(owned)))
+    return tasks
+
+
+def run_simulations(tasks: list[tuple], model: dict, n_paths: int = DEFAULT_PATHS,
+                    horizon: int = DEFAULT_HORIZON_MONTHS, confidence: float = DEFAULT_CONFIDENCE,
+                    seed: int = DEFAULT_SEED, workers: int = 1,
+                    scenario_chunk: int = DEFAULT_SCENARIO_CHUNK,
+                    allocation_chunk: int = DEFAULT_ALLOCATION_CHUNK) -> pd.DataFrame:
+    """Simulate all tasks in scenario batches, optionally across worker processes."""
+    residual_paths = simulate_residual_paths(model, n_paths, horizon, seed)
+    batches = [tasks[i:i + scenario_chunk] for i in range(0, len(tasks), scenario_chunk)]
+    run_batch = partial(simulate_batch, model=model, residual_paths=residual_paths,
+                        confidence=confidence, allocation_chunk=allocation_chunk)
+
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(run_batch, batches))
+    else:
+        parts = [run_batch(batch) for batch in batches]
+
+    return pd.DataFrame(
+        [row for part in parts for row in part],
+        columns=['scenario_id', 'allocation_id', 'predicted_return', 'predicted_risk',
+                 'confidence_interval_low', 'confidence_interval_high'],
+    )
+
+
+def write_scenario_allocations(conn, results: pd.DataFrame, scenario_ids) -> None:
+    """Replace scenario_allocations rows for the simulated scenarios in one transaction."""
+    cur = conn.cursor()
+    cur.execute(
+        'DELETE FROM scenario_allocations WHERE scenario_id = ANY(%s) AND allocation_id IS NOT NULL',
+        ([int(sid) for sid in scenario_ids],),
+    )
+    rows = [
+        (int(r[0]), int(r[1]), *(round(float(v), 4) for v in r[2:]))
+        for r in results.itertuples(index=False, name=None)
+    ]
+    execute_values(
+        cur,
+        """
+        INSERT INTO scenario_allocations (
+            scenario_id, allocation_id, predicted_return, predicted_risk,
+            confidence_interval_low, confidence_interval_high
+        ) VALUES %s
+        """,
+        rows,
+        page_size=1000,
+    )
+    conn.commit()
+    cur.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Refresh scenario_allocations with Monte Carlo estimates.')
+    parser.add_argument('--paths', type=int, default=DEFAULT_PATHS, help='Simulated paths per scenario')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON_MONTHS, help='Months per path')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help='Central confidence level for the interval bounds')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for scenario batches')
+    parser.add_argument('--scenario-chunk', type=int, default=DEFAULT_SCENARIO_CHUNK,
+                        help='Scenarios simulated together per batch (memory bound)')
+    parser.add_argument('--allocation-chunk', type=int, default=DEFAULT_ALLOCATION_CHUNK,
+                        help='Allocations summarized together per scenario (memory bound)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    conn = connect_to_database()
+    try:
+        econ = load_economic_history(conn, DRIVER_COLUMNS + SIMULATED_COLUMNS)
+        model = fit_scenario_model(econ)
+
+        scenarios = pd.read_sql_query(SCENARIOS_QUERY, conn)
+        allocations = pd.read_sql_query(ALLOCATIONS_QUERY, conn)
+        tasks = build_tasks(scenarios, allocations, model)
+        if not tasks:
+            print('  ℹ No saved scenarios with matching portfolio allocations; nothing to simulate')
+            return
+
+        results = run_simulations(
+            tasks,
+            model,
+            n_paths=args.paths,
+            horizon=args.horizon,
+            confidence=args.confidence,
+            seed=args.seed,
+            workers=args.workers,
+            scenario_chunk=args.scenario_chunk,
+            allocation_chunk=args.allocation_chunk,
+        )
+        write_scenario_allocations(conn, results, [task[0] for task in tasks])
+        print(f'✓ Simulated {len(tasks)} scenarios x {args.paths} paths '
+              f'({len(results)} scenario allocations written)')
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
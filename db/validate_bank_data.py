@@ -40,7 +40,7 @@ def fail(message: str) -> None:
 def main() -> None:
     csv_path = Path('data/bank_data.csv')
     if not csv_path.exists():
-        fail('Missing data/bank_data.csv. Run python3 db/fetch_major_bank_data.py first.')
+        fail('Missing data/bank_data.csv. Run python3 cli.py fetch-banks first.')
 
     df = pd.read_csv(csv_path)
 
@@ -0,0 +1,248 @@
+# Embedded DuckDB analytics backend
+# Loads the db/schema.sql tables from Parquet/CSV snapshots into DuckDB so the
+# export queries and the dashboard's composite/correlation aggregations can run
+# on a laptop or in CI without a PostgreSQL server. PostgreSQL stays the
+# serving store; this is a read-only analytical copy.
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+SCHEMA_PATH = PROJECT_ROOT / 'db' / 'schema.sql'
+DEFAULT_SOURCE_DIR = PROJECT_ROOT / 'data' / 'exports'
+
+# PostgreSQL column types without a direct DuckDB spelling
+_TYPE_REWRITES = [
+    (re.compile(r'^SERIAL$', re.IGNORECASE), 'INTEGER'),
+    (re.compile(r'^TEXT\[\]$', re.IGNORECASE), 'VARCHAR[]'),
+    (re.compile(r'^JSONB?$', re.IGNORECASE), 'VARCHAR'),
+]
+# Everything after the type in a column definition is a constraint or default
+_COLUMN_CLAUSES = re.compile(r'\s+(?:PRIMARY|REFERENCES|CHECK|UNIQUE|NOT|DEFAULT|NULL)\b.*$', re.IGNORECASE | re.DOTALL)
+_TABLE_CONSTRAINTS = ('CONSTRAINT', 'UNIQUE', 'PRIMARY', 'CHECK', 'FOREIGN')
+
+DEFAULT_CORRELATION_VARIABLES = [
+    'unemployment_rate', 'fed_funds_rate', 'gdp_growth', 'delinq_cc', 'delinq_mortgage',
+    'roa', 'roe', 'nim',
+]
+
+# Quarterly bank rows joined to the economic row for the report month
+# (same join as /api/correlation and the joined export).
+BANK_ECONOMIC_JOIN = """
+    FROM bank_performance b
+    JOIN economic_data e
+      ON DATE_TRUNC('month', b.date) = DATE_TRUNC('month', e.date)
+"""
+
+# Same scoring as getBankCompositeScores in controllers/apiController.js
+COMPOSITE_SCORES_QUERY = """
+    WITH bank_trend AS (
+      SELECT
+        cert_number, bank_name, city, state, date, roa, roe, tier1_capital_ratio, total_loans,
+        (total_loans / NULLIF(LAG(total_loans, 4) OVER (PARTITION BY cert_number ORDER BY date), 0) - 1) * 100 AS loans_yoy_growth,
+        ROW_NUMBER() OVER (PARTITION BY cert_number ORDER BY date DESC) AS recency_rank
+      FROM bank_performance
+      WHERE active = true
+    ),
+    latest AS (
+      SELECT
+        cert_number, bank_name, city, state, date,
+        COALESCE(roa, 0) AS roa,
+        COALESCE(roe, 0) AS roe,
+        COALESCE(tier1_capital_ratio, 0) AS tier1_capital_ratio,
+        COALESCE(loans_yoy_growth, 0) AS loans_yoy_growth,
+        (COALESCE(roa, 0) * 0.6 + COALESCE(roe, 0) * 0.4) AS profitability_raw,
+        COALESCE(loans_yoy_growth, 0) AS growth_raw,
+        COALESCE(tier1_capital_ratio, 0) AS capital_raw
+      FROM bank_trend
+      WHERE recency_rank = 1
+    ),
+    ranges AS (
+      SELECT
+        MIN(profitability_raw) AS profitability_min, MAX(profitability_raw) AS profitability_max,
+        MIN(growth_raw) AS growth_min, MAX(growth_raw) AS growth_max,
+        MIN(capital_raw) AS capital_min, MAX(capital_raw) AS capital_max
+      FROM latest
+    ),
+    scored AS (
+      SELECT
+        l.cert_number, l.bank_name, l.city, l.state, l.date, l.roa, l.roe,
+        l.tier1_capital_ratio, l.loans_yoy_growth,
+        CASE
+          WHEN r.profitability_max = r.profitability_min THEN 50
+          ELSE ((l.profitability_raw - r.profitability_min) / NULLIF(r.profitability_max - r.profitability_min, 0)) * 100
+        END AS profitability_score,
+        CASE
+          WHEN r.growth_max = r.growth_min THEN 50
+          ELSE ((l.growth_raw - r.growth_min) / NULLIF(r.growth_max - r.growth_min, 0)) * 100
+        END AS growth_score,
+        CASE
+          WHEN r.capital_max = r.capital_min THEN 50
+          ELSE ((l.capital_raw - r.capital_min) / NULLIF(r.capital_max - r.capital_min, 0)) * 100
+        END AS capital_score
+      FROM latest l
+      CROSS JOIN ranges r
+    )
+    SELECT
+      *,
+      (profitability_score * $1 + growth_score * $2 + capital_score * $3) AS composite_score
+    FROM scored
+    ORDER BY composite_score DESC, cert_number ASC
+"""
+
+
+def schema_tables(schema_path: Union[str, Path] = SCHEMA_PATH) -> Dict[str, List[tuple]]:
+    """
+    Column names and DuckDB types for every CREATE TABLE in schema.sql
+
+    Constraints, defaults and foreign keys are dropped: the DuckDB copy is a
+    bulk-loaded snapshot, not a transactional store.
+    """
+    sql = re.sub(r'--[^\n]*', '', Path(schema_path).read_text())
+    tables = {}
+    for match in re.finditer(r'CREATE TABLE\s+(\w+)\s*\((.*?)\);', sql, re.IGNORECASE | re.DOTALL):
+        name, body = match.group(1), match.group(2)
+        columns = []
+        for item in _split_top_level(body):
+            if not item or re.match(r'\w+', item).group(0).upper() in _TABLE_CONSTRAINTS:
+                continue
+            column, col_type = item.split(None, 1)
+            col_type = _COLUMN_CLAUSES.sub('', col_type).strip()
+            for pattern, replacement in _TYPE_REWRITES:
+                col_type = pattern.sub(replacement, col_type)
+            columns.append((column, col_type))
+        tables[name] = columns
+    return tables
+
+
+def _split_top_level(body: str) -> List[str]:
+    """Split a CREATE TABLE body on commas outside parentheses."""
+    items, depth, current = [], 0, []
+    for char in body:
+        if char == ',' and depth == 0:
+            items.append(''.join(current).strip())
+            current = []
+            continue
+        depth += (char == '(') - (char == ')')
+        current.append(char)
+    items.append(''.join(current).strip())
+    return items
+
+
+def find_table_file(source_dir: Path, table: str) -> Optional[Path]:
+    """<table>.parquet / <table>.csv, else the newest timestamped export (<table>_YYYYMMDD_HHMMSS.*)."""
+    for suffix in ('.parquet', '.csv'):
+        exact = source_dir / f'{table}{suffix}'
+        if exact.exists():
+            return exact
+    exports = sorted(
+        path for path in source_dir.glob(f'{table}_*')
+        if path.suffix in ('.parquet', '.csv') and re.fullmatch(rf'{table}_\d{{8}}_\d{{6}}', path.stem)
+    )
+    return exports[-1] if exports else None
+
+
+def _reader(path: Path) -> str:
+    quoted = str(path).replace("'", "''")
+    if path.suffix == '.parquet':
+        return f"read_parquet('{quoted}')"
+    return f"read_csv('{quoted}', header = true, auto_detect = true)"
+
+
+def _select_expr(column: str, target_type: str, source_type: str) -> str:
+    # PostgreSQL arrays exported to CSV arrive as '{a,b,c}' text
+    if target_type.endswith('[]') and not source_type.endswith('[]'):
+        return f"string_split(trim({column}, '{{}}'), ',')::{target_type} AS {column}"
+    return column
+
+
+def connect(source_dir: Union[str, Path] = DEFAULT_SOURCE_DIR, database: str = ':memory:',
+            tables: List[str] = None, schema_path: Union[str, Path] = SCHEMA_PATH):
+    """
+    Open DuckDB with the schema.sql tables loaded from Parquet/CSV snapshots
+
+    Parameters:
+    -----------
+    source_dir : str or Path
+        Directory holding <table>.parquet, <table>.csv or timestamped exports
+    database : str
+        DuckDB database file (default in-memory)
+    tables : list
+        Tables to create (default: every table in schema.sql)
+    schema_path : str or Path
+        Schema file to mirror
+
+    Returns:
+    --------
+    duckdb.DuckDBPyConnection; tables with no snapshot file are created empty
+    """
+    import duckdb
+
+    source_dir = Path(source_dir)
+    con = duckdb.connect(database)
+    for table, columns in schema_tables(schema_path).items():
+        if tables is not None and table not in tables:
+            continue
+        con.execute(f"DROP TABLE IF EXISTS {table}")
+        con.execute(f"CREATE TABLE {table} ({', '.join(f'{col} {col_type}' for col, col_type in columns)})")
+
+        path = find_table_file(source_dir, table)
+        if path is None:
+            continue
+        source_types = {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {_reader(path)}").fetchall()}
+        shared = [(col, col_type) for col, col_type in columns if col in source_types]
+        con.execute(
+            f"INSERT INTO {table} ({', '.join(col for col, _ in shared)}) "
+            f"SELECT {', '.join(_select_expr(col, col_type, source_types[col]) for col, col_type in shared)} "
+            f"FROM {_reader(path)}"
+        )
+    return con
+
+
+def bank_composite_scores(con, profit_weight: float = 0.4, growth_weight: float = 0.35,
+                          capital_weight: float = 0.25) -> pd.DataFrame:
+    """Latest-quarter composite ranking of active banks (weights normalized like the API)."""
+    total = profit_weight + growth_weight + capital_weight
+    if total > 0:
+        weights = [profit_weight / total, growth_weight / total, capital_weight / total]
+    else:
+        weights = [0.4, 0.35, 0.25]
+    scores = con.execute(COMPOSITE_SCORES_QUERY, weights).df()
+    scores.insert(0, 'rank', range(1, len(scores) + 1))
+    return scores
+
+
+def correlation_matrix(con, cert: int = None, variables: List[str] = None) -> pd.DataFrame:
+    """Pairwise Pearson correlations over the bank/economic join, for one cert or all active banks."""
+    variables = variables or DEFAULT_CORRELATION_VARIABLES
+    pairs = [(a, b) for i, a in enumerate(variables) for b in variables[i + 1:]]
+    aggregates = ', '.join(f'corr({a}, {b})' for a, b in pairs)
+    where = 'b.cert_number = $1' if cert is not None else 'b.active = true'
+    row = con.execute(f"SELECT {aggregates} {BANK_ECONOMIC_JOIN} WHERE {where}",
+                      [cert] if cert is not None else []).fetchone()
+
+    matrix = pd.DataFrame(1.0, index=variables, columns=variables)
+    for (a, b), value in zip(pairs, row):
+        matrix.loc[a, b] = matrix.loc[b, a] = value
+    return matrix
+
+
+def bank_indicator_correlations(con, metrics: List[str] = None, indicators: List[str] = None,
+                                min_observations: int = 8) -> pd.DataFrame:
+    """Per-bank correlation of each bank metric with each economic indicator, one row per cert."""
+    metrics = metrics or ['roa', 'roe', 'nim']
+    indicators = indicators or ['unemployment_rate', 'fed_funds_rate', 'gdp_growth', 'delinq_cc', 'delinq_mortgage']
+    aggregates = ', '.join(f'corr(b.{m}, e.{i}) AS {m}_vs_{i}' for m in metrics for i in indicators)
+    return con.execute(
+        f"""
+        SELECT b.cert_number, ANY_VALUE(b.bank_name) AS bank_name, COUNT(*) AS n_obs, {aggregates}
+        {BANK_ECONOMIC_JOIN}
+        GROUP BY b.cert_number
+        HAVING COUNT(*) >= $1
+        ORDER BY b.cert_number
+        """,
+        [min_observations],
+    ).df()
@@ -6,6 +6,10 @@ import pandas as pd
 from typing import List, Dict, Optional
 import time
 
+from bank_panel import BankPanel
+from fetch_journal import FetchJournal
+from institution_directory import InstitutionDirectory
+
 class FDICBankAPI:
     """
     Helper class for FDIC BankFind API
@@ -14,14 +18,66 @@ class FDICBankAPI:
     
     BASE_URL = "https://banks.data.fdic.gov/api"
     
-    def __init__(self):
+    def __init__(self, directory: Optional[InstitutionDirectory] = None,
+                 panel: Optional[BankPanel] = None):
+        """
+        Parameters:
+        -----------
+        directory : InstitutionDirectory
+            Offline institution snapshot; when given, search_banks and
+            get_bank_by_cert are answered locally without network access
+        panel : BankPanel
+            Memory-mapped bank x quarter x metric panel; when given,
+            compare_banks reads from it instead of fetching each bank
+            (banks not in the panel are still fetched)
+        """
         self.session = requests.Session()
+        self.directory = directory
+        self.panel = panel
+    
+    def fetch_all_institutions(self, fields: List[str] = None, page_size: int = 10000) -> pd.DataFrame:
+        """
+        Download every institution record from /institutions, page by page
+        
+        Parameters:
+        -----------
+        fields : list
+            Fields to request (default: all)
+        page_size : int
+            Records per request (API maximum is 10000)
+            
+        Returns:
+        --------
+        pd.DataFrame with one row per institution
+        """
+        endpoint = f"{self.BASE_URL}/institutions"
+        records = []
+        offset = 0
+        
+        while True:
+            params = {'limit': page_size, 'offset': offset, 'sort_by': 'CERT', 'sort_order': 'ASC'}
+            if fields:
+                params['fields'] = ','.join(fields)
+            
+            response = self.session.get(endpoint, params=params)
+            response.raise_for_status()
+            
+            page = [record['data'] for record in response.json().get('data', [])]
+            records.extend(page)
+            if len(page) < page_size:
+                break
+            offset += page_size
+            time.sleep(0.1)  # Be nice to the API
+        
+        return pd.DataFrame(records)
     
     def search_banks(self, name: str = None, city: str = None, state: str = None, 
                      limit: int = 100) -> pd.DataFrame:
         """
         Search for banks by name, city, or state
         
+        Uses the offline directory (fuzzy name match) when one is attached.
+        
         Parameters:
         -----------
         name : str
@@ -37,6 +93,9 @@ class FDICBankAPI:
         --------
         pd.DataFrame with bank information
         """
+        if self.directory is not None:
+            return self.directory.search(name=name, city=city, state=state, limit=limit)
+        
         endpoint = f"{self.BASE_URL}/institutions"
         
         params = {
@@ -84,6 +143,11 @@ class FDICBankAPI:
         --------
         dict with bank details
         """
+        if self.directory is not None:
+            record = self.directory.get_by_cert(cert_number)
+            if record:
+                return record
+        
         endpoint = f"{self.BASE_URL}/institutions"
         params = {'filters': f'CERT:{cert_number}'}
         
@@ -96,7 +160,8 @@ class FDICBankAPI:
         return {}
     
     def get_financials(self, cert_number: int, start_date: str = '2000-01-01', 
-                       end_date: str = '2025-12-31') -> pd.DataFrame:
+                       end_date: str = '2025-12-31', page_size: int = 10000,
+                       journal: Optional[FetchJournal] = None) -> pd.DataFrame:
         """
         Get quarterly financial data for a specific bank
         
@@ -108,28 +173,50 @@ class FDICBankAPI:
             Start date in 'YYYY-MM-DD' format
         end_date : str
             End date in 'YYYY-MM-DD' format
+        page_size : int
+            Records per request (API maximum is 10000)
+        journal : FetchJournal
+            When given, each page is checkpointed as it arrives and pages
+            saved by an interrupted run are reused instead of re-fetched
             
         Returns:
         --------
         pd.DataFrame with quarterly financial metrics
         """
         endpoint = f"{self.BASE_URL}/financials"
+        unit = f'cert:{cert_number}'
+        records = []
+        offset = 0
         
-        params = {
-            'filters': f'CERT:{cert_number}',
-            'limit': 10000,
-            'sort_by': 'REPDTE',
-            'sort_order': 'DESC'
-        }
-        
-        response = self.session.get(endpoint, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
+        while True:
+            # The first page is always fetched fresh and checked against the saved
+            # one, so a resumed unit never mixes pages from before and after an update
+            page = journal.page(unit, offset) if journal and offset > 0 else None
+            if page is None:
+                # Oldest first: a newly published quarter only changes the last page
+                params = {
+                    'filters': f'CERT:{cert_number}',
+                    'limit': page_size,
+                    'offset': offset,
+                    'sort_by': 'REPDTE',
+                    'sort_order': 'ASC'
+                }
+                response = self.session.get(endpoint, params=params)
+                response.raise_for_status()
+                
+                # Extract the nested 'data' field from each record
+                page = [record['data'] for record in response.json().get('data', [])]
+                if journal:
+                    if offset == 0 and not journal.revalidate(unit, page):
+                        print(f"  ℹ CERT {cert_number} changed since the interrupted fetch; starting it over")
+                    journal.record_page(unit, offset, page)
+            
+            records.extend(page)
+            if len(page) < page_size:
+                break
+            offset += page_size
         
-        if 'data' in data and len(data['data']) > 0:
-            # Extract the nested 'data' field from each record
-            records = [record['data'] for record in data['data']]
+        if records:
             df = pd.DataFrame(records)
             
             if 'REPDTE' in df.columns:
@@ -144,7 +231,8 @@ class FDICBankAPI:
         return pd.DataFrame()
     
     def get_bank_performance_metrics(self, cert_number: int, 
-                                     start_date: str = '2000-01-01') -> pd.DataFrame:
+                                     start_date: str = '2000-01-01',
+                                     journal: Optional[FetchJournal] = None) -> pd.DataFrame:
         """
         Get key performance metrics for a bank
         
@@ -162,12 +250,14 @@ class FDICBankAPI:
             FDIC Certificate Number
         start_date : str
             Start date
+        journal : FetchJournal
+            Page checkpoint store passed through to get_financials
             
         Returns:
         --------
         pd.DataFrame with key metrics over time
         """
-        df = self.get_financials(cert_number, start_date)
+        df = self.get_financials(cert_number, start_date, journal=journal)
         
         if df.empty:
             return pd.DataFrame()
@@ -227,6 +317,18 @@ class FDICBankAPI:
         --------
         pd.DataFrame with dates as index and banks as columns
         """
+        panel_result = None
+        if self.panel is not None:
+            try:
+                panel_result = self.panel.compare(cert_numbers, metric, start_date)
+            except KeyError:
+                pass  # metric not stored in the panel; fetch every bank from the API
+            else:
+                if not panel_result.attrs['missing_certs']:
+                    return panel_result
+                # Banks the panel doesn't have yet still come from the API
+                cert_numbers = panel_result.attrs['missing_certs']
+
         comparison_data = {}
         
         for cert in cert_numbers:
@@ -236,14 +338,23 @@ class FDICBankAPI:
             df = self.get_financials(cert, start_date)
             
             if not df.empty and metric in df.columns:
-                df = df.set_index('REPDTE')
-                comparison_data[bank_name] = df[metric]
+                if panel_result is None:
+                    comparison_data[bank_name] = df.set_index('REPDTE')[metric]
+                else:
+                    # Label and date these columns like the panel's: the seeded bank_name
+                    # and quarter-end timestamps
+                    from db.seed_database import canonical_bank_name
+
+                    quarter_end = df['REPDTE'].dt.to_period('Q').dt.to_timestamp(how='end').dt.normalize()
+                    comparison_data[canonical_bank_name(cert, bank_name)] = pd.Series(
+                        df[metric].to_numpy(), index=pd.DatetimeIndex(quarter_end, name='REPDTE'))
             
             time.sleep(0.1)  # Be nice to the API
         
-        if comparison_data:
-            return pd.DataFrame(comparison_data)
-        return pd.DataFrame()
+        api_result = pd.DataFrame(comparison_data)
+        if panel_result is not None:
+            return pd.concat([panel_result, api_result], axis=1).sort_index()
+        return api_result
 
 
 # === MAJOR BANK CERT NUMBERS (for quick reference) ===
@@ -0,0 +1,146 @@
+# Durable journal for long-running downloads
+# Each fetch job (FDIC financials, FRED series) is split into units - one cert,
+# one series - and every page a unit downloads is committed to SQLite as soon as
+# it arrives. A unit's final rows are stored when it completes, so a restarted
+# job skips finished units and resumes a partial unit at its next page. The
+# journal for a job is cleared once the job's output file has been written, and
+# anything older than max_age is dropped, so a failed run is never resumed
+# after the source has published new data.
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from pipeline_config import DATA_DIR
+
+DEFAULT_JOURNAL_PATH = DATA_DIR / 'cache' / 'fetch_journal.sqlite'
+DEFAULT_MAX_AGE_HOURS = 24
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS units (
+    job TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    status TEXT NOT NULL,
+    rows INTEGER,
+    payload TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job, unit)
+);
+CREATE TABLE IF NOT EXISTS pages (
+    job TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    page_offset INTEGER NOT NULL,
+    records TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (job, unit, page_offset)
+);
+"""
+
+
+class FetchJournal:
+    """
+    Page- and unit-level checkpoint store for one fetch job
+
+    Parameters:
+    -----------
+    job : str
+        Job identity, including anything that changes the result
+        (e.g. 'fdic-financials:2000-01-01'); units of other jobs are ignored
+    path : Path
+        SQLite file shared by every job
+    max_age_hours : float
+        Units and pages older than this are discarded instead of resumed
+    """
+
+    def __init__(self, job: str, path: Path = DEFAULT_JOURNAL_PATH,
+                 max_age_hours: float = DEFAULT_MAX_AGE_HOURS):
+        self.job = job
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit: every page and unit is durable the moment it is recorded
+        self.conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(pages)')}
+        if columns and 'fetched_at' not in columns:
+            # Journal from before page timestamps: its pages cannot be aged, so drop them
+            self.conn.execute('DROP TABLE pages')
+        self.conn.executescript(_SCHEMA)
+        self.expire(max_age_hours)
+
+    def expire(self, max_age_hours: float) -> None:
+        """Drop units and pages of every job older than max_age_hours."""
+        cutoff = time.time() - max_age_hours * 3600
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute('DELETE FROM pages WHERE fetched_at < ?', (cutoff,))
+            self.conn.execute('DELETE FROM units WHERE updated_at < ?', (cutoff,))
+
+    def page(self, unit: str, offset: int) -> Optional[List[dict]]:
+        """Records of a page fetched by an earlier run, or None."""
+        row = self.conn.execute(
+            'SELECT records FROM pages WHERE job = ? AND unit = ? AND page_offset = ?',
+            (self.job, unit, offset),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def record_page(self, unit: str, offset: int, records: List[dict]) -> None:
+        self.conn.execute(
+            'INSERT OR REPLACE INTO pages (job, unit, page_offset, records, fetched_at) VALUES (?, ?, ?, ?, ?)',
+            (self.job, unit, offset, json.dumps(records, default=str), time.time()),
+        )
+        self.conn.execute(
+            'INSERT OR IGNORE INTO units (job, unit, status, updated_at) VALUES (?, ?, ?, ?)',
+            (self.job, unit, 'partial', time.time()),
+        )
+
+    def revalidate(self, unit: str, first_page: List[dict]) -> bool:
+        """
+        Check a freshly fetched first page against the saved one before resuming
+
+        If the source changed since the interrupted run (a restatement, a new
+        quarter), saved offsets no longer line up, so the unit's pages are
+        dropped and the unit starts over. Returns True if saved pages are kept.
+        """
+        saved = self.page(unit, 0)
+        if saved is None or saved == json.loads(json.dumps(first_page, default=str)):
+            return True
+        self.conn.execute('DELETE FROM pages WHERE job = ? AND unit = ?', (self.job, unit))
+        return False
+
+    def completed(self, unit: str) -> Optional[List[dict]]:
+        """Final rows of a finished unit, or None if it still has to run."""
+        row = self.conn.execute(
+            "SELECT payload FROM units WHERE job = ? AND unit = ? AND status = 'complete'",
+            (self.job, unit),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def complete(self, unit: str, rows: List[dict]) -> None:
+        """Store a unit's final rows and drop its page checkpoints in one transaction."""
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute(
+                'INSERT OR REPLACE INTO units (job, unit, status, rows, payload, updated_at) '
+                "VALUES (?, ?, 'complete', ?, ?, ?)",
+                (self.job, unit, len(rows), json.dumps(rows, default=str), time.time()),
+            )
+            self.conn.execute('DELETE FROM pages WHERE job = ? AND unit = ?', (self.job, unit))
+
+    def summary(self) -> dict:
+        """Unit counts by status for this job."""
+        return dict(self.conn.execute(
+            'SELECT status, COUNT(*) FROM units WHERE job = ? GROUP BY status', (self.job,)
+        ).fetchall())
+
+    def clear(self) -> None:
+        """Forget this job once its output has been written."""
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.execute('DELETE FROM pages WHERE job = ?', (self.job,))
+            self.conn.execute('DELETE FROM units WHERE job = ?', (self.job,))
+
+    def close(self) -> None:
+        self.conn.close()
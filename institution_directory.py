@@ -0,0 +1,318 @@
+# Offline FDIC institution directory
+# Bulk snapshot of /institutions with precomputed names and a trigram index,
+# so name search and cert -> name lookups need no network access.
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_DIRECTORY_PATH = PROJECT_ROOT / 'data' / 'institutions.npz'
+
+SNAPSHOT_FIELDS = ['CERT', 'NAME', 'CITY', 'STALP', 'STNAME', 'ASSET', 'OFFICES', 'ACTIVE', 'DATEUPDT']
+SEARCH_COLUMNS = ['CERT', 'NAME', 'CITY', 'STNAME', 'ASSET', 'OFFICES', 'DATEUPDT']
+
+NGRAM_SIZE = 3
+# Minimum share of the query's trigrams a name must contain
+DEFAULT_MIN_SCORE = 0.5
+
+# Typo and spacing queries that must find these certs in a real snapshot
+SEARCH_REGRESSIONS = {
+    'jp morgan': 628,
+    'huntingon': 6560,
+}
+
+# Display cleanup for bank names (trailing ' - ,' artifacts, "National Association", ...)
+_DISPLAY_RULES = [
+    (re.compile(r'\s*-\s*,\s*$'), ''),
+    (re.compile(r'\s*,\s*$'), ''),
+    (re.compile(r',\s*National Association\s*$', re.IGNORECASE), ''),
+    (re.compile(r'\s+National Association\s*$', re.IGNORECASE), ''),
+    (re.compile(r'\s+Bank USA\s*$', re.IGNORECASE), ' Bank'),
+    (re.compile(r'\s+'), ' '),
+]
+_DISPLAY_OVERRIDES = {
+    'the huntington national bank': 'Huntington National Bank',
+    'huntington': 'Huntington National Bank',
+    'huntington national bank': 'Huntington National Bank',
+}
+
+# Search normalization: lowercase words only, legal-form noise removed
+_SEARCH_NOISE = re.compile(r'\b(?:the|national association|n\s?a|inc|co|corp|corporation)\b')
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+@lru_cache(maxsize=65536)
+def clean_bank_name(name):
+    """Normalize bank names and remove trailing punctuation artifacts like ' - ,'"""
+    if not name:
+        return None
+
+    cleaned = str(name).strip()
+    for pattern, replacement in _DISPLAY_RULES:
+        cleaned = pattern.sub(replacement, cleaned)
+
+    cleaned = cleaned.strip()
+    return _DISPLAY_OVERRIDES.get(cleaned.lower(), cleaned)
+
+
+def normalize_search_name(name: str) -> str:
+    """Lowercase alphanumeric form used for n-gram matching."""
+    text = str(name or '').lower().replace('&', ' and ')
+    text = _NON_WORD.sub(' ', text)
+    text = _SEARCH_NOISE.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def name_ngrams(normalized: str) -> set:
+    padded = f' {normalized} '
+    return {padded[i:i + NGRAM_SIZE] for i in range(max(len(padded) - NGRAM_SIZE + 1, 1))}
+
+
+class InstitutionDirectory:
+    """
+    Local, indexed copy of FDIC /institutions.
+
+    Rows are sorted by CERT so cert lookups are a binary search; name search
+    scores candidates by trigram overlap using a CSR posting index.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        if 'compact' not in arrays:
+            # Snapshots saved before the compact column was added
+            arrays['compact'] = np.char.replace(arrays['normalized'], ' ', '')
+        self.arrays = arrays
+        self.certs = arrays['CERT']
+        self.grams = arrays['grams']
+        self.gram_offsets = arrays['gram_offsets']
+        self.postings = arrays['postings']
+        self.gram_counts = arrays['gram_counts']
+        self._city_key = np.char.lower(arrays['CITY'])
+        self._state_keys = (np.char.lower(arrays['STALP']), np.char.lower(arrays['STNAME']))
+
+    def __len__(self) -> int:
+        return len(self.certs)
+
+    # --- Building and persistence -------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: pd.DataFrame) -> 'InstitutionDirectory':
+        """Build the directory (names, index) from raw /institutions rows."""
+        df = records.reindex(columns=SNAPSHOT_FIELDS).copy()
+        df['CERT'] = pd.to_numeric(df['CERT'], errors='coerce')
+        df = df.dropna(subset=['CERT']).drop_duplicates('CERT').sort_values('CERT').reset_index(drop=True)
+
+        names = df['NAME'].fillna('').astype(str)
+        normalized = [normalize_search_name(name) for name in names]
+
+        # CSR trigram index: sorted gram vocabulary -> slice of row ids in postings
+        gram_rows: Dict[str, list] = {}
+        gram_counts = np.zeros(len(df), dtype=np.int16)
+        for row, norm in enumerate(normalized):
+            grams = name_ngrams(norm)
+            gram_counts[row] = len(grams)
+            for gram in grams:
+                gram_rows.setdefault(gram, []).append(row)
+        vocabulary = sorted(gram_rows)
+        lengths = np.array([len(gram_rows[gram]) for gram in vocabulary], dtype=np.int64)
+
+        arrays = {
+            'CERT': df['CERT'].astype(np.int64).to_numpy(),
+            'NAME': names.to_numpy(dtype=str),
+            'display': np.array([clean_bank_name(name) or '' for name in names], dtype=str),
+            'normalized': np.array(normalized, dtype=str),
+            'compact': np.array([norm.replace(' ', '') for norm in normalized], dtype=str),
+            'CITY': df['CITY'].fillna('').astype(str).to_numpy(dtype=str),
+            'STALP': df['STALP'].fillna('').astype(str).to_numpy(dtype=str),
+            'STNAME': df['STNAME'].fillna('').astype(str).to_numpy(dtype=str),
+            'ASSET': pd.to_numeric(df['ASSET'], errors='coerce').to_numpy(dtype=float),
+            'OFFICES': pd.to_numeric(df['OFFICES'], errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+            'ACTIVE': pd.to_numeric(df['ACTIVE'], errors='coerce').fillna(0).astype(bool).to_numpy(),
+            'DATEUPDT': df['DATEUPDT'].fillna('').astype(str).to_numpy(dtype=str),
+            'grams': np.array(vocabulary, dtype=f'<U{NGRAM_SIZE}'),
+            'gram_offsets': np.concatenate([[0], np.cumsum(lengths)]),
+            'postings': np.fromiter(
+                (row for gram in vocabulary for row in gram_rows[gram]), dtype=np.int32, count=int(lengths.sum())
+            ),
+            'gram_counts': gram_counts,
+        }
+        return cls(arrays)
+
+    def save(self, path: Union[str, Path] = DEFAULT_DIRECTORY_PATH) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, **self.arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = DEFAULT_DIRECTORY_PATH) -> 'InstitutionDirectory':
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    # --- Lookups --------------------------------------------------------------------
+
+    def _row_for_cert(self, cert_number: int) -> Optional[int]:
+        pos = int(np.searchsorted(self.certs, cert_number))
+        if pos < len(self.certs) and self.certs[pos] == cert_number:
+            return pos
+        return None
+
+    def get_by_cert(self, cert_number: int) -> Dict:
+        """Institution fields for a CERT (same keys as the API's nested 'data' record)."""
+        row = self._row_for_cert(int(cert_number))
+        if row is None:
+            return {}
+        record = {field: self.arrays[field][row].item() for field in SNAPSHOT_FIELDS}
+        record['ACTIVE'] = int(record['ACTIVE'])
+        return record
+
+    def name_for_cert(self, cert_number: int, cleaned: bool = True) -> Optional[str]:
+        row = self._row_for_cert(int(cert_number))
+        if row is None:
+            return None
+        return str(self.arrays['display' if cleaned else 'NAME'][row])
+
+    def search(self, name: str = None, city: str = None, state: str = None, limit: int = 100,
+               min_score: float = DEFAULT_MIN_SCORE) -> pd.DataFrame:
+        """
+        Fuzzy name search with optional exact city/state filters
+
+        Parameters:
+        -----------
+        name : str
+            Bank name (partial or misspelled)
+        city : str
+            City name (case-insensitive)
+        state : str
+            Two-letter code or full state name
+        limit : int
+            Maximum results to return
+        min_score : float
+            Minimum share of the query's trigrams found in the name, so
+            partial names and typos still match
+
+        Returns:
+        --------
+        pd.DataFrame with the search_banks columns plus 'score', best match first
+        """
+        query = normalize_search_name(name) if name else ''
+        if query:
+            rows, score = self._name_candidates(query, min_score)
+        else:
+            rows, score = np.arange(len(self)), np.zeros(len(self))
+
+        keep = np.ones(len(rows), dtype=bool)
+        if city:
+            keep &= self._city_key[rows] == city.strip().lower()
+        if state:
+            state_key = state.strip().lower()
+            keep &= (self._state_keys[0][rows] == state_key) | (self._state_keys[1][rows] == state_key)
+        rows, score = rows[keep], score[keep]
+
+        assets = np.nan_to_num(self.arrays['ASSET'][rows], nan=-1.0)
+        order = np.lexsort((-self.arrays['OFFICES'][rows], -assets, -score))[:limit]
+        rows, score = rows[order], score[order]
+
+        result = pd.DataFrame({col: self.arrays[col][rows] for col in SEARCH_COLUMNS})
+        result['score'] = np.round(np.minimum(score, 1.0), 4)
+        return result
+
+    def _name_candidates(self, query: str, min_score: float):
+        """Rows sharing trigrams with the query and their coverage scores."""
+        query_grams = np.array(sorted(name_ngrams(query)), dtype=f'<U{NGRAM_SIZE}')
+        idx = np.searchsorted(self.grams, query_grams)
+        known = idx < len(self.grams)
+        known[known] = self.grams[idx[known]] == query_grams[known]
+        idx = idx[known]
+        if len(idx) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        hits = np.concatenate([self.postings[self.gram_offsets[i]:self.gram_offsets[i + 1]] for i in idx])
+        rows, shared = np.unique(hits, return_counts=True)
+        # Query coverage rather than Jaccard, so a short query ('jp morgan') is not
+        # penalized for the rest of a long legal name. Ties (a typo one edit from
+        # two names) fall to asset size in search().
+        score = shared / len(query_grams)
+
+        # Names containing the whole query, ignoring spaces ('jp morgan' in
+        # 'jpmorgan chase bank'), always qualify and rank first, largest bank
+        # first. A substring shares every query trigram except at most the
+        # padded edge grams and the grams spanning removed spaces.
+        compact = query.replace(' ', '')
+        edge_grams = 2 * (query.count(' ') + 1)
+        possible = np.flatnonzero((shared >= len(query_grams) - edge_grams) | (score >= min_score))
+        contains = np.char.find(self.arrays['compact'][rows[possible]], compact) >= 0
+        score[possible[contains]] = 1.0
+
+        keep = score >= min_score
+        return rows[keep], score[keep]
+
+
+def check_search(directory: InstitutionDirectory) -> list:
+    """SEARCH_REGRESSIONS queries whose best match is not the expected cert."""
+    failures = []
+    for query, cert in SEARCH_REGRESSIONS.items():
+        matches = directory.search(name=query, limit=1)
+        found = int(matches['CERT'].iloc[0]) if len(matches) else None
+        if found != cert:
+            failures.append(f"'{query}' -> {found} (expected {cert})")
+    return failures
+
+
+_default_directory = None
+
+
+def default_directory() -> Optional[InstitutionDirectory]:
+    """Process-wide directory loaded from DEFAULT_DIRECTORY_PATH, or None if no snapshot exists."""
+    global _default_directory
+    if _default_directory is None and DEFAULT_DIRECTORY_PATH.exists():
+        _default_directory = InstitutionDirectory.load(DEFAULT_DIRECTORY_PATH)
+    return _default_directory
+
+
+def main() -> None:
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Snapshot or query the offline FDIC institution directory.')
+    parser.add_argument('--refresh', action='store_true', help='Download a fresh snapshot from /institutions')
+    parser.add_argument('--path', type=Path, default=DEFAULT_DIRECTORY_PATH)
+    parser.add_argument('--check', action='store_true', help='Run the search regression queries')
+    parser.add_argument('query', nargs='?', help='Name to search for')
+    args = parser.parse_args()
+
+    if args.refresh:
+        from fdic_bank_api import FDICBankAPI
+
+        records = FDICBankAPI().fetch_all_institutions(fields=SNAPSHOT_FIELDS)
+        directory = InstitutionDirectory.from_records(records)
+    else:
+        directory = InstitutionDirectory.load(args.path)
+
+    if args.refresh or args.check:
+        # A refreshed snapshot is only saved once it passes, so a bad one never
+        # replaces the working copy
+        failures = check_search(directory)
+        for failure in failures:
+            print(f'✗ Search regression: {failure}')
+        if failures:
+            raise SystemExit(1)
+        print(f'✓ Search regressions passed ({len(SEARCH_REGRESSIONS)} queries)')
+
+    if args.refresh:
+        print(f'Wrote {directory.save(args.path)} ({len(directory)} institutions)')
+
+    if args.query:
+        start = time.perf_counter()
+        matches = directory.search(name=args.query, limit=10)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(matches.to_string(index=False))
+        print(f'({elapsed_ms:.2f} ms)')
+
+
+if __name__ == '__main__':
+    main()
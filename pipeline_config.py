@@ -0,0 +1,49 @@
+# Shared configuration for the Python pipeline
+# One place to load .env and build PostgreSQL settings. Only the standard
+# library is imported here; dotenv and psycopg2 load on first use so cheap CLI
+# commands stay fast.
+
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DATA_DIR = PROJECT_ROOT / 'data'
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Load PROJECT_ROOT/.env once per process (existing environment variables win)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    env_path = PROJECT_ROOT / '.env'
+    if env_path.exists():
+        from dotenv import load_dotenv
+
+        load_dotenv(env_path)
+    _env_loaded = True
+
+
+def db_config() -> dict:
+    """psycopg2.connect keyword arguments from DB_* environment variables."""
+    load_env()
+    return {
+        'dbname': os.getenv('DB_NAME', 'bank_lending_db'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'port': int(os.getenv('DB_PORT', '5432')),
+    }
+
+
+def connect(**overrides):
+    """Open a PostgreSQL connection with the shared settings."""
+    import psycopg2
+
+    return psycopg2.connect(**{**db_config(), **overrides})
+
+
+def env(name: str, default: str = None) -> str:
+    load_env()
+    return os.getenv(name, default)
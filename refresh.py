@@ -0,0 +1,318 @@
+"""
+Run the data refresh as a dependency graph.
+
+    fetch-fred ─────────────┐           ┌─> export
+                            ├─> seed ──┤
+    fetch-banks ─> validate ┘           └─> alerts
+
+Independent stages run concurrently, each as its own `cli.py` process. A stage is
+skipped when its fingerprint (hashes of its input files plus the fingerprints of
+the stages it depends on) matches the last successful run recorded in
+data/cache/refresh_state.json. That file is written after every stage, so a
+failed refresh resumes from the first stage that didn't finish. Fetch stages
+have no local inputs; they re-run once their output is older than --max-age.
+
+The whole refresh runs under a lock taken before the first stage and held until
+the state file is last written: a file lock in data/cache/ for refreshes on this
+machine, plus a session advisory lock when PostgreSQL is reachable, so two
+refreshes never fetch, seed or record state at the same time.
+
+Usage:
+    python3 cli.py refresh [--force] [--max-age 24] [--dry-run]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from pipeline_config import DATA_DIR, PROJECT_ROOT
+
+STATE_PATH = DATA_DIR / 'cache' / 'refresh_state.json'
+LOCK_PATH = DATA_DIR / 'cache' / 'refresh.lock'
+REFRESH_LOCK_KEY = 0x62616E6B  # pg advisory lock key shared by every refresh
+
+_print_lock = threading.Lock()
+
+
+@dataclass
+class Stage:
+    name: str
+    command: str                                   # cli.py command
+    args: List[str] = field(default_factory=list)
+    deps: List[str] = field(default_factory=list)
+    inputs: List[str] = field(default_factory=list)   # files (relative to project root)
+    outputs: List[str] = field(default_factory=list)
+    max_age_hours: Optional[float] = None          # fetch stages: re-run when output is older
+
+
+STAGES = [
+    Stage('fetch-fred', 'fetch-fred', outputs=['data/fred_data.csv'], max_age_hours=24),
+    Stage('fetch-banks', 'fetch-banks', outputs=['data/bank_data.csv'], max_age_hours=24),
+    Stage('validate', 'validate', deps=['fetch-banks'], inputs=['data/bank_data.csv']),
+    Stage('seed', 'seed', deps=['fetch-fred', 'validate'],
+          inputs=['data/fred_data.csv', 'data/bank_data.csv']),
+    Stage('export', 'export', deps=['seed']),
+    Stage('alerts', 'alerts', deps=['seed']),
+]
+
+
+def file_digest(relative: str) -> str:
+    path = PROJECT_ROOT / relative
+    if not path.exists():
+        return 'missing'
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_fingerprint(stage: Stage, upstream: Dict[str, str]) -> str:
+    """Hash of what the stage consumes: its command, input files and upstream fingerprints."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([stage.command, stage.args]).encode())
+    for relative in stage.inputs:
+        digest.update(f'{relative}={file_digest(relative)}'.encode())
+    for dep in stage.deps:
+        digest.update(f'{dep}={upstream[dep]}'.encode())
+    return digest.hexdigest()
+
+
+def output_fingerprint(stage: Stage) -> str:
+    """Fetch stages are identified downstream by what they wrote."""
+    digest = hashlib.sha256()
+    for relative in stage.outputs:
+        digest.update(f'{relative}={file_digest(relative)}'.encode())
+    return digest.hexdigest()
+
+
+def load_state() -> dict:
+    if STATE_PATH.exists():
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state: dict) -> None:
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_PATH.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    tmp_path.replace(STATE_PATH)
+
+
+def is_fresh(stage: Stage, max_age_hours: float) -> bool:
+    """Fetch outputs exist and are younger than the allowed age."""
+    now = time.time()
+    for relative in stage.outputs:
+        path = PROJECT_ROOT / relative
+        if not path.exists() or now - path.stat().st_mtime > max_age_hours * 3600:
+            return False
+    return True
+
+
+def log(stage: str, message: str) -> None:
+    with _print_lock:
+        print(f'[{stage}] {message}', flush=True)
+
+
+def run_stage(stage: Stage) -> bool:
+    """Run one stage in its own cli.py process, streaming its output with a prefix."""
+    proc = subprocess.Popen(
+        [sys.executable, str(PROJECT_ROOT / 'cli.py'), stage.command, *stage.args],
+        cwd=PROJECT_ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+        env={**os.environ, 'PYTHONUNBUFFERED': '1'},
+    )
+    for line in proc.stdout:
+        log(stage.name, line.rstrip())
+    return proc.wait() == 0
+
+
+class RefreshLock:
+    """
+    Exclusive lock for a whole refresh, taken before the first stage.
+
+    A file lock on LOCK_PATH serializes refreshes sharing this data/ directory
+    and state file; a session pg advisory lock, when the database is reachable,
+    also serializes refreshes on other machines seeding the same database.
+    """
+
+    def __init__(self, key: int, path=LOCK_PATH):
+        self.key = key
+        self.path = path
+        self.file = None
+        self.conn = None
+
+    def acquire(self) -> None:
+        import fcntl
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.path, 'a')
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.release()
+            raise RuntimeError(f'Another refresh is running on this machine ({self.path}); try again when it finishes')
+
+        try:
+            from pipeline_config import connect
+
+            conn = connect(connect_timeout=5)  # an unreachable host shouldn't stall the refresh
+        except Exception as exc:
+            print(f'ℹ Database not reachable ({exc.__class__.__name__}); refresh locked on this machine only')
+            return
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute('SELECT pg_try_advisory_lock(%s)', (self.key,))
+        acquired = cur.fetchone()[0]
+        cur.close()
+        if not acquired:
+            conn.close()
+            self.release()
+            raise RuntimeError('Another refresh holds the database lock; try again when it finishes')
+        self.conn = conn
+
+    def release(self) -> None:
+        try:
+            if self.conn is not None:
+                cur = self.conn.cursor()
+                cur.execute('SELECT pg_advisory_unlock(%s)', (self.key,))
+                cur.close()
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            if self.file is not None:
+                self.file.close()   # closing the descriptor drops the flock
+                self.file = None
+
+
+def refresh(stages: List[Stage], force: bool = False, max_age_hours: float = None,
+            dry_run: bool = False, workers: int = 4) -> bool:
+    """Run the graph; returns True when every stage succeeded or was skipped."""
+    by_name = {stage.name: stage for stage in stages}
+    fingerprints: Dict[str, str] = {}
+    status: Dict[str, str] = {}
+    started_at: Dict[str, float] = {}
+
+    # Held from before the first stage until the state file's last write, so a
+    # second refresh never fetches, validates or records state alongside this one
+    lock = RefreshLock(REFRESH_LOCK_KEY)
+    if not dry_run:
+        try:
+            lock.acquire()
+        except RuntimeError as exc:
+            print(f'✗ {exc}')
+            return False
+    state = load_state()
+
+    def decide(stage: Stage) -> Optional[str]:
+        """Skip reason, or None if the stage must run."""
+        if force:
+            return None
+        if stage.max_age_hours is not None:
+            age = stage.max_age_hours if max_age_hours is None else max_age_hours
+            return f'output younger than {age:g}h' if is_fresh(stage, age) else None
+        recorded = state.get(stage.name, {}).get('fingerprint')
+        outputs_exist = all((PROJECT_ROOT / relative).exists() for relative in stage.outputs)
+        if recorded == fingerprints[stage.name] and outputs_exist:
+            return 'inputs unchanged'
+        return None
+
+    def finish(stage: Stage, ok: bool, started: float) -> None:
+        if not ok:
+            status[stage.name] = 'failed'
+            log(stage.name, f'✗ failed after {time.perf_counter() - started:.1f}s')
+            return
+        if stage.max_age_hours is not None:
+            fingerprints[stage.name] = output_fingerprint(stage)
+        status[stage.name] = 'done'
+        state[stage.name] = {
+            'fingerprint': fingerprints[stage.name],
+            'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seconds': round(time.perf_counter() - started, 1),
+        }
+        save_state(state)
+        log(stage.name, f'✓ done in {time.perf_counter() - started:.1f}s')
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while len(status) < len(stages):
+                progressed = False
+                for stage in stages:
+                    if stage.name in status or stage.name in running.values():
+                        continue
+                    dep_status = [status.get(dep) for dep in stage.deps]
+                    if any(s in ('failed', 'blocked') for s in dep_status):
+                        progressed = True
+                        status[stage.name] = 'blocked'
+                        log(stage.name, '⚠ not run: an upstream stage failed')
+                        continue
+                    if not all(s in ('done', 'skipped', 'planned') for s in dep_status):
+                        continue
+                    progressed = True
+
+                    if stage.max_age_hours is None:
+                        fingerprints[stage.name] = stage_fingerprint(stage, fingerprints)
+                    reason = decide(stage)
+                    if reason:
+                        if stage.max_age_hours is not None:
+                            fingerprints[stage.name] = output_fingerprint(stage)
+                        status[stage.name] = 'skipped'
+                        log(stage.name, f'ℹ skipped ({reason})')
+                        continue
+                    if dry_run:
+                        # Downstream of a planned run can't be fingerprinted yet.
+                        fingerprints.setdefault(stage.name, 'planned')
+                        status[stage.name] = 'planned'
+                        log(stage.name, 'would run')
+                        continue
+
+                    log(stage.name, 'starting')
+                    started_at[stage.name] = time.perf_counter()
+                    running[pool.submit(run_stage, stage)] = stage.name
+
+                if not running:
+                    if not progressed:
+                        raise RuntimeError(f'Unresolvable stage dependencies: {sorted(set(by_name) - set(status))}')
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    finish(by_name[name], future.result(), started_at.pop(name))
+    finally:
+        lock.release()
+
+    summary = ', '.join(f'{name}={status[name]}' for name in by_name)
+    ok = all(value in ('done', 'skipped', 'planned') for value in status.values())
+    print(f"{'✓' if ok else '✗'} Refresh finished: {summary}")
+    return ok
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run the data refresh stages as a dependency graph.')
+    parser.add_argument('--force', action='store_true', help='Run every stage regardless of fingerprints')
+    parser.add_argument('--max-age', type=float, help='Hours before fetched data is re-downloaded (default 24)')
+    parser.add_argument('--dry-run', action='store_true', help='Show which stages would run')
+    parser.add_argument('--workers', type=int, default=4, help='Stages allowed to run at once')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    ok = refresh(STAGES, force=args.force, max_age_hours=args.max_age, dry_run=args.dry_run, workers=args.workers)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
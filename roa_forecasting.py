@@ -0,0 +1,388 @@
+# Next-quarter ROA forecasting pipeline
+# Productionized version of the modeling cells in Intro_DS_Capstone.ipynb
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import RandomizedSearchCV, TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+CACHE_DIR = PROJECT_ROOT / 'data' / 'cache'
+MODEL_DIR = PROJECT_ROOT / 'data' / 'models'
+
+# Bump when engineer_features changes so cached feature frames are not reused.
+FEATURE_VERSION = 1
+
+RAW_QUERY = """
+SELECT
+    b.cert_number,
+    b.bank_name,
+    b.date::date AS bank_date,
+    b.total_assets,
+    b.total_deposits,
+    b.total_loans,
+    b.net_income,
+    b.roa,
+    b.roe,
+    b.nim,
+    b.efficiency_ratio,
+    b.tier1_capital_ratio,
+    b.active,
+    e.date::date AS econ_date,
+    e.unemployment_rate,
+    e.fed_funds_rate,
+    e.gdp_growth,
+    e.yield_curve,
+    e.delinq_cc,
+    e.delinq_mortgage
+FROM bank_performance b
+LEFT JOIN economic_data e
+  ON DATE_TRUNC('month', b.date) = DATE_TRUNC('month', e.date)
+WHERE b.active = TRUE;
+"""
+
+# Ready-made point-in-time features (db/build_feature_store.py)
+FEATURE_STORE_QUERY = """
+SELECT *
+FROM bank_macro_features
+WHERE active IS DISTINCT FROM FALSE;
+"""
+
+NUMERIC_COLS = [
+    'total_assets', 'total_deposits', 'total_loans', 'net_income',
+    'roa', 'roe', 'nim', 'efficiency_ratio', 'tier1_capital_ratio',
+    'unemployment_rate', 'fed_funds_rate', 'gdp_growth', 'yield_curve',
+    'delinq_cc', 'delinq_mortgage',
+]
+
+LAGGED_METRICS = ['roa', 'roe', 'nim', 'total_loans', 'total_deposits', 'efficiency_ratio']
+
+FEATURE_COLS = [
+    'roa_lag1', 'roa_lag4', 'roe_lag1', 'nim_lag1',
+    'efficiency_ratio_lag1', 'total_loans_lag1', 'total_deposits_lag1',
+    'unemployment_rate', 'fed_funds_rate', 'gdp_growth', 'yield_curve',
+]
+TARGET_COL = 'target_next_roa'
+
+HOLDOUT_FRACTION = 0.2
+WINSOR_QUANTILES = (0.01, 0.99)
+CV_SPLITS = 5
+RANDOM_STATE = 42
+
+RF_PARAM_DISTRIBUTIONS = {
+    'model__n_estimators': [200, 300, 500, 700],
+    'model__max_depth': [4, 6, 8, 10, 14, None],
+    'model__min_samples_split': [2, 4, 6, 10],
+    'model__min_samples_leaf': [1, 2, 4, 8],
+    'model__max_features': ['sqrt', 0.7, 1.0],
+}
+RF_SEARCH_ITERATIONS = 20
+
+memory = joblib.Memory(location=str(CACHE_DIR / 'joblib'), verbose=0)
+
+
+def load_raw_frame(conn) -> pd.DataFrame:
+    """Read the bank x economics join used by the notebook."""
+    return pd.read_sql_query(RAW_QUERY, conn)
+
+
+def load_feature_store(conn) -> pd.DataFrame:
+    """Read engineered features from bank_macro_features (already lagged, no look-ahead)."""
+    return pd.read_sql_query(FEATURE_STORE_QUERY, conn, parse_dates=['date', 'econ_date'])
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Order-independent content hash of a frame (plus FEATURE_VERSION)."""
+    ordered = df.reindex(sorted(df.columns), axis=1)
+    ordered = ordered.sort_values(list(ordered.columns)).reset_index(drop=True)
+    row_hashes = pd.util.hash_pandas_object(ordered.astype(str), index=False).to_numpy()
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(','.join(ordered.columns).encode())
+    digest.update(f'features-v{FEATURE_VERSION}'.encode())
+    return digest.hexdigest()
+
+
+def engineer_features(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Clean the raw join and add per-bank lag/change features and the next-quarter target."""
+    df = df_raw.copy()
+    df.columns = [c.strip().lower() for c in df.columns]
+    df = df.rename(columns={'bank_date': 'date'})
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df = df.dropna(subset=['date', 'cert_number'])
+    df = df.drop_duplicates()
+
+    for col in NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df = df.sort_values(['cert_number', 'date']).reset_index(drop=True)
+
+    grouped = df.groupby('cert_number')
+    for metric in LAGGED_METRICS:
+        df[f'{metric}_lag1'] = grouped[metric].shift(1)
+        df[f'{metric}_lag4'] = grouped[metric].shift(4)
+        df[f'{metric}_chg_1p'] = df[metric] - df[f'{metric}_lag1']
+
+    df[TARGET_COL] = grouped['roa'].shift(-1)
+    return df
+
+
+def cached_features(df_raw: pd.DataFrame, fingerprint: Optional[str] = None) -> pd.DataFrame:
+    """Return engineered features, reusing the on-disk copy for identical source data."""
+    fingerprint = fingerprint or data_fingerprint(df_raw)
+    path = CACHE_DIR / f'roa_features_{fingerprint[:16]}.pkl'
+    if path.exists():
+        return pd.read_pickle(path)
+
+    features = engineer_features(df_raw)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    features.to_pickle(path)
+    return features
+
+
+def build_model_frame(features: pd.DataFrame) -> pd.DataFrame:
+    """Rows with every feature and the target present, in time order."""
+    model_df = features.dropna(subset=FEATURE_COLS + [TARGET_COL, 'date']).copy()
+    return model_df.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def winsor_bounds(df: pd.DataFrame, columns: List[str]) -> Dict[str, List[float]]:
+    """Per-column clip bounds at WINSOR_QUANTILES."""
+    quantiles = df[columns].quantile(list(WINSOR_QUANTILES))
+    return {col: [float(quantiles[col].iloc[0]), float(quantiles[col].iloc[1])] for col in columns}
+
+
+def clip_frame(df: pd.DataFrame, bounds: Dict[str, List[float]]) -> pd.DataFrame:
+    clipped = df.copy()
+    for col, (low, high) in bounds.items():
+        if col in clipped.columns:
+            clipped[col] = clipped[col].clip(lower=low, upper=high)
+    return clipped
+
+
+def regression_metrics(y_true, y_pred) -> Dict[str, float]:
+    return {
+        'MAE': float(mean_absolute_error(y_true, y_pred)),
+        'RMSE': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'R2': float(r2_score(y_true, y_pred)),
+    }
+
+
+def candidate_models() -> Dict[str, Pipeline]:
+    """Untuned candidates from the notebook; XGBoost is included when installed."""
+    candidates = {
+        'linear_regression': Pipeline([
+            ('imputer', SimpleImputer(strategy='median')),
+            ('scaler', StandardScaler()),
+            ('model', LinearRegression()),
+        ]),
+        'random_forest': Pipeline([
+            ('imputer', SimpleImputer(strategy='median')),
+            ('model', RandomForestRegressor(
+                n_estimators=300, max_depth=10, min_samples_leaf=4,
+                random_state=RANDOM_STATE, n_jobs=-1,
+            )),
+        ]),
+    }
+
+    try:
+        from xgboost import XGBRegressor
+    except ImportError:
+        return candidates
+
+    candidates['xgboost'] = Pipeline([
+        ('imputer', SimpleImputer(strategy='median')),
+        ('model', XGBRegressor(
+            n_estimators=400, learning_rate=0.03, max_depth=4,
+            subsample=0.85, colsample_bytree=0.85, reg_alpha=0.0, reg_lambda=1.0,
+            random_state=RANDOM_STATE, objective='reg:squarederror', n_jobs=-1,
+        )),
+    ])
+    return candidates
+
+
+@memory.cache
+def fit_candidate(name: str, estimator: Pipeline, X: pd.DataFrame, y: pd.Series) -> Pipeline:
+    """Fit one candidate; memoized on (name, estimator params, X, y)."""
+    return clone(estimator).fit(X, y)
+
+
+@memory.cache
+def search_random_forest(X: pd.DataFrame, y: pd.Series, n_jobs: int) -> Dict:
+    """Time-series CV random search for the RF pipeline, folds and candidates run in parallel."""
+    search = RandomizedSearchCV(
+        estimator=Pipeline([
+            ('imputer', SimpleImputer(strategy='median')),
+            ('model', RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=1)),
+        ]),
+        param_distributions=RF_PARAM_DISTRIBUTIONS,
+        n_iter=RF_SEARCH_ITERATIONS,
+        scoring='neg_root_mean_squared_error',
+        cv=TimeSeriesSplit(n_splits=CV_SPLITS),
+        random_state=RANDOM_STATE,
+        n_jobs=n_jobs,
+        refit=True,
+    )
+    search.fit(X, y)
+    return {
+        'estimator': search.best_estimator_,
+        'params': search.best_params_,
+        'cv_rmse': float(-search.best_score_),
+    }
+
+
+def train_models(model_df: pd.DataFrame, n_jobs: int = -1, tune: bool = True) -> Dict:
+    """
+    Fit all candidates on a time-ordered split of winsorized data.
+
+    Returns the leaderboard, the best model name, and that model refit on all rows.
+    """
+    split_idx = int(len(model_df) * (1 - HOLDOUT_FRACTION))
+    train_df, test_df = model_df.iloc[:split_idx], model_df.iloc[split_idx:]
+    if train_df.empty or test_df.empty:
+        raise ValueError(f'Not enough modeling rows to split ({len(model_df)})')
+
+    winsor_cols = FEATURE_COLS + [TARGET_COL]
+    bounds = winsor_bounds(train_df, winsor_cols)
+    train_w, test_w = clip_frame(train_df, bounds), clip_frame(test_df, bounds)
+    X_train, y_train = train_w[FEATURE_COLS], train_w[TARGET_COL]
+    X_test, y_test = test_w[FEATURE_COLS], test_w[TARGET_COL]
+
+    fitted = {name: fit_candidate(name, est, X_train, y_train) for name, est in candidate_models().items()}
+    details = {}
+    if tune:
+        rf_search = search_random_forest(X_train, y_train, n_jobs)
+        fitted['random_forest_tuned'] = rf_search['estimator']
+        details['random_forest_tuned'] = {'params': rf_search['params'], 'cv_rmse': rf_search['cv_rmse']}
+
+    leaderboard = []
+    for name, model in fitted.items():
+        leaderboard.append({
+            'model': name,
+            'train': regression_metrics(y_train, model.predict(X_train)),
+            'holdout': regression_metrics(y_test, model.predict(X_test)),
+            **details.get(name, {}),
+        })
+    leaderboard.sort(key=lambda row: row['holdout']['RMSE'])
+    best_name = leaderboard[0]['model']
+
+    full_bounds = winsor_bounds(model_df, winsor_cols)
+    full_w = clip_frame(model_df, full_bounds)
+    final_model = fit_candidate(f'{best_name}_final', fitted[best_name], full_w[FEATURE_COLS], full_w[TARGET_COL])
+
+    return {
+        'best_model': best_name,
+        'leaderboard': leaderboard,
+        'model': final_model,
+        'winsor_bounds': {col: full_bounds[col] for col in FEATURE_COLS},
+    }
+
+
+def artifact_path(fingerprint: str) -> Path:
+    return MODEL_DIR / f'roa_model_{fingerprint[:16]}.joblib'
+
+
+def save_artifact(result: Dict, fingerprint: str, n_rows: int) -> Path:
+    """Persist the trained model with its data fingerprint and point roa_model_latest.json at it."""
+    MODEL_DIR.mkdir(parents=True, exist_ok=True)
+    path = artifact_path(fingerprint)
+    artifact = {
+        'model': result['model'],
+        'model_name': result['best_model'],
+        'feature_cols': FEATURE_COLS,
+        'winsor_bounds': result['winsor_bounds'],
+        'fingerprint': fingerprint,
+        'feature_version': FEATURE_VERSION,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'n_rows': n_rows,
+        'leaderboard': result['leaderboard'],
+    }
+    joblib.dump(artifact, path)
+
+    metadata = {key: value for key, value in artifact.items() if key != 'model'}
+    metadata['path'] = path.name
+    (MODEL_DIR / 'roa_model_latest.json').write_text(json.dumps(metadata, indent=2))
+    return path
+
+
+def load_artifact(path: Optional[Path] = None) -> Dict:
+    """Load a saved artifact (default: the latest one)."""
+    if path is None:
+        latest = MODEL_DIR / 'roa_model_latest.json'
+        if not latest.exists():
+            raise FileNotFoundError(f'No trained ROA model in {MODEL_DIR}; run python3 roa_forecasting.py')
+        path = MODEL_DIR / json.loads(latest.read_text())['path']
+    return joblib.load(path)
+
+
+def predict(artifact: Dict, features: pd.DataFrame) -> np.ndarray:
+    """Score feature rows with an artifact, applying its winsorization bounds."""
+    X = clip_frame(features[artifact['feature_cols']], artifact['winsor_bounds'])
+    return artifact['model'].predict(X)
+
+
+def train(df_raw: pd.DataFrame, n_jobs: int = -1, tune: bool = True, force: bool = False,
+          engineered: bool = False) -> Path:
+    """
+    End-to-end: fingerprint, cached features, training, artifact. Skips work for known data.
+    With `engineered`, df_raw is already a feature frame (e.g. from the feature store).
+    """
+    fingerprint = data_fingerprint(df_raw)
+    path = artifact_path(fingerprint)
+    if path.exists() and not force:
+        print(f'✓ Model for data {fingerprint[:16]} already trained: {path}')
+        return path
+
+    features = df_raw if engineered else cached_features(df_raw, fingerprint)
+    model_df = build_model_frame(features)
+    result = train_models(model_df, n_jobs=n_jobs, tune=tune)
+    path = save_artifact(result, fingerprint, len(model_df))
+
+    print(f'✓ Trained on {len(model_df)} rows (data {fingerprint[:16]})')
+    for row in result['leaderboard']:
+        holdout = row['holdout']
+        print(f"  {row['model']:<22} RMSE {holdout['RMSE']:.4f}  MAE {holdout['MAE']:.4f}  R2 {holdout['R2']:.4f}")
+    print(f"✓ Best model: {result['best_model']} -> {path}")
+    return path
+
+
+def main() -> None:
+    import argparse
+
+    from pipeline_config import connect
+
+    parser = argparse.ArgumentParser(description='Train the next-quarter ROA forecasting model.')
+    parser.add_argument('--csv', type=Path, help='Use a capstone_joined_active export instead of PostgreSQL')
+    parser.add_argument('--from-store', action='store_true',
+                        help='Train on bank_macro_features (python3 cli.py features) instead of the raw join')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel jobs for CV and search')
+    parser.add_argument('--no-tune', action='store_true', help='Skip the random forest hyperparameter search')
+    parser.add_argument('--force', action='store_true', help='Retrain even if an artifact exists for this data')
+    args = parser.parse_args()
+
+    if args.csv:
+        raw = pd.read_csv(args.csv)
+    else:
+        conn = connect()
+        try:
+            raw = load_feature_store(conn) if args.from_store else load_raw_frame(conn)
+        finally:
+            conn.close()
+
+    train(raw, n_jobs=args.jobs, tune=not args.no_tune, force=args.force, engineered=args.from_store)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,8 @@ const router = express.Router();
 router.get('/economic-data', apiController.getEconomicData);
 router.get('/bank-performance/:cert', apiController.getBankPerformanceByCert);
 router.get('/correlation', apiController.getCorrelationData);
+router.get('/correlation-matrix', apiController.getCorrelationMatrix);
+router.get('/correlation-series', apiController.getCorrelationSeries);
 router.get('/dashboard-metrics', apiController.getDashboardMetrics);
 router.get('/bank-comparison-series', apiController.getBankComparisonSeries);
 router.get('/bank-composite-scores', apiController.getBankCompositeScores);
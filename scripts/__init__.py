@@ -0,0 +1 @@
+"""Standalone project scripts (run through cli.py or python3 -m scripts.<module>)."""
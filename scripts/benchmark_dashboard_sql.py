@@ -0,0 +1,299 @@
+"""
+Query-plan regression harness for the dashboard API SQL.
+
+Seeds a separate benchmark database (default: <DB_NAME>_bench) from
+db/schema.sql with scaled data from synthetic_data.py, loaded through the
+seeder's own seed_economic_data / seed_bank_performance. The SQL is read straight from
+controllers/apiController.js for:
+- /api/dashboard-metrics
+- /api/bank-comparison-series
+- /api/bank-composite-*
+
+Each query runs under EXPLAIN (ANALYZE, BUFFERS). The harness records median
+execution time, buffer counts and the plan shape (node types plus the
+relations and indexes they touch).
+
+Results are compared with the saved baseline (db/query_plan_baseline.json).
+The scale (banks and quarters) is read from bank_performance, not from the
+arguments. At the baseline's scale, a plan-shape change or a slowdown beyond
+--tolerance is a regression and the exit status is 1; at another scale, plan
+changes are only reported. The baseline keeps hashes of db/schema.sql and of
+each query, so the report says when either has changed since the baseline was
+taken.
+
+Usage:
+    python3 cli.py bench-sql [--banks 2000] [--quarters 80] [--runs 5]
+    python3 cli.py bench-sql --skip-seed --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import statistics
+import sys
+from pathlib import Path
+
+from pipeline_config import PROJECT_ROOT, connect, db_config
+from synthetic_data import GeneratorSettings, generate
+
+CONTROLLER_PATH = PROJECT_ROOT / 'controllers' / 'apiController.js'
+SCHEMA_PATH = PROJECT_ROOT / 'db' / 'schema.sql'
+BASELINE_PATH = PROJECT_ROOT / 'db' / 'query_plan_baseline.json'
+
+# Controller handler -> endpoint it serves
+DASHBOARD_HANDLERS = {
+    'getDashboardMetrics': '/api/dashboard-metrics',
+    'getBankComparisonSeries': '/api/bank-comparison-series',
+    'getBankCompositeScores': '/api/bank-composite-scores',
+    'getBankCompositeSeries': '/api/bank-composite-series',
+    'getBankMetricComposite': '/api/bank-metric-composite',
+}
+# Values for ${...} interpolations in the controller SQL
+TEMPLATE_VALUES = {'metric': 'roa'}
+
+DEFAULT_BANKS = 2000
+DEFAULT_QUARTERS = 80
+DEFAULT_RUNS = 5
+DEFAULT_TOLERANCE = 0.25      # allowed fractional slowdown
+MIN_REGRESSION_MS = 5.0       # ignore slowdowns smaller than this
+SEED = 7
+
+
+# --- Queries ----------------------------------------------------------------------
+
+def normalize_sql(sql: str) -> str:
+    return ' '.join(sql.split())
+
+
+def extract_queries(controller_path: Path = CONTROLLER_PATH) -> list[dict]:
+    """Every pool.query template literal inside the dashboard handlers, in source order."""
+    source = controller_path.read_text()
+    queries = []
+    for handler, endpoint in DASHBOARD_HANDLERS.items():
+        start = source.find(f'async function {handler}(')
+        if start < 0:
+            raise ValueError(f'{handler} not found in {controller_path}')
+        end = source.find('\nasync function ', start + 1)
+        body = source[start:end if end > 0 else len(source)]
+        for i, match in enumerate(re.finditer(r'pool\.query\(`(.*?)`', body, re.DOTALL)):
+            sql = re.sub(r'\$\{(\w+)\}', lambda m: TEMPLATE_VALUES[m.group(1)], match.group(1))
+            queries.append({
+                'name': f'{handler}[{i}]',
+                'endpoint': endpoint,
+                'sql': sql.strip(),
+                'sql_hash': hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:12],
+            })
+    return queries
+
+
+def query_params(name: str, certs: list[int]) -> dict:
+    """Sample bind values for a query's $n placeholders."""
+    if name.startswith('getBankCompositeScores'):
+        values = [0.4, 0.35, 0.25]
+    elif name in ('getBankComparisonSeries[1]', 'getBankMetricComposite[0]'):
+        values = [certs[:6]]
+    else:
+        values = [certs[0]]
+    return {f'p{i}': value for i, value in enumerate(values, start=1)}
+
+
+def to_psycopg(sql: str) -> str:
+    """$1-style placeholders -> psycopg2 named parameters."""
+    return re.sub(r'\$(\d+)', r'%(p\1)s', sql.replace('%', '%%'))
+
+
+# --- Benchmark database ----------------------------------------------------------------
+
+def ensure_database(name: str) -> None:
+    from psycopg2 import sql
+
+    admin = connect(dbname='postgres')
+    admin.autocommit = True
+    try:
+        cur = admin.cursor()
+        cur.execute('SELECT 1 FROM pg_database WHERE datname = %s', (name,))
+        if cur.fetchone() is None:
+            cur.execute(sql.SQL('CREATE DATABASE {}').format(sql.Identifier(name)))
+            print(f'✓ Created database {name}')
+        cur.close()
+    finally:
+        admin.close()
+
+
+def seed_benchmark(conn, banks: int, quarters: int) -> None:
+    """Recreate the schema and load synthetic data through the seeder."""
+    from db.seed_database import seed_bank_performance, seed_economic_data
+
+    cur = conn.cursor()
+    cur.execute(SCHEMA_PATH.read_text())
+    conn.commit()
+
+    # Clean profile: the seeder normally only sees validated CSVs
+    economic, bank = generate(GeneratorSettings(banks=banks, quarters=quarters, seed=SEED, clean=True))
+    seed_economic_data(conn, economic)
+    seed_bank_performance(conn, {str(cert): frame for cert, frame in bank.groupby('cert_number')})
+
+    conn.autocommit = True
+    cur.execute('VACUUM ANALYZE')
+    conn.autocommit = False
+    cur.close()
+
+
+# --- Plans ------------------------------------------------------------------------------
+
+def plan_shape(node: dict, depth: int = 0) -> list[str]:
+    """Indented node types with the relations/indexes they read; ignores costs and row counts."""
+    label = node['Node Type']
+    if node.get('Relation Name'):
+        label += f" on {node['Relation Name']}"
+    if node.get('Index Name'):
+        label += f" using {node['Index Name']}"
+    lines = ['  ' * depth + label]
+    for child in node.get('Plans', []):
+        lines.extend(plan_shape(child, depth + 1))
+    return lines
+
+
+def explain(conn, query: dict, params: dict, runs: int) -> dict:
+    cur = conn.cursor()
+    statement = 'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + to_psycopg(query['sql'])
+    cur.execute(statement, params)  # warm-up run
+    timings, planning = [], []
+    for _ in range(runs):
+        cur.execute(statement, params)
+        result = cur.fetchone()[0][0]
+        timings.append(result['Execution Time'])
+        planning.append(result['Planning Time'])
+    cur.close()
+    conn.rollback()
+
+    root = result['Plan']
+    shape = plan_shape(root)
+    return {
+        'endpoint': query['endpoint'],
+        'sql_hash': query['sql_hash'],
+        'median_ms': round(statistics.median(timings), 3),
+        'planning_ms': round(statistics.median(planning), 3),
+        'rows': root.get('Actual Rows'),
+        'shared_hit_blocks': root.get('Shared Hit Blocks'),
+        'shared_read_blocks': root.get('Shared Read Blocks'),
+        'temp_written_blocks': root.get('Temp Written Blocks'),
+        'shape': shape,
+        'shape_hash': hashlib.sha1('\n'.join(shape).encode()).hexdigest()[:12],
+    }
+
+
+def file_hash(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()[:12]
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regression messages (empty when the run matches the baseline)."""
+    regressions = []
+    if baseline['schema_hash'] != current['schema_hash']:
+        print('  ℹ db/schema.sql changed since the baseline')
+    same_scale = baseline['scale'] == current['scale']
+    if not same_scale:
+        print(f"  ⚠ Baseline scale {baseline['scale']} differs from this run ({current['scale']}); "
+              'timings not compared and plan changes reported only')
+
+    for name, result in current['queries'].items():
+        base = baseline['queries'].get(name)
+        if base is None:
+            print(f'  ℹ {name}: new query, no baseline')
+            continue
+        if base['sql_hash'] != result['sql_hash']:
+            print(f'  ℹ {name}: SQL changed since the baseline')
+        if base['shape_hash'] != result['shape_hash']:
+            message = (
+                f'{name}: plan shape changed\n    baseline:\n      ' + '\n      '.join(base['shape'])
+                + '\n    now:\n      ' + '\n      '.join(result['shape'])
+            )
+            # Plans legitimately change with data size, so only a same-scale change fails
+            if same_scale:
+                regressions.append(message)
+            else:
+                print(f'  ℹ {message}')
+        slower = result['median_ms'] - base['median_ms']
+        if same_scale and slower > MIN_REGRESSION_MS and result['median_ms'] > base['median_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: {base['median_ms']:.1f} ms -> {result['median_ms']:.1f} ms")
+    for name in baseline['queries'].keys() - current['queries'].keys():
+        print(f'  ℹ {name}: no longer in the controller')
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='EXPLAIN ANALYZE the dashboard SQL on scaled synthetic data.')
+    parser.add_argument('--database', help='Benchmark database (default: <DB_NAME>_bench); it is overwritten')
+    parser.add_argument('--banks', type=int, default=DEFAULT_BANKS)
+    parser.add_argument('--quarters', type=int, default=DEFAULT_QUARTERS)
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='Timed runs per query (median reported)')
+    parser.add_argument('--skip-seed', action='store_true', help='Reuse the data already in the benchmark database')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed fractional slowdown against the baseline')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    database = args.database or f"{db_config()['dbname']}_bench"
+    queries = extract_queries()
+
+    ensure_database(database)
+    conn = connect(dbname=database)
+    try:
+        if not args.skip_seed:
+            print(f'Seeding {database}: {args.banks} banks x {args.quarters} quarters')
+            seed_benchmark(conn, args.banks, args.quarters)
+
+        cur = conn.cursor()
+        cur.execute('SELECT cert_number FROM bank_performance GROUP BY cert_number ORDER BY COUNT(*) DESC, cert_number LIMIT 6')
+        certs = [row[0] for row in cur.fetchall()]
+        # Scale of the data actually loaded (with --skip-seed it need not match --banks/--quarters)
+        cur.execute('SELECT COUNT(DISTINCT cert_number), COUNT(DISTINCT date) FROM bank_performance')
+        banks, quarters = cur.fetchone()
+        cur.execute('SHOW server_version')
+        server_version = cur.fetchone()[0]
+        cur.close()
+        if not certs:
+            raise SystemExit(f'{database} has no bank_performance rows; run without --skip-seed')
+
+        current = {
+            'server_version': server_version,
+            'schema_hash': file_hash(SCHEMA_PATH),
+            'scale': {'banks': banks, 'quarters': quarters},
+            'queries': {},
+        }
+        for query in queries:
+            result = explain(conn, query, query_params(query['name'], certs), args.runs)
+            current['queries'][query['name']] = result
+            print(f"  {query['name']:<30} {result['median_ms']:>9.1f} ms  plan {result['shape_hash']}  "
+                  f"hit {result['shared_hit_blocks']} read {result['shared_read_blocks']} "
+                  f"temp {result['temp_written_blocks']}")
+    finally:
+        conn.close()
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + '\n')
+        print(f'✓ Baseline written to {args.baseline}')
+        return
+    if not args.baseline.exists():
+        print(f'  ℹ No baseline at {args.baseline}; re-run with --save-baseline to create one')
+        return
+
+    regressions = compare(current, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        print('\n✗ Query plan regressions:')
+        for message in regressions:
+            print(f'  - {message}')
+        sys.exit(1)
+    print('✓ No query plan regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import pandas as pd
 from pptx import Presentation
 from pptx.util import Inches, Pt
 
@@ -7,6 +11,17 @@ from pptx.util import Inches, Pt
 TITLE = "Bank Lending Strategy Optimizer"
 SUBTITLE = "Project 2 Team Presentation (Requirements-Aligned)"
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CHART_CACHE_DIR = PROJECT_ROOT / "data" / "cache" / "charts"
+
+# Bump to invalidate cached chart images when rendering code changes.
+CHART_RENDER_VERSION = 1
+
+MACRO_COLUMNS = ["unemployment_rate", "fed_funds_rate", "yield_curve"]
+DELINQUENCY_COLUMNS = ["delinq_cc", "delinq_mortgage", "delinq_consumer"]
+BANK_COLUMNS = ["cert_number", "bank_name", "date", "total_assets", "roa", "roe", "nim", "efficiency_ratio"]
+TOP_BANKS = 6
+
 
 def add_title_slide(prs: Presentation, title: str, subtitle: str) -> None:
     slide = prs.slides.add_slide(prs.slide_layouts[0])
@@ -43,7 +58,152 @@ def add_table_slide(prs: Presentation, title: str, headers: list[str], rows: lis
             tbl.cell(r, c).text = value
 
 
-def build_presentation(output_path: Path) -> None:
+def add_image_slide(prs: Presentation, title: str, image_path: Path) -> None:
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = title
+    slide.shapes.add_picture(str(image_path), Inches(0.6), Inches(1.3), width=Inches(8.8))
+
+
+def load_snapshot(source: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Economic and bank frames from PostgreSQL ('db') or a Parquet snapshot directory."""
+    if source == "db":
+        from pipeline_config import connect
+
+        conn = connect()
+        try:
+            econ = pd.read_sql_query(
+                f"SELECT date, {', '.join(MACRO_COLUMNS + DELINQUENCY_COLUMNS)} FROM economic_data ORDER BY date",
+                conn,
+            )
+            banks = pd.read_sql_query(
+                f"SELECT {', '.join(BANK_COLUMNS)} FROM bank_performance WHERE active = TRUE ORDER BY date",
+                conn,
+            )
+        finally:
+            conn.close()
+    else:
+        snapshot = Path(source)
+        econ = pd.read_parquet(snapshot / "economic_data.parquet", columns=["date"] + MACRO_COLUMNS + DELINQUENCY_COLUMNS)
+        banks = pd.read_parquet(snapshot / "bank_performance.parquet")
+        if "active" in banks.columns:
+            banks = banks[banks["active"].fillna(True).astype(bool)]
+        banks = banks[BANK_COLUMNS]
+
+    econ["date"] = pd.to_datetime(econ["date"])
+    banks["date"] = pd.to_datetime(banks["date"])
+    numeric = [col for col in BANK_COLUMNS if col not in ("cert_number", "bank_name", "date")]
+    banks[numeric] = banks[numeric].apply(pd.to_numeric, errors="coerce")
+    econ[MACRO_COLUMNS + DELINQUENCY_COLUMNS] = econ[MACRO_COLUMNS + DELINQUENCY_COLUMNS].apply(pd.to_numeric, errors="coerce")
+    return econ, banks
+
+
+def build_chart_specs(econ: pd.DataFrame, banks: pd.DataFrame) -> list[dict]:
+    """Chart definitions: id, slide title, kind and the exact data the chart draws."""
+    largest = banks.groupby("cert_number")["total_assets"].mean().nlargest(TOP_BANKS).index
+    top = banks[banks["cert_number"].isin(largest)]
+    roa_wide = top.pivot_table(index="date", columns="bank_name", values="roa")
+
+    latest = banks[banks["date"] == banks["date"].max()]
+    latest = latest.nlargest(TOP_BANKS * 2, "total_assets").set_index("bank_name")[["roa", "roe"]].sort_values("roa")
+
+    return [
+        {"id": "macro", "title": "Macro Backdrop", "kind": "line",
+         "data": econ.set_index("date")[MACRO_COLUMNS].dropna(how="all"), "ylabel": "%"},
+        {"id": "delinquency", "title": "Consumer Credit Delinquency", "kind": "line",
+         "data": econ.set_index("date")[DELINQUENCY_COLUMNS].dropna(how="all"), "ylabel": "% of loans"},
+        {"id": "roa_trend", "title": "ROA Trend: Largest Banks", "kind": "line",
+         "data": roa_wide, "ylabel": "ROA (%)"},
+        {"id": "latest_peers", "title": f"Latest Quarter Profitability ({banks['date'].max():%Y-%m-%d})",
+         "kind": "barh", "data": latest, "ylabel": "%"},
+    ]
+
+
+def chart_fingerprint(spec: dict) -> str:
+    data = spec["data"]
+    digest = hashlib.sha256()
+    digest.update(f"{spec['id']}|{spec['kind']}|{spec['title']}|v{CHART_RENDER_VERSION}".encode())
+    digest.update(",".join(map(str, data.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def render_chart(spec: dict, path: Path) -> Path:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(11, 5.5), dpi=150)
+    spec["data"].plot(ax=ax, kind=spec["kind"], linewidth=1.6 if spec["kind"] == "line" else None)
+    ax.set_title(spec["title"])
+    if spec["kind"] == "barh":
+        ax.set_xlabel(spec["ylabel"])
+        ax.set_ylabel("")
+    else:
+        ax.set_ylabel(spec["ylabel"])
+        ax.set_xlabel("")
+    ax.grid(alpha=0.3)
+    ax.legend(fontsize=8, loc="best")
+    fig.tight_layout()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp.png")
+    fig.savefig(tmp_path)
+    plt.close(fig)
+    tmp_path.replace(path)
+    return path
+
+
+def render_charts(specs: list[dict], workers: int | None = None) -> dict[str, Path]:
+    """Render charts whose data changed (in a process pool); reuse cached images otherwise."""
+    paths = {spec["id"]: CHART_CACHE_DIR / f"{spec['id']}_{chart_fingerprint(spec)}.png" for spec in specs}
+    stale = [spec for spec in specs if not paths[spec["id"]].exists()]
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render_chart, stale, [paths[spec["id"]] for spec in stale]))
+
+    # Drop images rendered from older data for the same charts.
+    for spec in specs:
+        for old in CHART_CACHE_DIR.glob(f"{spec['id']}_*.png"):
+            if old != paths[spec["id"]]:
+                old.unlink()
+    print(f"Charts: {len(stale)} rendered, {len(specs) - len(stale)} reused from cache")
+    return paths
+
+
+def latest_metric_rows(banks: pd.DataFrame) -> list[list[str]]:
+    latest = banks[banks["date"] == banks["date"].max()].nlargest(8, "total_assets")
+    return [
+        [
+            str(row.bank_name),
+            f"{row.total_assets / 1e6:,.0f}",
+            f"{row.roa:.2f}",
+            f"{row.roe:.2f}",
+            f"{row.nim:.2f}",
+            f"{row.efficiency_ratio:.1f}",
+        ]
+        for row in latest.itertuples()
+    ]
+
+
+def add_data_slides(prs: Presentation, source: str, workers: int | None = None) -> None:
+    econ, banks = load_snapshot(source)
+    specs = build_chart_specs(econ, banks)
+    paths = render_charts(specs, workers)
+
+    for spec in specs:
+        add_image_slide(prs, spec["title"], paths[spec["id"]])
+
+    add_table_slide(
+        prs,
+        f"Largest Banks, {banks['date'].max():%Y-%m-%d}",
+        ["Bank", "Assets ($B)", "ROA %", "ROE %", "NIM %", "Efficiency %"],
+        latest_metric_rows(banks),
+    )
+
+
+def build_presentation(output_path: Path, data_source: str | None = None, workers: int | None = None) -> None:
     prs = Presentation()
 
     add_title_slide(
@@ -93,6 +253,9 @@ def build_presentation(output_path: Path) -> None:
         "Methodology visualizations are now embedded directly in the web app.",
     ])
 
+    if data_source:
+        add_data_slides(prs, data_source, workers)
+
     requirement_rows = [
         ["Node + Express", "✅ Met", "Express app with structured API + page routes"],
         ["Handlebars", "✅ Met", "Server-side rendering across core pages"],
@@ -147,7 +310,20 @@ def build_presentation(output_path: Path) -> None:
     prs.save(output_path)
 
 
-if __name__ == "__main__":
-    out = Path(__file__).resolve().parents[1] / "Project2_Team_Presentation_Bank_Lending_Strategy_Optimizer.pptx"
-    build_presentation(out)
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the Project 2 team presentation.")
+    parser.add_argument(
+        "--data",
+        help="Add data-driven chart slides from 'db' (PostgreSQL) or a Parquet snapshot directory "
+             "containing economic_data.parquet and bank_performance.parquet",
+    )
+    parser.add_argument("--workers", type=int, help="Chart rendering processes (default: CPU count)")
+    args = parser.parse_args()
+
+    out = PROJECT_ROOT / "Project2_Team_Presentation_Bank_Lending_Strategy_Optimizer.pptx"
+    build_presentation(out, data_source=args.data, workers=args.workers)
     print(f"Created: {out}")
+
+
+if __name__ == "__main__":
+    main()
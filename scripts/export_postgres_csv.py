@@ -1,32 +1,19 @@
-import os
+import argparse
 from pathlib import Path
 from datetime import datetime
 
 import pandas as pd
-from dotenv import load_dotenv
-import psycopg2
 
+from pipeline_config import PROJECT_ROOT, connect
 
-def main() -> None:
-    load_dotenv(Path(__file__).resolve().parents[1] / '.env')
-
-    cfg = {
-        'host': os.getenv('DB_HOST', 'localhost'),
-        'port': int(os.getenv('DB_PORT', '5432')),
-        'user': os.getenv('DB_USER', 'postgres'),
-        'password': os.getenv('DB_PASSWORD', ''),
-        'dbname': os.getenv('DB_NAME', 'bank_lending_db'),
-    }
-
-    out_dir = Path(__file__).resolve().parents[1] / 'data' / 'exports'
-    out_dir.mkdir(parents=True, exist_ok=True)
 
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    queries = [
-        (f'bank_performance_{timestamp}.csv', 'SELECT * FROM bank_performance ORDER BY date, cert_number;'),
-        (f'economic_data_{timestamp}.csv', 'SELECT * FROM economic_data ORDER BY date;'),
+def export_queries(timestamp: str) -> list[tuple[str, str]]:
+    """(file stem, SQL) pairs; the SQL runs unchanged on PostgreSQL and DuckDB."""
+    return [
+        (f'bank_performance_{timestamp}', 'SELECT * FROM bank_performance ORDER BY date, cert_number;'),
+        (f'economic_data_{timestamp}', 'SELECT * FROM economic_data ORDER BY date;'),
         (
-            f'capstone_joined_active_{timestamp}.csv',
+            f'capstone_joined_active_{timestamp}',
             '''
             SELECT
                 b.cert_number,
@@ -58,16 +45,64 @@ def main() -> None:
         ),
     ]
 
-    conn = psycopg2.connect(**cfg)
+
+def export_postgres(queries: list[tuple[str, str]], out_dir: Path, fmt: str) -> None:
+    conn = connect()
     try:
-        for filename, sql in queries:
+        for stem, sql in queries:
             df = pd.read_sql_query(sql, conn)
-            path = out_dir / filename
-            df.to_csv(path, index=False)
+            path = out_dir / f'{stem}.{fmt}'
+            if fmt == 'parquet':
+                df.to_parquet(path, index=False)
+            else:
+                df.to_csv(path, index=False)
             print(f'exported={path} rows={len(df)} cols={df.shape[1]}')
     finally:
         conn.close()
 
 
+def export_duckdb(queries: list[tuple[str, str]], out_dir: Path, fmt: str, source_dir: Path) -> None:
+    """Run the export queries in embedded DuckDB over Parquet/CSV snapshots; DuckDB writes the files."""
+    from duckdb_backend import connect as connect_duckdb
+
+    con = connect_duckdb(source_dir, tables=['bank_performance', 'economic_data'])
+    try:
+        for stem, sql in queries:
+            path = out_dir / f'{stem}.{fmt}'
+            options = '(FORMAT parquet)' if fmt == 'parquet' else '(FORMAT csv, HEADER)'
+            con.execute(f"COPY ({sql.strip().rstrip(';')}) TO '{path}' {options}")
+            rows, cols = con.execute(
+                f"SELECT COUNT(*), (SELECT COUNT(*) FROM (DESCRIBE SELECT * FROM '{path}')) FROM '{path}'"
+            ).fetchone()
+            print(f'exported={path} rows={rows} cols={cols}')
+    finally:
+        con.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Export bank/economic tables and the joined capstone dataset.')
+    parser.add_argument('--backend', choices=['postgres', 'duckdb'], default='postgres',
+                        help='postgres (default) or embedded DuckDB over --source snapshots')
+    parser.add_argument('--source', type=Path, default=PROJECT_ROOT / 'data' / 'exports',
+                        help='DuckDB only: directory with bank_performance/economic_data Parquet or CSV files')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+
+    out_dir = PROJECT_ROOT / 'data' / 'exports'
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    queries = export_queries(timestamp)
+
+    if args.backend == 'duckdb':
+        export_duckdb(queries, out_dir, args.format, args.source)
+    else:
+        export_postgres(queries, out_dir, args.format)
+
+
 if __name__ == '__main__':
     main()
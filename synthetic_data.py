@@ -0,0 +1,386 @@
+# Synthetic FDIC/FRED data for scale testing
+# Generates data/bank_data.csv- and data/fred_data.csv-shaped datasets for N
+# banks x Q quarters: bank metrics correlated with each other and with a
+# simulated macro cycle, FDIC-style null patterns and year-to-date net income,
+# de novo entries, mergers (target goes inactive, acquirer absorbs its assets)
+# and NIM unit quirks. Banks are generated in fixed-size chunks seeded from
+# (seed, chunk), so the output is identical for any number of workers, and
+# chunks are streamed to CSV or Parquet as they complete.
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_OUTPUT_DIR = PROJECT_ROOT / 'data' / 'synthetic'
+
+BANKS_PER_CHUNK = 500
+FIRST_CERT = 100_001   # clear of the real MAJOR_BANKS certs
+
+# Same column order as db/fetch_major_bank_data.py and db/fetch_fred_data.py
+BANK_COLUMNS = [
+    'report_date', 'total_assets', 'total_deposits', 'net_loans', 'net_income',
+    'return_on_assets', 'return_on_equity', 'net_interest_margin', 'efficiency_ratio',
+    'nonperforming_loans', 'tier1_capital_ratio', 'cert_number', 'bank_name', 'city', 'state', 'active',
+]
+FRED_COLUMNS = [
+    'date', 'delinq_cc', 'delinq_mortgage', 'delinq_consumer', 'fed_funds_rate', 'prime_rate',
+    'mortgage_30y', 'treasury_10y', 'treasury_2y', 'unemployment_rate', 'cpi',
+    'consumer_sentiment', 'gdp_growth', 'yield_curve',
+]
+
+# Correlation of bank-level traits: profitability, NIM, efficiency ratio, capital
+TRAIT_CORRELATION = np.array([
+    [1.00, 0.45, -0.60, 0.20],
+    [0.45, 1.00, -0.10, 0.00],
+    [-0.60, -0.10, 1.00, -0.10],
+    [0.20, 0.00, -0.10, 1.00],
+])
+
+LOCATIONS = [
+    ('Columbus', 'OH'), ('Springfield', 'IL'), ('Dallas', 'TX'), ('Charlotte', 'NC'),
+    ('Minneapolis', 'MN'), ('Denver', 'CO'), ('Richmond', 'VA'), ('Des Moines', 'IA'),
+    ('Sacramento', 'CA'), ('Albany', 'NY'), ('Tampa', 'FL'), ('Omaha', 'NE'),
+]
+NAME_PATTERNS = [
+    'First National Bank of {city}', '{city} Savings Bank', 'Community Bank of {city}',
+    '{city} Trust Company', 'Farmers & Merchants Bank of {city}', 'Citizens Bank of {city}',
+]
+
+# Quarters before this date have tier 1 ratios missing for some banks (reporting change)
+TIER1_REPORTING_START = pd.Timestamp('2002-01-01')
+
+
+@dataclass
+class GeneratorSettings:
+    """
+    Parameters:
+    -----------
+    banks : int
+        Institutions to generate (some enter late, some merge away)
+    quarters : int
+        Report quarters ending at end_quarter
+    seed : int
+        Every output byte is a function of the settings, including the seed
+    null_rate : float
+        Share of sporadically missing efficiency / nonperforming loan values
+    merger_rate : float
+        Per-quarter probability that a bank is acquired
+    nim_quirk_rate : float
+        Share of banks reporting NIM in the wrong unit (fraction instead of
+        percent, or the FDIC NIM dollar field instead of NIMY)
+    clean : bool
+        No NIM quirks and no nulls in the columns validate_bank_data requires
+    """
+    banks: int = 1000
+    quarters: int = 100
+    seed: int = 42
+    end_quarter: str = '2025Q4'
+    null_rate: float = 0.02
+    merger_rate: float = 0.006
+    nim_quirk_rate: float = 0.01
+    clean: bool = False
+
+    def quarter_ends(self) -> pd.DatetimeIndex:
+        end = pd.Period(self.end_quarter, freq='Q')
+        return pd.period_range(end=end, periods=self.quarters, freq='Q').to_timestamp(how='end').normalize()
+
+    def months(self) -> pd.DatetimeIndex:
+        """Monthly grid from a year before the first quarter through the last quarter."""
+        quarter_ends = self.quarter_ends()
+        start = (quarter_ends[0] - pd.DateOffset(months=14)).to_period('M').to_timestamp()
+        return pd.date_range(start, quarter_ends[-1], freq='MS')
+
+
+def generate_fred(settings: GeneratorSettings) -> pd.DataFrame:
+    """Monthly macro series driven by one AR(1) business-cycle factor."""
+    rng = np.random.default_rng([settings.seed, 0])
+    months = settings.months()
+    n = len(months)
+
+    cycle = np.zeros(n)
+    for t in range(1, n):
+        cycle[t] = 0.97 * cycle[t - 1] + rng.normal(0, 0.18)
+    smooth = pd.Series(cycle).rolling(6, min_periods=1).mean().to_numpy()
+
+    fed_funds = np.clip(3.0 - 1.4 * smooth + np.cumsum(rng.normal(0, 0.05, n)), 0.05, 7.5)
+    treasury_2y = np.clip(fed_funds + 0.2 + rng.normal(0, 0.15, n), 0.1, 8.0)
+    treasury_10y = np.clip(treasury_2y + 1.0 + 0.4 * smooth + rng.normal(0, 0.15, n), 0.5, 9.0)
+    frame = pd.DataFrame({
+        'date': months,
+        'delinq_cc': np.clip(3.6 + 0.9 * smooth + rng.normal(0, 0.1, n), 1.5, 8.0),
+        'delinq_mortgage': np.clip(2.4 + 1.8 * np.maximum(smooth, 0) + rng.normal(0, 0.1, n), 1.0, 11.5),
+        'delinq_consumer': np.clip(2.8 + 0.6 * smooth + rng.normal(0, 0.08, n), 1.2, 6.0),
+        'fed_funds_rate': fed_funds,
+        'prime_rate': fed_funds + 3.0,
+        'mortgage_30y': treasury_10y + 1.7 + rng.normal(0, 0.1, n),
+        'treasury_10y': treasury_10y,
+        'treasury_2y': treasury_2y,
+        'unemployment_rate': np.clip(5.5 + 1.7 * smooth + rng.normal(0, 0.1, n), 3.4, 14.7),
+        'cpi': 170 * np.exp(np.cumsum(rng.normal(0.0021, 0.002, n))),
+        'consumer_sentiment': np.clip(88 - 9 * smooth + rng.normal(0, 2.5, n), 50, 112),
+    })
+
+    # GDP is quarterly: growth of a level series, forward-filled through the quarter
+    quarter = months.to_period('Q')
+    quarterly_growth = pd.Series(0.6 - 0.9 * np.diff(smooth, prepend=smooth[0]) * 3 + rng.normal(0, 0.4, n),
+                                 index=months).groupby(quarter).first()
+    frame['gdp_growth'] = quarterly_growth.reindex(quarter).to_numpy()
+
+    # Delinquency rates are quarterly releases: forward-filled within the quarter,
+    # and the latest quarter is not published yet
+    for col in ('delinq_cc', 'delinq_mortgage', 'delinq_consumer'):
+        frame[col] = frame.groupby(quarter)[col].transform('first')
+        if not settings.clean:
+            frame.loc[quarter == quarter[-1], col] = np.nan
+
+    frame['yield_curve'] = frame['treasury_10y'] - frame['treasury_2y']
+    frame = frame.round({col: 4 for col in FRED_COLUMNS[1:]})
+    return frame[FRED_COLUMNS]
+
+
+def quarterly_macro(fred: pd.DataFrame, quarter_ends: pd.DatetimeIndex) -> dict:
+    """Quarter-end macro drivers for the bank generator, demeaned."""
+    monthly = fred.set_index(fred['date'].dt.to_period('M'))
+    drivers = {}
+    for col in ('unemployment_rate', 'fed_funds_rate', 'delinq_cc'):
+        values = monthly[col].ffill().reindex(quarter_ends.to_period('M')).to_numpy()
+        drivers[col] = values - np.nanmean(values)
+    return drivers
+
+
+def _ytd(quarterly: np.ndarray, quarter_ends: pd.DatetimeIndex) -> np.ndarray:
+    """FDIC net income is year-to-date: cumulative within each calendar year."""
+    cumulative = np.cumsum(np.nan_to_num(quarterly), axis=1)
+    years = quarter_ends.year.to_numpy()
+    first_of_year = np.searchsorted(years, years, side='left')
+    before = np.where(first_of_year > 0, first_of_year - 1, 0)
+    offset = np.where(first_of_year > 0, cumulative[:, before], 0.0)
+    return cumulative - offset
+
+
+def generate_bank_chunk(settings: GeneratorSettings, chunk: int, drivers: dict) -> pd.DataFrame:
+    """Banks [chunk * BANKS_PER_CHUNK, ...) as bank_data rows, seeded from (seed, chunk)."""
+    rng = np.random.default_rng([settings.seed, chunk + 1])
+    first = chunk * BANKS_PER_CHUNK
+    B = min(BANKS_PER_CHUNK, settings.banks - first)
+    quarter_ends = settings.quarter_ends()
+    Q = len(quarter_ends)
+    unemployment, fed_funds, delinquency = (drivers[k][None, :] for k in ('unemployment_rate', 'fed_funds_rate', 'delinq_cc'))
+
+    def ar1(phi: float, scale: float) -> np.ndarray:
+        shocks = rng.normal(0, scale, (B, Q))
+        out = np.empty_like(shocks)
+        out[:, 0] = shocks[:, 0]
+        for t in range(1, Q):
+            out[:, t] = phi * out[:, t - 1] + shocks[:, t]
+        return out
+
+    traits = rng.multivariate_normal(np.zeros(4), TRAIT_CORRELATION, size=B)
+    prof, nim_z, eff_z, cap_z = (traits[:, i:i + 1] for i in range(4))
+
+    # Size: log-normal, drifting with profitability and the cycle
+    log_assets = rng.normal(12.4, 1.7, (B, 1)) + np.cumsum(
+        rng.normal(0.012, 0.025, (B, Q)) + 0.004 * prof - 0.006 * unemployment / 4, axis=1)
+
+    roa = 1.05 + 0.35 * prof - 0.12 * unemployment - 0.08 * delinquency + ar1(0.6, 0.15)
+    nim = np.clip(3.3 + 0.6 * nim_z + 0.12 * fed_funds + ar1(0.7, 0.08), 0.8, 7.5)
+    efficiency = np.clip(62 + 9 * eff_z - 6 * (roa - 1.05) + rng.normal(0, 2, (B, Q)), 30, 140)
+    tier1 = np.clip(12.5 + 2.5 * cap_z + np.cumsum(rng.normal(0, 0.1, (B, Q)), axis=1), 5.5, 40)
+    equity_ratio = np.clip(tier1 / 100 * rng.uniform(0.8, 0.95, (B, 1)), 0.04, None)
+
+    # Entry (de novo banks) and exit (acquired banks)
+    entry = np.where(rng.random(B) < 0.15, rng.integers(0, Q, B), 0)
+    hazard = rng.random((B, Q)) < settings.merger_rate
+    hazard[np.arange(Q)[None, :] <= entry[:, None]] = False
+    exit_q = np.where(hazard.any(axis=1), hazard.argmax(axis=1), Q)
+    alive = (np.arange(Q)[None, :] >= entry[:, None]) & (np.arange(Q)[None, :] < exit_q[:, None])
+
+    # Acquirers absorb the target's balance sheet from the merger quarter on
+    for target in np.argsort(exit_q):
+        q = exit_q[target]
+        if q >= Q:
+            break
+        candidates = np.flatnonzero(alive[:, q] & (exit_q > q))
+        if len(candidates) == 0:
+            continue
+        acquirer = rng.choice(candidates)
+        added = np.exp(log_assets[target, q - 1]) / np.exp(log_assets[acquirer, q])
+        log_assets[acquirer, q:] += np.log1p(added)
+
+    assets = np.exp(log_assets)
+    deposits = assets * np.clip(rng.uniform(0.72, 0.88, (B, 1)) + rng.normal(0, 0.015, (B, Q)), 0.5, 0.95)
+    loans = assets * np.clip(rng.uniform(0.5, 0.72, (B, 1)) + rng.normal(0, 0.015, (B, Q)), 0.2, 0.9)
+    npl_ratio = np.clip(0.7 + 0.3 * delinquency - 0.2 * prof + ar1(0.8, 0.1), 0.02, None)
+    # A de novo bank's first year-to-date figure counts only the quarters since it opened
+    net_income = _ytd(np.where(alive, roa / 100 * assets / 4, 0.0), quarter_ends)
+
+    nim_reported = nim.copy()
+    efficiency_reported = efficiency.copy()
+    npl = loans * npl_ratio / 100
+    tier1_reported = tier1.copy()
+    efficiency_reported[rng.random((B, Q)) < settings.null_rate] = np.nan
+    npl[rng.random((B, Q)) < settings.null_rate] = np.nan
+    if not settings.clean:
+        early = np.asarray(quarter_ends < TIER1_REPORTING_START)
+        tier1_reported[(rng.random(B) < 0.3)[:, None] & early[None, :]] = np.nan
+        quirky = np.flatnonzero(rng.random(B) < settings.nim_quirk_rate)
+        for bank in quirky:
+            start = rng.integers(0, Q)
+            stop = min(Q, start + rng.integers(4, 20))
+            if rng.random() < 0.5:
+                nim_reported[bank, start:stop] /= 100                                  # fraction, not percent
+            else:
+                nim_reported[bank, start:stop] *= assets[bank, start:stop] / 400       # NIM dollar field
+
+    certs = np.arange(FIRST_CERT + first, FIRST_CERT + first + B)
+    locations = rng.integers(0, len(LOCATIONS), B)
+    patterns = rng.integers(0, len(NAME_PATTERNS), B)
+    names = [NAME_PATTERNS[p].format(city=LOCATIONS[l][0]) for p, l in zip(patterns, locations)]
+
+    rows, cols = np.nonzero(alive)
+    frame = pd.DataFrame({
+        'report_date': quarter_ends[cols],
+        'total_assets': assets[rows, cols].round(0),
+        'total_deposits': deposits[rows, cols].round(0),
+        'net_loans': loans[rows, cols].round(0),
+        'net_income': net_income[rows, cols].round(0),
+        'return_on_assets': roa[rows, cols].round(4),
+        'return_on_equity': (roa / equity_ratio)[rows, cols].round(4),
+        'net_interest_margin': nim_reported[rows, cols].round(4),
+        'efficiency_ratio': efficiency_reported[rows, cols].round(4),
+        'nonperforming_loans': npl[rows, cols].round(0),
+        'tier1_capital_ratio': tier1_reported[rows, cols].round(4),
+        'cert_number': certs[rows],
+        'bank_name': np.array(names, dtype=object)[rows],
+        'city': np.array([LOCATIONS[l][0] for l in locations], dtype=object)[rows],
+        'state': np.array([LOCATIONS[l][1] for l in locations], dtype=object)[rows],
+        'active': (exit_q >= Q)[rows],
+    })
+    return frame[BANK_COLUMNS]
+
+
+def _chunk_job(args: Tuple[GeneratorSettings, int, dict]) -> pd.DataFrame:
+    return generate_bank_chunk(*args)
+
+
+def iter_bank_chunks(settings: GeneratorSettings, fred: pd.DataFrame,
+                     workers: int = 1) -> Iterator[pd.DataFrame]:
+    """Bank chunks in cert order; generated in a process pool when workers > 1."""
+    drivers = quarterly_macro(fred, settings.quarter_ends())
+    jobs = [(settings, chunk, drivers) for chunk in range(-(-settings.banks // BANKS_PER_CHUNK))]
+    if workers <= 1:
+        yield from map(_chunk_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Bounded window so memory stays flat however many chunks there are
+        pending = []
+        for job in jobs:
+            pending.append(pool.submit(_chunk_job, job))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def generate(settings: GeneratorSettings, workers: int = 1) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """In-memory (fred_data, bank_data) frames, for tests and moderate sizes."""
+    fred = generate_fred(settings)
+    return fred, pd.concat(iter_bank_chunks(settings, fred, workers), ignore_index=True)
+
+
+class _TableWriter:
+    """Append frames to one CSV or Parquet file, written under a temporary name until closed."""
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.tmp_path = path.with_name(path.name + '.tmp')
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+        self._file = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.tmp_path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            if self._file is None:
+                self._file = open(self.tmp_path, 'w', newline='')
+                frame.to_csv(self._file, index=False)
+            else:
+                frame.to_csv(self._file, index=False, header=False)
+        self.rows += len(frame)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def write_dataset(settings: GeneratorSettings, output_dir: Path, fmt: str = 'csv',
+                  workers: int = 1) -> Tuple[Path, Path]:
+    """Stream fred_data and bank_data files into output_dir; returns their paths."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fred = generate_fred(settings)
+    fred_writer = _TableWriter(output_dir / f'fred_data.{fmt}', fmt)
+    fred_writer.write(fred)
+    fred_writer.close()
+
+    bank_writer = _TableWriter(output_dir / f'bank_data.{fmt}', fmt)
+    banks = 0
+    for frame in iter_bank_chunks(settings, fred, workers):
+        bank_writer.write(frame)
+        banks += frame['cert_number'].nunique()
+        print(f'  {banks:,}/{settings.banks:,} banks, {bank_writer.rows:,} rows', end='\r', flush=True)
+    bank_writer.close()
+    print()
+    return fred_writer.path, bank_writer.path
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Generate synthetic FDIC/FRED datasets for scale testing.')
+    parser.add_argument('--banks', type=int, default=GeneratorSettings.banks)
+    parser.add_argument('--quarters', type=int, default=GeneratorSettings.quarters)
+    parser.add_argument('--seed', type=int, default=GeneratorSettings.seed)
+    parser.add_argument('--end-quarter', default=GeneratorSettings.end_quarter)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT_DIR,
+                        help='Output directory (use data/ to feed validate/seed directly)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--null-rate', type=float, default=GeneratorSettings.null_rate)
+    parser.add_argument('--merger-rate', type=float, default=GeneratorSettings.merger_rate)
+    parser.add_argument('--nim-quirk-rate', type=float, default=GeneratorSettings.nim_quirk_rate)
+    parser.add_argument('--clean', action='store_true',
+                        help='No NIM quirks or nulls in validated columns (passes validate_bank_data)')
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    settings = GeneratorSettings(
+        banks=args.banks, quarters=args.quarters, seed=args.seed, end_quarter=args.end_quarter,
+        null_rate=args.null_rate, merger_rate=args.merger_rate, nim_quirk_rate=args.nim_quirk_rate,
+        clean=args.clean,
+    )
+    print(f'Generating {settings.banks:,} banks x {settings.quarters} quarters (seed {settings.seed})')
+    fred_path, bank_path = write_dataset(settings, args.output, args.format, args.workers)
+    print(f'✓ Wrote {fred_path}')
+    print(f'✓ Wrote {bank_path}')
+
+
+if __name__ == '__main__':
+    main()